@@ -51,6 +51,8 @@ class AIIdle(_AIStatePrototype):
                 temp = (pos.x + randint(-5,5), pos.y + randint(-5,5))
             path = fpath((pos.x,pos.y),temp)
             for i in range(randint(2,10)):
+                if path == []:
+                    break
                 x,y = path[-1]
                 point_new = (x+randint(-5,5), y+randint(-5,5))
                 if freachable(vec2(point_new)):
@@ -84,30 +86,23 @@ class AIAttack(_AIStatePrototype):
         self.player = player
         
     def execute(self, dynamic_object, current, delta):
-        """Upewnia sie, ze potworek podaza droga lub atakuje, wyswietlajaca odpowiednia animacje, zaleznie od tego czy gracz jest w zasiegu ataku"""
+        """
+        Upewnia sie, ze potworek podaza do gracza lub atakuje, wyswietlajaca odpowiednia animacje, zaleznie od tego czy gracz jest w zasiegu ataku.
+        Blisko gracza potworek idzie po wspolnym polu odleglosci srodowiska (flow_step), dalej - po sciezce wyznaczonej przez findLongPath.
+        """
         dynamic_object.time -= delta
         player_pos = self.player.get_position()
         distance = dist(dynamic_object.get_position(), player_pos)
-        path = dynamic_object.get_path()
-        
-        if path == [] or dist(self.player.get_position(), vec2(dynamic_object.get_last_path_point())) > AIAttack.SEARCH_PATH_DIST:
-            obj_pos = dynamic_object.get_position()
-            obj_pos += player_pos.normal()        
-            obj_pos = obj_pos.intcpl()
-            player_pos = player_pos.intcpl()
-            path = dynamic_object.get_environment().findPath(obj_pos, player_pos)
-            path = path[1:]
-          
-            dynamic_object.set_path(path)
-           
+
         if distance > AIAttack.ATTACK_RADIUS*dynamic_object.get_monster_type():
-            if path != []:
-                got_there = dynamic_object.move_to(vec2(path[0]), delta)
-                if got_there:
-                    path = path[1:]
-                    dynamic_object.set_path(path)    
+            step = dynamic_object.get_environment().flow_step(dynamic_object.get_position(), player_pos)
+            if step is not None:
+                dynamic_object.set_path([])
+                dynamic_object.move_to(step, delta)
                 if dynamic_object._anim_sprite != dynamic_object.RUNNING:
                     dynamic_object.animate(dynamic_object.RUNNING, current)
+            else:
+                self._follow_path(dynamic_object, current, delta)
         else:
                 dynamic_object.set_direction( self.player.get_position() - dynamic_object.get_position())
                 
@@ -123,6 +118,24 @@ class AIAttack(_AIStatePrototype):
                         SoundEffects.MeleeSound.play()
             
         return self;
+
+    def _follow_path(self, dynamic_object, current, delta):
+        player_pos = self.player.get_position()
+        path = dynamic_object.get_path()
+
+        if path == [] or dist(player_pos, vec2(dynamic_object.get_last_path_point())) > AIAttack.SEARCH_PATH_DIST:
+            obj_pos = dynamic_object.get_position().intcpl()
+            path = dynamic_object.get_environment().findLongPath(obj_pos, player_pos.intcpl())
+            path = path[1:]
+            dynamic_object.set_path(path)
+
+        if path != []:
+            got_there = dynamic_object.move_to(vec2(path[0]), delta)
+            if got_there:
+                path = path[1:]
+                dynamic_object.set_path(path)    
+            if dynamic_object._anim_sprite != dynamic_object.RUNNING:
+                dynamic_object.animate(dynamic_object.RUNNING, current)
         
 class AIPatrol(_AIStatePrototype):
     """Stan reprezentujacy potworka patrolujacego dana sciezke"""
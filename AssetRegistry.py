@@ -0,0 +1,122 @@
+﻿"""@package docstring
+Moduł zawiera rejestr wczytanych duszków, dzięki któremu ponowne wczytanie poziomu lub polecenia edytora nie dekodują
+ponownie tych samych plików graficznych, oraz atrybuty klas wczytywane przy pierwszym użyciu (LazyAsset).
+"""
+
+from ObjectSprite import *
+from TileSprite import *
+import os
+import weakref
+
+class AssetRegistry:
+    """
+    Rejestr współdzielonych zasobów. Zasób jest identyfikowany klasą, znormalizowaną ścieżką pliku i czasem jego modyfikacji,
+    więc zmieniony na dysku plik jest wczytywany od nowa. Rejestr trzyma zasoby przez słabe referencje: zasób żyje tak długo,
+    jak długo używa go gra (np. środowisko, loader lub edytor), a potem jest zwalniany.
+    """
+
+    def __init__(self):
+        self._assets = weakref.WeakValueDictionary()
+        self._hits = 0
+        self._misses = 0
+
+    def load(self, asset_class, file_name):
+        """Zwraca zasób asset_class wczytany z pliku file_name, wczytując go tylko jeśli nie ma go w rejestrze."""
+        key = self._key(asset_class, file_name)
+        asset = self._assets.get(key)
+        if asset == None:
+            self._misses += 1
+            asset = asset_class(file_name)
+            self._assets[key] = asset
+        else:
+            self._hits += 1
+        return asset
+
+    def get_statistics(self):
+        """
+        Zwraca słownik z liczbą zasobów w rejestrze, liczbą trafień i chybień oraz rozmiarem w bajtach powierzchni
+        (arkuszy lub stron atlasu), z których zasoby rysują ramki.
+        """
+        surfaces = {}
+        assets = list(self._assets.values())
+        for asset in assets:
+            for surface, area in asset.get_atlas_regions():
+                surface = surface.get_parent() or surface
+                surfaces[id(surface)] = surface
+        return {"assets": len(assets), "hits": self._hits, "misses": self._misses,
+            "bytes": sum(surface.get_width() * surface.get_height() * surface.get_bytesize() for surface in surfaces.values())}
+
+    def _key(self, asset_class, file_name):
+        """Zwraca klucz zasobu: klasę, znormalizowaną ścieżkę i czas modyfikacji pliku (None dla nazw, które nie są plikami)."""
+        path = os.path.normcase(os.path.abspath(file_name))
+        mtime = os.path.getmtime(path) if os.path.isfile(path) else None
+        return asset_class, path, mtime
+
+ASSETS = AssetRegistry()
+
+def load_tile_sprite(file_name):
+    """Zwraca współdzielony TileSprite wczytany z pliku file_name."""
+    return ASSETS.load(TileSprite, file_name)
+
+def load_object_sprite(file_name):
+    """Zwraca współdzielony ObjectSprite wczytany z pliku file_name."""
+    return ASSETS.load(ObjectSprite, file_name)
+
+class LazyAsset:
+    """
+    Deskryptor atrybutu klasy, którego wartość (np. duszek) jest tworzona wywołaniem factory(*args) przy pierwszym odczycie
+    lub przez preload_assets. Po utworzeniu wartość zastępuje deskryptor w klasie, więc kolejne odczyty są zwykłymi odczytami atrybutu.
+    """
+
+    def __init__(self, factory, *args):
+        self._factory = factory
+        self._args = args
+        self._asset = None
+        self._owner = None
+        self._name = None
+
+    def __set_name__(self, owner, name):
+        self._owner = owner
+        self._name = name
+
+    def __get__(self, instance, owner):
+        return self.load()
+
+    def load(self):
+        """Tworzy wartość atrybutu i zapisuje ją w klasie w miejsce deskryptora. Zwraca wartość."""
+        if self._asset is None:
+            self._asset = self._factory(*self._args)
+            if self._owner != None:
+                setattr(self._owner, self._name, self._asset)
+        return self._asset
+
+def lazy_object_sprite(file_name):
+    """Zwraca atrybut klasy wczytujący współdzielony ObjectSprite z pliku file_name przy pierwszym użyciu."""
+    return LazyAsset(load_object_sprite, file_name)
+
+def preload_assets(owner):
+    """
+    Wczytuje atrybuty LazyAsset klasy owner i jej klas bazowych oraz, rekurencyjnie, klas wymienionych w jej atrybucie
+    ASSET_DEPENDENCIES (np. efektów tworzonych przez obiekty tej klasy).
+    """
+    for asset in pending_assets([owner]):
+        asset.load()
+
+def pending_assets(owners):
+    """
+    Zwraca listę jeszcze niewczytanych atrybutów LazyAsset, które preload_assets wczytałoby dla klas owners, bez powtórzeń.
+    Pozwala rozłożyć wczytywanie na wiele klatek (np. w menu głównym), wywołując load kolejnych atrybutów.
+    """
+    assets, visited = [], set()
+    owners = list(owners)
+    while owners != []:
+        owner = owners.pop(0)
+        if owner in visited:
+            continue
+        visited.add(owner)
+        for cls in owner.__mro__:
+            for value in list(vars(cls).values()):
+                if isinstance(value, LazyAsset) and value not in assets:
+                    assets.append(value)
+        owners += getattr(owner, "ASSET_DEPENDENCIES", ())
+    return assets
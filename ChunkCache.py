@@ -0,0 +1,86 @@
+﻿from collections import OrderedDict
+
+class ChunkCache:
+    """
+    Pamięć podręczna wyrenderowanych fragmentów (np. terenu), indeksowana współrzędnymi fragmentu.
+    Łączny rozmiar zapamiętanych fragmentów jest ograniczony budżetem pamięci (w bajtach), po jego przekroczeniu
+    usuwane są najdawniej używane fragmenty. Unieważnione fragmenty pozostają w pamięci, aby można je było
+    odrysować ponownie na tej samej powierzchni. Fragmenty przypięte (set_pinned, np. widoczne w bieżącej klatce)
+    nie są usuwane nawet po przekroczeniu budżetu.
+    """
+
+    def __init__(self, budget):
+        self._budget = budget
+        self._chunks = OrderedDict()
+        self._dirty = set()
+        self._pinned = frozenset()
+        self._memory = 0
+
+    def get(self, key):
+        """Zwraca parę (wartość, czy unieważniona) dla fragmentu key i oznacza go jako ostatnio używany. Zwraca None jeśli fragmentu nie ma."""
+        entry = self._chunks.get(key)
+        if entry is None:
+            return None
+        self._chunks.move_to_end(key)
+        return entry[0], key in self._dirty
+
+    def put(self, key, value, size):
+        """
+        Zapamiętuje wartość fragmentu key zajmującą size bajtów. Usuwa najdawniej używane fragmenty ponad budżet,
+        ale nigdy właśnie dodanego ani przypiętych.
+        """
+        old = self._chunks.pop(key, None)
+        if old is not None:
+            self._memory -= old[1]
+        self._chunks[key] = value, size
+        self._dirty.discard(key)
+        self._memory += size
+        while self._memory > self._budget:
+            evicted = next((other for other in self._chunks if other != key and other not in self._pinned), None)
+            if evicted is None:
+                break
+            __, evicted_size = self._chunks.pop(evicted)
+            self._dirty.discard(evicted)
+            self._memory -= evicted_size
+
+    def set_pinned(self, keys):
+        """Ustawia zbiór fragmentów, które nie mogą zostać usunięte, zastępując poprzedni."""
+        self._pinned = frozenset(keys)
+
+    def invalidate(self, key):
+        """Oznacza fragment key jako wymagający ponownego odrysowania."""
+        if key in self._chunks:
+            self._dirty.add(key)
+
+    def invalidate_all(self):
+        """Oznacza wszystkie fragmenty jako wymagające ponownego odrysowania."""
+        self._dirty.update(self._chunks.keys())
+
+    def clear(self):
+        """Usuwa wszystkie fragmenty."""
+        self._chunks.clear()
+        self._dirty.clear()
+        self._pinned = frozenset()
+        self._memory = 0
+
+    def get_memory(self):
+        """Zwraca łączny rozmiar zapamiętanych fragmentów w bajtach."""
+        return self._memory
+
+    def get_budget(self):
+        """Zwraca budżet pamięci w bajtach."""
+        return self._budget
+
+    def set_budget(self, budget):
+        """Ustawia budżet pamięci w bajtach. Nadmiar fragmentów zostanie usunięty przy następnym put."""
+        self._budget = budget
+
+    def reserve(self, size):
+        """Zwiększa budżet pamięci do co najmniej size bajtów."""
+        self._budget = max(self._budget, size)
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def __contains__(self, key):
+        return key in self._chunks
@@ -0,0 +1,23 @@
+﻿from utilities import *
+from operator import itemgetter
+
+_DEPTH = itemgetter(1)
+
+class DrawQueue(list):
+    """
+    Kolejka duszków do narysowania, w formacie (ramka, głębokość, pozycja), gdzie ramka to para (powierzchnia, obszar).
+    Obiekty dodają do niej ramki metodami append i extend, tak jak do listy. flush rysuje je w kolejności rosnącej
+    głębokości (przy równej głębokości w kolejności dodania) jednym wywołaniem Surface.blits.
+    Większość ramek (cząsteczki efektów, ParticleSystem.emit) jest dodawana ciągami już posortowanymi według głębokości,
+    a sortowanie listy (Timsort) wykrywa takie ciągi i tylko je scala, więc flush nie sortuje ich ramek od nowa.
+    Kolejka jest używana ponownie w każdej klatce, reset czyści ją przed zbieraniem ramek.
+    """
+
+    def reset(self):
+        """Usuwa ramki poprzedniej klatki."""
+        del self[:]
+
+    def flush(self, surface):
+        """Scala posortowane ciągi ramek według głębokości i rysuje je na powierzchni surface. Ramki zostają w kolejce do następnego reset."""
+        self.sort(key = _DEPTH)
+        surface.blits([(item[0][0], item[2], item[0][1]) for item in self], 0)
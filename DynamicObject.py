@@ -4,21 +4,25 @@ Moduł zawiera definicje wszystkich obiektów dynamicznych gry.
 
 from utilities import *
 from ObjectSprite import *
+from AssetRegistry import *
+from ParticleSystem import *
 from AIStates import *
 
 ELEMENT_COLOR = [( (0, 0, 255, 255), (50, 150, 255, 150) ), ( (255, 255, 0, 255), (255, 0, 0, 150) ), ( (150, 255, 255, 200), (150, 200, 255, 150) ), ( (100, 255, 0, 255), (0, 255, 0, 150) )]
-WATER_STARS = create_star_sprites(24, 3, ELEMENT_COLOR[0])
-FIRE_STARS = create_star_sprites(24, 3, ELEMENT_COLOR[1])
-AIR_STARS = create_star_sprites(24, 3, ELEMENT_COLOR[2])
-EARTH_STARS = create_star_sprites(24, 3, ELEMENT_COLOR[3])
-WATER_CIRCLES = create_ball_sprites(24, 3, ELEMENT_COLOR[0])
-FIRE_CIRCLES = create_ball_sprites(24, 3, ELEMENT_COLOR[1])
-AIR_CIRCLES = create_ball_sprites(24, 3, ELEMENT_COLOR[2])
-EARTH_CIRCLES = create_ball_sprites(24, 3, ELEMENT_COLOR[3])
-WATER_SHIELD = create_shield_sprite(48, ELEMENT_COLOR[0])
-FIRE_SHIELD = create_shield_sprite(48, ELEMENT_COLOR[1])
-AIR_SHIELD = create_shield_sprite(48, ELEMENT_COLOR[2])
-EARTH_SHIELD = create_shield_sprite(48, ELEMENT_COLOR[3])
+class ElementSprites:
+    """Duszki cząsteczek i tarcz czarów żywiołów, tworzone przy pierwszym użyciu."""
+    WATER_STARS = LazyAsset(create_star_sprites, 24, 3, ELEMENT_COLOR[0])
+    FIRE_STARS = LazyAsset(create_star_sprites, 24, 3, ELEMENT_COLOR[1])
+    AIR_STARS = LazyAsset(create_star_sprites, 24, 3, ELEMENT_COLOR[2])
+    EARTH_STARS = LazyAsset(create_star_sprites, 24, 3, ELEMENT_COLOR[3])
+    WATER_CIRCLES = LazyAsset(create_ball_sprites, 24, 3, ELEMENT_COLOR[0])
+    FIRE_CIRCLES = LazyAsset(create_ball_sprites, 24, 3, ELEMENT_COLOR[1])
+    AIR_CIRCLES = LazyAsset(create_ball_sprites, 24, 3, ELEMENT_COLOR[2])
+    EARTH_CIRCLES = LazyAsset(create_ball_sprites, 24, 3, ELEMENT_COLOR[3])
+    WATER_SHIELD = LazyAsset(create_shield_sprite, 48, ELEMENT_COLOR[0])
+    FIRE_SHIELD = LazyAsset(create_shield_sprite, 48, ELEMENT_COLOR[1])
+    AIR_SHIELD = LazyAsset(create_shield_sprite, 48, ELEMENT_COLOR[2])
+    EARTH_SHIELD = LazyAsset(create_shield_sprite, 48, ELEMENT_COLOR[3])
 
 SHIELD_COST = 0.2
 BALL_COST = 0.1
@@ -33,11 +37,15 @@ class DynamicObject:
     DEFAULT_HP = 1
     EPSILON = 0.15
     KNOCKBACK = 0.5
-    HP_BAR_SPRITES = create_hp_bar_sprites(vec2(64, 4))
-    MG_BAR_SPRITES = create_mg_bar_sprites(vec2(64, 4))
+    HP_BAR_SPRITES = LazyAsset(create_hp_bar_sprites, vec2(64, 4))
+    MG_BAR_SPRITES = LazyAsset(create_mg_bar_sprites, vec2(64, 4))
     HP_BAR_OFFSET = 8
     DAMAGE_ON_HIT = 5
     VISIBLE_IN_EDITOR = False
+    MAX_RADIUS = 0.5
+    """Największy promień obiektu, który może brać udział w kolizji (efekty magiczne są pomijane)."""
+    ASSET_DEPENDENCIES = ()
+    """Klasy, których duszki preload_assets wczytuje razem z duszkami tej klasy."""
     
     def __init__(self):
         self._environment = None
@@ -66,7 +74,7 @@ class DynamicObject:
 
     def update(self, delta, current):
         """Odświeza stan obiektu."""
-        self._position += self._direction * self._velocity * delta
+        self.set_position(self._position + self._direction * self._velocity * delta)
 
     def redraw(self, surface, position, current, frames, pickable):
         """
@@ -76,11 +84,8 @@ class DynamicObject:
         if(self._anim_sprite != None):
             
             delta = current - self._anim_time
-            if self._anim_loop or delta < self._anim_sprite.get_time():
-                self._finished = False
-            else:
+            if not self.advance_animation(current):
                 delta = self._anim_sprite.get_time() - 0.01
-                self._finished = True
 
             screen_direction = world_to_screen(self._direction).normal()
             screen_direction.y = - screen_direction.y
@@ -97,11 +102,11 @@ class DynamicObject:
 
             diff = vec2(floor(frame_size.x * 0.5), self._anim_sprite.get_offset())
             dest -= diff
-            dest.x += frame[1][0]
-            dest.y += frame[1][1]
+            dest.x += frame[2][0]
+            dest.y += frame[2][1]
 
             p1 = dest
-            p2 = dest + vec2(frame[0].get_size())
+            p2 = dest + frame_size
 
             if not (p2.x < 0 or p2.y < 0 or surface_size.x < p1.x or surface_size.y < p1.y):
                 frames.append((frame, depth, dest.intcpl()))
@@ -130,6 +135,16 @@ class DynamicObject:
         """Zwraca true jeśli animacja została zakończona."""
         return self._finished
 
+    def advance_animation(self, current):
+        """
+        Aktualizuje stan zakończenia animacji na chwilę current, zwraca True jeśli animacja nadal trwa.
+        Wywoływane przez redraw i przez Environment.update, dzięki czemu symulacja działa także bez odrysowywania.
+        """
+        if self._anim_sprite == None:
+            return True
+        self._finished = not self._anim_loop and current - self._anim_time >= self._anim_sprite.get_time()
+        return not self._finished
+
     def get_frame_index(self, time):
         """Zwraca numer aktualnej ramki animacji."""
         return self._anim_sprite.get_frame_i(time - self._anim_time)
@@ -148,6 +163,8 @@ class DynamicObject:
     def set_position(self, position):
         """Ustawia pozycje obiektu."""
         self._position = position
+        if self._environment != None:
+            self._environment.move_object(self)
 
     def get_environment(self):
         """Zwraca środowisko obiektu."""
@@ -209,8 +226,9 @@ class DynamicObject:
            
         new_position = pos + self._direction * self._velocity * delta
         change = True
+        reach = self._radius + DynamicObject.MAX_RADIUS
         
-        for obj in self.get_environment().collidable():
+        for obj in self.get_environment().collidable(new_position, max(reach, reach * reach)):
             t = self._radius + obj._radius
             if dist(obj.get_position(), new_position) < t*t and self != obj and not obj._magic:
                 change = False
@@ -229,11 +247,12 @@ class DynamicObject:
 
 class PlayerObject(DynamicObject):
     """Klasa obiektu gracza."""
-    ATTACK = ObjectSprite("data/black mage/attack.png")
-    INJURED = ObjectSprite("data/black mage/injured.png")
-    CASTING = ObjectSprite("data/black mage/casting.png")
-    RUNNING = ObjectSprite("data/black mage/running.png")
-    STOPPED = ObjectSprite("data/black mage/paused.png")
+    ATTACK = lazy_object_sprite("data/black mage/attack.png")
+    INJURED = lazy_object_sprite("data/black mage/injured.png")
+    CASTING = lazy_object_sprite("data/black mage/casting.png")
+    RUNNING = lazy_object_sprite("data/black mage/running.png")
+    STOPPED = lazy_object_sprite("data/black mage/paused.png")
+    ASSET_DEPENDENCIES = (ElementSprites,)
 
     DEFAULT_HP = 100
     VISIBLE_IN_EDITOR = True
@@ -248,7 +267,7 @@ class PlayerObject(DynamicObject):
         self._spell = None
         self._shield = 0.0
         self._shield_time = 10.0
-        self._shield_type = WATER_SHIELD
+        self._shield_type = ElementSprites.WATER_SHIELD
         self._energy = 1.0
         self._score = 0
 
@@ -260,6 +279,7 @@ class PlayerObject(DynamicObject):
 
     def update(self, delta, current):
         """Odświeża stan obiektu."""
+        self._choose_animation(current)
         EPSILON = 0.0001
         old_pos = self._position
         new_pos = self._position
@@ -275,16 +295,16 @@ class PlayerObject(DynamicObject):
                 delta = delta * (1.0 - (diff / step))
                 new_pos = self._path.pop()
             else:
-                new_pos += difference.normal() * self._velocity * delta
+                new_pos = new_pos + difference.normal() * (self._velocity * delta)
                 delta = 0.0
             x = new_pos - old_pos
             c = False
-            for object in self._environment.collidable():
+            for object in self._environment.collidable(self._position + x, self._radius + DynamicObject.MAX_RADIUS):
                 if object != self and not isinstance(object, BallEffect) and not isinstance(object, WaveEffect) and check_collision(self.get_position() + x, object.get_position(), self._radius, object._radius):
                     c = True
                     break
             if not c:
-                self._position += x
+                self.set_position(self._position + x)
                 self._direction = (self._position - old_pos).normal()
 
             self.animate(PlayerObject.RUNNING, current)
@@ -302,10 +322,7 @@ class PlayerObject(DynamicObject):
        
     def redraw(self, surface, position, current, frames, pickable):
         """Odrysowuje obiekt."""
-        if self._spell:
-            self.animate(PlayerObject.CASTING, current, False)
-        elif self._path == []:
-            self.animate(PlayerObject.STOPPED, current)
+        self._choose_animation(current)
         super(PlayerObject, self).redraw(surface, position, current, frames, pickable)
         if self._shield != 0.0:
             size = vec2(self._shield_type.get_size())
@@ -355,6 +372,12 @@ class PlayerObject(DynamicObject):
         """Zwiększa punkty gracza."""
         self._score += score
 
+    def _choose_animation(self, current):
+        if self._spell:
+            self.animate(PlayerObject.CASTING, current, False)
+        elif self._path == []:
+            self.animate(PlayerObject.STOPPED, current)
+
     def _add_spell(self, spell, current):
         OFFSET_FACTOR = 0.5
         element, type  = spell.split('_')
@@ -378,75 +401,75 @@ class PlayerObject(DynamicObject):
 
         if spell == "water_shield":
             self._shield = current
-            self._shield_type = WATER_SHIELD
+            self._shield_type = ElementSprites.WATER_SHIELD
         elif spell == "fire_shield":
             self._shield = current
-            self._shield_type = FIRE_SHIELD
+            self._shield_type = ElementSprites.FIRE_SHIELD
         elif spell == "air_shield":
             self._shield = current
-            self._shield_type = AIR_SHIELD
+            self._shield_type = ElementSprites.AIR_SHIELD
         elif spell == "earth_shield":
             self._shield = current
-            self._shield_type = EARTH_SHIELD
+            self._shield_type = ElementSprites.EARTH_SHIELD
         elif spell == "water_ball":
             object = BallEffect()
             object.set_direction(self._direction)
             object.set_position(self._position + self._direction * OFFSET_FACTOR)
-            object.set_sprites(WATER_STARS)
+            object.set_sprites(ElementSprites.WATER_STARS)
             object.set_environment(self._environment)
             self._environment.add_object(object)
         elif spell == "fire_ball":
             object = BallEffect()
             object.set_direction(self._direction)
             object.set_position(self._position + self._direction * OFFSET_FACTOR)
-            object.set_sprites(FIRE_STARS)
+            object.set_sprites(ElementSprites.FIRE_STARS)
             object.set_environment(self._environment)
             self._environment.add_object(object)
         elif spell == "air_ball":
             object = BallEffect()
             object.set_direction(self._direction)
             object.set_position(self._position + self._direction * OFFSET_FACTOR)
-            object.set_sprites(AIR_STARS)
+            object.set_sprites(ElementSprites.AIR_STARS)
             object.set_environment(self._environment)
             self._environment.add_object(object)
         elif spell == "earth_ball":
             object = BallEffect()
             object.set_direction(self._direction)
-            object.set_position(self._position)
-            object.set_sprites(EARTH_STARS)
+            object.set_position(self._position.copy())
+            object.set_sprites(ElementSprites.EARTH_STARS)
             object.set_environment(self._environment)
             self._environment.add_object(object)
         elif spell == "water_wave":
             object = WaveEffect()
-            object.set_position(self._position)
-            object.set_sprites(WATER_CIRCLES)
+            object.set_position(self._position.copy())
+            object.set_sprites(ElementSprites.WATER_CIRCLES)
             object.set_environment(self._environment)
             self._environment.add_object(object)
         elif spell == "fire_wave":
             object = WaveEffect()
-            object.set_position(self._position)
-            object.set_sprites(FIRE_CIRCLES)
+            object.set_position(self._position.copy())
+            object.set_sprites(ElementSprites.FIRE_CIRCLES)
             object.set_environment(self._environment)
             self._environment.add_object(object)
         elif spell == "air_wave":
             object = WaveEffect()
-            object.set_position(self._position)
-            object.set_sprites(AIR_CIRCLES)
+            object.set_position(self._position.copy())
+            object.set_sprites(ElementSprites.AIR_CIRCLES)
             object.set_environment(self._environment)
             self._environment.add_object(object)
         elif spell == "earth_wave":
             object = WaveEffect()
-            object.set_position(self._position)
-            object.set_sprites(EARTH_CIRCLES)
+            object.set_position(self._position.copy())
+            object.set_sprites(ElementSprites.EARTH_CIRCLES)
             object.set_environment(self._environment)
             self._environment.add_object(object)
 
 class Orc(DynamicObject):
     """Podstawowa klasa potworow"""
-    ATTACK = ObjectSprite("data/ice troll/attack.png")
-    INJURED = ObjectSprite("data/ice troll/disintegrate.png")
-    RUNNING = ObjectSprite("data/ice troll/walking.png")
-    STOPPED = ObjectSprite("data/ice troll/paused.png")
+    ATTACK = lazy_object_sprite("data/ice troll/attack.png")
+    INJURED = lazy_object_sprite("data/ice troll/disintegrate.png")
+    RUNNING = lazy_object_sprite("data/ice troll/walking.png")
+    STOPPED = lazy_object_sprite("data/ice troll/paused.png")
     INJ_ANIM_TIME = 2
     VICTORY_SCORE = 1
     DAMAGE_ON_HIT = 10
@@ -500,10 +523,10 @@ class Orc(DynamicObject):
 
 class GreyTroll(Orc):
     """Klasa szarego trolla."""
-    ATTACK = ObjectSprite("data/grey troll/attack.png")
-    INJURED = ObjectSprite("data/grey troll/disintegrate.png")
-    RUNNING = ObjectSprite("data/grey troll/walking.png")
-    STOPPED = ObjectSprite("data/grey troll/paused.png")
+    ATTACK = lazy_object_sprite("data/grey troll/attack.png")
+    INJURED = lazy_object_sprite("data/grey troll/disintegrate.png")
+    RUNNING = lazy_object_sprite("data/grey troll/walking.png")
+    STOPPED = lazy_object_sprite("data/grey troll/paused.png")
     INJ_ANIM_TIME = 2
     VICTORY_SCORE = 1
     DAMAGE_ON_HIT = 10
@@ -518,10 +541,10 @@ class GreyTroll(Orc):
 
 class Swampthing(Orc):
     """Klasa potwora z bagien."""
-    ATTACK = ObjectSprite("data/swampthing/attack.png")
-    INJURED = ObjectSprite("data/swampthing/tipping.png")
-    RUNNING = ObjectSprite("data/swampthing/running.png")
-    STOPPED = ObjectSprite("data/swampthing/paused.png")
+    ATTACK = lazy_object_sprite("data/swampthing/attack.png")
+    INJURED = lazy_object_sprite("data/swampthing/tipping.png")
+    RUNNING = lazy_object_sprite("data/swampthing/running.png")
+    STOPPED = lazy_object_sprite("data/swampthing/paused.png")
     INJ_ANIM_TIME = 2
     VICTORY_SCORE = 1
     DAMAGE_ON_HIT = 10
@@ -536,10 +559,10 @@ class Swampthing(Orc):
 
 class GreenZombie(Orc):
     """Klasa zielonego zombie."""
-    ATTACK = ObjectSprite("data/green zombie/attack.png")
-    INJURED = ObjectSprite("data/green zombie/disintegrate.png")
-    RUNNING = ObjectSprite("data/green zombie/walking.png")
-    STOPPED = ObjectSprite("data/green zombie/knit.png")
+    ATTACK = lazy_object_sprite("data/green zombie/attack.png")
+    INJURED = lazy_object_sprite("data/green zombie/disintegrate.png")
+    RUNNING = lazy_object_sprite("data/green zombie/walking.png")
+    STOPPED = lazy_object_sprite("data/green zombie/knit.png")
     INJ_ANIM_TIME = 2
     VICTORY_SCORE = 1
     DAMAGE_ON_HIT = 10
@@ -552,12 +575,49 @@ class GreenZombie(Orc):
     def get_icon(size):
         return GreenZombie.STOPPED.get_icon(size)
 
+class ArrowEffect(DynamicObject):
+    """Klasa strzały."""
+    TIMEOUT = 0.20
+    VELOCITY = 1.5
+    DAMAGE_ON_HIT = 5
+    SPRITE = lazy_object_sprite("data/arrow.png")
+
+    def __init__(self, number = 48):
+        super(ArrowEffect, self).__init__()
+        self._velocity = 7.0
+        self._longevity = 2.0
+        self._health = -1
+        self.animate(ArrowEffect.SPRITE, 0.0)
+        self._magic = True
+
+    def set_sprites(self, sprites):
+        """Ustawia duszka strzały."""
+        self._sprites = sprites
+
+    def set_longevity(longevity):
+        """Ustawia czas życia strzały."""
+        self._longevity = longevity
+
+    def update(self, delta, current):
+        """Odświeża stan strzały."""
+        self._longevity -= delta
+        for obj in self.get_environment().collidable(self.get_position(), self._radius + DynamicObject.MAX_RADIUS):
+            t = self._radius + obj._radius
+            if dist(obj.get_position(), self.get_position()) < t and self != obj and not obj._magic:
+                obj.suffer_dmg(self.DAMAGE_ON_HIT, self.DMG_TYPE)
+                return True
+        if self._longevity < 0:
+            return True
+        else:
+            return super(ArrowEffect, self).update(delta, current)
+
 class GreenArcher(Orc):
     """Klasa zielonego łucznika."""
-    ATTACK = ObjectSprite("data/green archer/shooting.png")
-    INJURED = ObjectSprite("data/green archer/tipping.png")
-    RUNNING = ObjectSprite("data/green archer/running.png")
-    STOPPED = ObjectSprite("data/green archer/paused.png")
+    ATTACK = lazy_object_sprite("data/green archer/shooting.png")
+    INJURED = lazy_object_sprite("data/green archer/tipping.png")
+    RUNNING = lazy_object_sprite("data/green archer/running.png")
+    STOPPED = lazy_object_sprite("data/green archer/paused.png")
+    ASSET_DEPENDENCIES = (ArrowEffect,)
     DAMAGE_ON_HIT = 2
     HP = 20
     VISIBLE_IN_EDITOR = True
@@ -581,10 +641,10 @@ class GreenArcher(Orc):
 
 class RedArcher(GreenArcher):
     """Klasa czerwonego łucznika."""
-    ATTACK = ObjectSprite("data/red archer/shooting.png")
-    INJURED = ObjectSprite("data/red archer/tipping.png")
-    RUNNING = ObjectSprite("data/red archer/running.png")
-    STOPPED = ObjectSprite("data/red archer/paused.png")
+    ATTACK = lazy_object_sprite("data/red archer/shooting.png")
+    INJURED = lazy_object_sprite("data/red archer/tipping.png")
+    RUNNING = lazy_object_sprite("data/red archer/running.png")
+    STOPPED = lazy_object_sprite("data/red archer/paused.png")
     DAMAGE_ON_HIT = 2
     HP = 20
     VISIBLE_IN_EDITOR = True
@@ -603,23 +663,16 @@ class BallEffect(DynamicObject):
     TIMEOUT = 0.20
     VELOCITY = 1.5
     DAMAGE_ON_HIT = 15
-    
-    class Particle:
-        def __init__(self):
-            self.reset(-BallEffect.TIMEOUT)
-
-        def reset(self, current):
-            self.time = current + (random() - 0.5) * 0.2
-            self.dir = rotate2(vec2(0.0, 1.0), random() * pi * 2) * BallEffect.VELOCITY
-            self.pos = vec2(0.0, 0.0)
+    JITTER = 0.2
 
     def __init__(self, number = 48):
         super(BallEffect, self).__init__()
-        self._particles = [BallEffect.Particle() for x in range(number)]
+        self._particles = ParticleSystem(number)
+        self._particles.reset(-BallEffect.TIMEOUT, BallEffect.VELOCITY, BallEffect.JITTER)
         self._old_time = 0.0
         self._velocity = 6.0
         self._longevity = 2.0
-        self._sprites = WATER_STARS
+        self._sprites = ElementSprites.WATER_STARS
         self._magic = True
 
     def set_sprites(self, sprites):
@@ -633,7 +686,7 @@ class BallEffect(DynamicObject):
     def update(self, delta, current):
         """Odświeża stan efektu."""
         self._longevity -= delta
-        for obj in self.get_environment().collidable():
+        for obj in self.get_environment().collidable(self.get_position(), self._radius + DynamicObject.MAX_RADIUS):
             t = self._radius + obj._radius
             if dist(obj.get_position(), self.get_position()) < t and self != obj and not isinstance(obj, PlayerObject) and not obj._magic:
                 obj.suffer_dmg(self.DAMAGE_ON_HIT, self.DMG_TYPE)
@@ -647,43 +700,31 @@ class BallEffect(DynamicObject):
         """Odrysowuje efekt."""
         delta = current - self._old_time
         self._old_time = current
-        real_size = self._sprites[0].get_size()
-        half_size = vec2(real_size) // 2
-        i, s = 0, len(self._particles)
-        while i < s:
-            if current - self._particles[i].time > BallEffect.TIMEOUT:
-                self._particles[i].reset(current)
-            else:
-                self._particles[i].pos += self._particles[i].dir * delta
-            dest = world_to_screen(self._particles[i].pos + self._position) - position - half_size 
-            index = int(clamp((current - self._particles[i].time) / BallEffect.TIMEOUT, 0.0, 0.99) * len(self._sprites))
-            dest.y = surface.get_size()[1] - dest.y - 32
-            frames.append(((self._sprites[index], (0, 0) + real_size), dest.y + 16, dest.intcpl()))
-            i += 1
+        particles = self._particles
+        expired = particles.expire(current, BallEffect.TIMEOUT)
+        particles.advance(delta, ~expired)
+        particles.reset(current, BallEffect.VELOCITY, BallEffect.JITTER, expired)
+        particles.set_phase((current - particles.get_times()) / BallEffect.TIMEOUT, len(self._sprites))
+        half_size = vec2(self._sprites[0].get_size()) // 2
+        particles.emit(frames, self._sprites, self._position, position, surface.get_size()[1], half_size, 32)
 
 class WaveEffect(DynamicObject):
     """Klasa efektu fali żywiołu."""
     VELOCITY = 6.0
-    DAMAGE_ON_HIT = 1
-    
-    class Particle:
-        def reset(self, direction):
-            self.dir = direction
+    DAMAGE_PER_SECOND = 100.0 # dawniej 1 na krok symulacji (0.01 s), dopóki czoło fali pokrywało obiekt
 
     def __init__(self, number = 96):
         super(WaveEffect, self).__init__()
-        self._particles = [WaveEffect.Particle() for x in range(number)]
+        self._particles = ParticleSystem(number)
         self._radius = 0.25
         self._max_radius = 5.0
-        self.set_sprites(FIRE_CIRCLES)
+        self._hit = set()
+        self.set_sprites(ElementSprites.FIRE_CIRCLES)
         self._magic = True
         
     def set_sprites(self, sprites):
         """Ustawia "duszki" cząsteczek."""
-        i, s = 0, len(self._particles)
-        while i < s:
-            self._particles[i].reset(rotate2(vec2(0.0, 1.0), random() * pi * 2))
-            i += 1
+        self._particles.reset(0.0, 1.0, 0.0)
         self._sprites = sprites
         self._velocity = 0.0
 
@@ -692,14 +733,20 @@ class WaveEffect(DynamicObject):
         self._max_radius = max_radius
 
     def update(self, delta, current):
-        """Odświeża stan efektu."""
+        """
+        Odświeża stan efektu. Każdy obiekt, przez który przeszło czoło fali, jest raniony tylko raz,
+        obrażeniami proporcjonalnymi do czasu przejścia czoła fali przez obiekt (2 * promień obiektu / VELOCITY).
+        """
+        old_radius = self._radius
         self._radius += delta * WaveEffect.VELOCITY
-        for obj in self.get_environment().collidable():
-            t = self._radius + obj._radius
-            m = abs(self._radius - obj._radius)
-            distance = dist(obj.get_position(), self.get_position())
-            if self != obj and distance < t and distance > m and not isinstance(obj, PlayerObject) and not obj._magic:
-                obj.suffer_dmg(self.DAMAGE_ON_HIT, self.DMG_TYPE)
+        position = self.get_position()
+        inner_radius = max(old_radius - DynamicObject.MAX_RADIUS, 0.0)
+        for obj in self.get_environment().annulus(position, inner_radius, self._radius + DynamicObject.MAX_RADIUS):
+            if obj not in self._hit and self != obj and not isinstance(obj, PlayerObject) and not obj._magic:
+                distance = dist(obj.get_position(), position)
+                if old_radius - obj._radius < distance < self._radius + obj._radius:
+                    self._hit.add(obj)
+                    obj.suffer_dmg(WaveEffect.DAMAGE_PER_SECOND * 2 * obj._radius / WaveEffect.VELOCITY, self.DMG_TYPE)
       
         if self._radius > self._max_radius:
             return True
@@ -708,51 +755,8 @@ class WaveEffect(DynamicObject):
 
     def redraw(self, surface, position, current, frames, pickable):
         """Odrysowuje obiekt."""
-        real_size = self._sprites[0].get_size()
-        half_size = vec2(real_size) // 2
-
-        i, s = 0, len(self._particles)
-        while i < s:
-            dest = world_to_screen(self._particles[i].dir * self._radius + self._position) - position
-            index = int(clamp(self._radius / self._max_radius, 0.0, 0.99) * len(self._sprites))
-            dest.y = surface.get_size()[1] - dest.y
-            frames.append(((self._sprites[index], (0, 0) + real_size), dest.y + 16, dest.intcpl()))
-            i += 1
-
-class ArrowEffect(DynamicObject):
-    """Klasa strzały."""
-    TIMEOUT = 0.20
-    VELOCITY = 1.5
-    DAMAGE_ON_HIT = 5
-    SPRITE = ObjectSprite("data/arrow.png")
-
-    def __init__(self, number = 48):
-        super(ArrowEffect, self).__init__()
-        self._velocity = 7.0
-        self._longevity = 2.0
-        self._health = -1
-        self.animate(ArrowEffect.SPRITE, 0.0)
-        self._magic = True
-
-    def set_sprites(self, sprites):
-        """Ustawia duszka strzały."""
-        self._sprites = sprites
-
-    def set_longevity(longevity):
-        """Ustawia czas życia strzały."""
-        self._longevity = longevity
-
-    def update(self, delta, current):
-        """Odświeża stan strzały."""
-        self._longevity -= delta
-        for obj in self.get_environment().collidable():
-            t = self._radius + obj._radius
-            if dist(obj.get_position(), self.get_position()) < t and self != obj and not obj._magic:
-                obj.suffer_dmg(self.DAMAGE_ON_HIT, self.DMG_TYPE)
-                return True
-        if self._longevity < 0:
-            return True
-        else:
-            return super(ArrowEffect, self).update(delta, current)
+        self._particles.spread(self._radius)
+        self._particles.set_phase(self._radius / self._max_radius, len(self._sprites))
+        self._particles.emit(frames, self._sprites, self._position, position, surface.get_size()[1])
 
-DYNAMIC_OBJECTS = [x[1] for x in getmembers(modules[__name__], lambda member: isclass(member) and member.__module__ == __name__) if x[1].VISIBLE_IN_EDITOR]
+DYNAMIC_OBJECTS = [x[1] for x in getmembers(modules[__name__], lambda member: isclass(member) and member.__module__ == __name__) if getattr(x[1], "VISIBLE_IN_EDITOR", False)]
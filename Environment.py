@@ -1,24 +1,38 @@
 ﻿from ObjectSprite import *
 from TerrainGrid import *
 from StaticObjects import *
+from DrawQueue import *
+from ScrollBuffer import *
 from DynamicObject import *
 from LevelLoader import *
 from IMGUI import *
-from queue import PriorityQueue
+from PathFinder import *
+from SpatialHash import *
 
 EMPTY_TILE = 0
-MARGIN_SIZE = vec2(TILE_SIZE.x * 4, TILE_SIZE.y * 4)
+BACKGROUND_COLOR = (0, 0, 255, 0)
 MAX_OBJECT_SIZE = 128
 UPDATE_OBJECT_RANGE = 64
-REDRAW_OBJECT_RADIUS = 20
+REDRAW_OBJECT_MARGIN = 256
+SPATIAL_CELL_SIZE = 2.0
 
 class Environment:
     """Klasa reprezentująca środowisko gry."""
 
-    FIND_PATH_MAX_DIST = 200
+    FIND_PATH_MAX_DIST = int(sqrt(200))
     WARN_DISTANCE = 100
     """
-    Stala okreslajaca jaka najdluzsza droge moze zwrocic findPath (Poprawia wydajnosc - nizsza stala = mniej szukania)
+    Stala okreslajaca zasieg findPath: najwieksza odleglosc (w kaflach, w linii prostej) punktu koncowego od startowego (Poprawia wydajnosc - nizsza stala = mniej szukania)
+    Poprzednia wersja findPath porownywala z nia kwadrat odleglosci (200), stad zasieg okolo 14 kafli.
+    """
+    FIND_PATH_MAX_COST = 64
+    """
+    Stala okreslajaca jaka najdluzsza droge (w kaflach) moze zwrocic findPath, z zapasem na omijanie przeszkod w zasiegu FIND_PATH_MAX_DIST.
+    """
+    PATH_CACHE_SIZE = 512
+    FLOW_FIELD_MAX_DIST = 32
+    """
+    Promien (w kaflach) pola odleglosci od gracza, po ktorym ida atakujace potworki. Dalsze potworki korzystaja z findLongPath.
     """
 
     def __init__(self, tile_size = TILE_SIZE):
@@ -26,33 +40,50 @@ class Environment:
         self._terrain_grid = TerrainGrid(tile_size)
         self._static_objects = StaticObjects()
         self._dynamic_objects = []
-
-        # buffers for drawing
-        self._previous_buffer = None
-        self._current_buffer = None
-        self._prev_viewport_pos = vec2(-0xfffffff, -0xfffffff)
+        self._spatial_hash = SpatialHash(SPATIAL_CELL_SIZE)
+        self._path_finder = PathFinder(self._terrain_grid, Environment.FIND_PATH_MAX_COST)
+        self._path_cache = PathCache(Environment.PATH_CACHE_SIZE)
+        self._flow_field = FlowField(self._terrain_grid, Environment.FLOW_FIELD_MAX_DIST)
+        self._sector_graph = SectorGraph(self._terrain_grid)
+        self._terrain_grid.add_listener(self._on_flags_changed)
 
         # surface cache
         self._PAGE_SIZE = vec2(320, 240)
         self._cache_size = 0
         self._cache_pages = []
         self._frame_number = 0
-        self._visible_objects = []
+        self._visible_objects = DrawQueue()
+        self._scroll_buffer = ScrollBuffer()
         self._pickable_objects = []
         self._players = []
 
+        # dirty rectangles
+        self._dirty_rects = None
+        self._previous_view = None
+        self._previous_frames = set()
+
         self.resize(vec2(50, 50))
 
     def load(self, loader):
         """Wczytuje mapę z podanego loadera."""
+        self._terrain_grid.remove_listener(self._on_flags_changed)
         self._terrain_grid = loader.get_terrain_grid()
         self._static_objects = loader.get_static_objects()
         self._dynamic_objects = loader.get_dynamic_objects()
+        self._path_finder = PathFinder(self._terrain_grid, Environment.FIND_PATH_MAX_COST)
+        self._path_cache.clear()
+        self._flow_field = FlowField(self._terrain_grid, Environment.FLOW_FIELD_MAX_DIST)
+        self._sector_graph = SectorGraph(self._terrain_grid)
+        self._terrain_grid.add_listener(self._on_flags_changed)
+        self._previous_view = None
+        self._scroll_buffer.invalidate()
         self._players = []
+        self._spatial_hash.clear()
         for x in self._dynamic_objects:
             if isinstance(x, PlayerObject):
                 self._players.append(x)
             x.set_environment(self)
+            self._spatial_hash.insert(x, x.get_position())
 
     def save(self, loader):
         """Zapisuje mapę do podenego loadera."""
@@ -64,10 +95,14 @@ class Environment:
         """Zmienia rozmiar środowiska."""
         self._terrain_grid.set_size(size)
         self._static_objects.set_size(size)
+        self._path_cache.clear()
+        self._flow_field.invalidate()
+        self._sector_graph = SectorGraph(self._terrain_grid)
         i, s = 0, len(self._dynamic_objects)
         while i < s:
             position = self._dynamic_objects[i].get_position()
             if position.x < 0 or position.y < 0 or size.x <= position.x or size.y <= position.y:
+                self._spatial_hash.remove(self._dynamic_objects[i])
                 del self._dynamic_objects[i]
                 s -= 1
             else:
@@ -75,8 +110,9 @@ class Environment:
 
     def notify(self, message, position):
         """Powiadamia wszystkie obiekty o czyms"""
-        for object in self._dynamic_objects:
-            if dist(object.get_position(), position) < Environment.WARN_DISTANCE:
+        warn_distance_sq = Environment.WARN_DISTANCE * Environment.WARN_DISTANCE
+        for object in self._spatial_hash.query(position, Environment.WARN_DISTANCE):
+            if position.distsq(object.get_position()) < warn_distance_sq:
                 object.notify(message)
 
     def reachable(self, point):
@@ -91,10 +127,10 @@ class Environment:
             position = self._players[0].get_position()
         i, s = 0, len(self._dynamic_objects)
         while i < s:
-            d_pos = position - self._dynamic_objects[i].get_position()
-            radius_sq = d_pos.lengthsq()
-            if radius_sq < update_radius_sq:
+            if position.distsq(self._dynamic_objects[i].get_position()) < update_radius_sq:
+                self._dynamic_objects[i].advance_animation(current)
                 if self._dynamic_objects[i].update(delta, current):
+                    self._spatial_hash.remove(self._dynamic_objects[i])
                     self._dynamic_objects[i] = self._dynamic_objects[-1]
                     self._dynamic_objects.pop()
                     s -= 1
@@ -104,43 +140,66 @@ class Environment:
                 i += 1
 
     def redraw(self, surface, position, time, collisions = False):
-        """Odrysowywuje środowisko."""
-        self._create_buffers(surface)
-
+        """Odrysowywuje środowisko. Zmienione obszary ekranu zwraca potem get_dirty_rects."""
         surface_size = vec2(surface.get_size())
         viewport_pos = (world_to_screen(position) - surface_size / 2).floor()
-        displacement = self._prev_viewport_pos - viewport_pos
-        displacement.y = -displacement.y
-
-        self._current_buffer.fill((0, 0, 255, 0))
-        self._current_buffer.blit(self._previous_buffer, displacement.intcpl())
-
-        self._terrain_grid.redraw(self._current_buffer, viewport_pos - MARGIN_SIZE, time, collisions)
 
-        surface.blit(self._current_buffer, (-MARGIN_SIZE).intcpl())
+        animated = []
+        terrain_grid = self._terrain_grid
+        key = collisions, id(terrain_grid), terrain_grid.get_revision()
+        self._scroll_buffer.redraw(surface, viewport_pos, key, lambda buffer, position: self._redraw_terrain(buffer, position, collisions))
+        terrain_grid.redraw_animated(surface, viewport_pos, time, collisions, animated)
 
         first = viewport_pos // self._PAGE_SIZE
         last = (viewport_pos + surface_size) // self._PAGE_SIZE + vec2(1, 1)
 
-        self._visible_objects = []
+        self._visible_objects.reset()
         self._pickable_objects = []
         self._static_objects.redraw(surface, viewport_pos, self._visible_objects)
 
-        self._prev_viewport_pos = viewport_pos
-
         # cull invisible objects
-        redraw_radius_sq = REDRAW_OBJECT_RADIUS * REDRAW_OBJECT_RADIUS
-        for object in self._dynamic_objects:
-            d_pos = position - object.get_position()
-            radius_sq = d_pos.lengthsq()
-            if radius_sq < redraw_radius_sq:
-                object.redraw(surface, viewport_pos, time, self._visible_objects, self._pickable_objects)
+        for object in self._spatial_hash.query_spans(self._visible_cells(viewport_pos, surface_size)):
+            object.redraw(surface, viewport_pos, time, self._visible_objects, self._pickable_objects)
+
+        self._visible_objects.flush(surface)
+
+        self._track_dirty_rects(surface, viewport_pos, collisions, animated)
 
-        self._visible_objects.sort(key = lambda x: x[1])
-        for object in self._visible_objects:
-            surface.blit(object[0][0], object[2], object[0][1])
+    def _redraw_terrain(self, surface, position, collisions):
+        """Rysuje tło i nieruchomą część terenu w obszarze przycięcia powierzchni, wywoływane przez ScrollBuffer.redraw."""
+        surface.fill(BACKGROUND_COLOR)
+        self._terrain_grid.redraw_static(surface, position, collisions)
 
-        self._swap_buffers()
+    def _visible_cells(self, viewport_pos, surface_size):
+        """
+        Zwraca przedziały wierszy (visible_spans) kubełków siatki obiektów dynamicznych, których obiekty mogą być widoczne:
+        prostokąt widoku jest powiększony o REDRAW_OBJECT_MARGIN pikseli na duszki i efekty wystające poza pozycję obiektu.
+        """
+        cell_size = self._spatial_hash.get_cell_size()
+        margin = vec2(REDRAW_OBJECT_MARGIN, REDRAW_OBJECT_MARGIN)
+        grid_size = (self._terrain_grid.get_size() / cell_size).ceil()
+        return visible_spans(viewport_pos - margin, viewport_pos + surface_size + margin, grid_size, cell_size)
+
+    def get_dirty_rects(self):
+        """
+        Zwraca listę prostokątów (pygame.Rect) ekranu, które zmieniły się w ostatnim wywołaniu redraw względem poprzedniego:
+        kafle animowane oraz stare i nowe miejsca obiektów statycznych i dynamicznych, które zostały przesunięte, dodane,
+        usunięte lub zmieniły ramkę animacji. Zwraca None, jeśli zmienił się cały ekran (ruch kamery, zmiana terenu lub rozmiaru ekranu).
+        """
+        return self._dirty_rects
+
+    def _track_dirty_rects(self, surface, viewport_pos, collisions, animated):
+        view = viewport_pos.couple(), surface.get_size(), collisions, id(self._terrain_grid), self._terrain_grid.get_revision()
+        frames = {(object[0][0], tuple(object[0][1]), object[2]) for object in self._visible_objects}
+        if view != self._previous_view:
+            self._dirty_rects = None
+        else:
+            rects = animated
+            for frame, area, dest in frames.symmetric_difference(self._previous_frames):
+                rects.append(pygame.Rect(dest, area[2:4]))
+            self._dirty_rects = rects
+        self._previous_view = view
+        self._previous_frames = frames
 
     def pick(self, position):
         """Zwraca listę obiektów na danej pozycji."""
@@ -158,10 +217,37 @@ class Environment:
     def add_object(self, object):
         """Dodaje obiekt do środowiska."""
         self._dynamic_objects.append(object)
+        self._spatial_hash.insert(object, object.get_position())
+
+    def remove_object(self, object):
+        """Usuwa obiekt ze środowiska."""
+        self._dynamic_objects.remove(object)
+        self._spatial_hash.remove(object)
+        if object in self._players:
+            self._players.remove(object)
 
-    def collidable(self):
-        """Zwraca obiekty ktore wchodzą w kolizje."""
-        return self._dynamic_objects
+    def move_object(self, object):
+        """Aktualizuje położenie obiektu w siatce kubełków, wywoływane przez DynamicObject.set_position."""
+        self._spatial_hash.update(object, object.get_position())
+
+    def collidable(self, position = None, radius = 0.0):
+        """
+        Zwraca obiekty ktore wchodzą w kolizje. Jeśli podano pozycję zwraca tylko obiekty z kubełków siatki
+        pokrywających okrąg o promieniu radius (mogą być też dalsze, odległość trzeba sprawdzić).
+        """
+        if position is None:
+            return self._dynamic_objects
+        return self._spatial_hash.query(position, radius)
+
+    def annulus(self, position, inner_radius, outer_radius):
+        """Zwraca obiekty, których odległość od position leży w przedziale [inner_radius, outer_radius)."""
+        inner_sq, outer_sq = inner_radius * inner_radius, outer_radius * outer_radius
+        result = []
+        for object in self._spatial_hash.query_ring(position, inner_radius, outer_radius):
+            distance_sq = position.distsq(object.get_position())
+            if inner_sq <= distance_sq < outer_sq:
+                result.append(object)
+        return result
 
     def is_reachable(self, position):
         """Sprawdza czy dana pozycja jest osiągalna, czy da się tam wejść."""
@@ -170,113 +256,91 @@ class Environment:
     def is_clear(self):
         return len(self._dynamic_objects) == 1
 
-    def _create_buffers(self, surface):
-        surface_size = vec2(surface.get_size())
-        required_size = surface_size + MARGIN_SIZE * 2
-        if self._previous_buffer == None:
-            self._previous_buffer = pygame.Surface(required_size.intcpl())
-            self._previous_position = vec2(-0xfffffff, -0xfffffff)
-        if self._current_buffer == None:
-            self._current_buffer = pygame.Surface(required_size.intcpl())
-
-    def _swap_buffers(self):
-        tmp = self._current_buffer
-        self._current_buffer = self._previous_buffer
-        self._previous_buffer = tmp
-
     #returns table with points (nodes) to go through
     def findPath(self, startPoint, endPoint):
         """
         Zwraca droge z punktu startowego do koncowego omijajaca wszystkie niedostepne statyczne czesci terenu.
         NIE OMIJA OBIEKTOW DYNAMICZNYCH
         W przypadku braku drogi zwraca liste pusta
-        Stala srodowiska FIND_PATH_MAX_DIST okresla jaka najdluzsza droge findPath bedzie rozwazal, przestaje szukac i zwraca liste pusta w przypadku gdy przewidywana dlugosc trasy przekroczy ta stala.
+        Stala srodowiska FIND_PATH_MAX_DIST okresla zasieg findPath, dla dalszego punktu koncowego zwraca liste pusta. Stala FIND_PATH_MAX_COST okresla jaka najdluzsza droge findPath bedzie rozwazal, przestaje szukac i zwraca liste pusta w przypadku gdy dlugosc trasy przekroczylaby ta stala.
         Jesli punkt startowy lub koncowy sa nieosiagalne stara sie znalezc osiagalny punkt w ich sasiedztwie.
-        Zwraca [] i wypisuje na konsole blad jesli nie znajdzie
+        Droga jest lista punktow: startowy, punkty w ktorych zmienia sie kierunek i koncowy (srodki kafli).
         """
-        def pairPlus(pair1, pair2):
-            a1,b1 = pair1
-            a2,b2 = pair2
-            return (a1+a2, b1+b2)
-
-        def manhattanDis(pair1, pair2):
-            a1,b1 = pair1
-            a2,b2 = pair2
-            t0 = a2-a1
-            t1 = b2-b1
-            return ((t0*t0+t1*t1))
-
-        def seqPlus(table, pair):
-            tableNew = table[:]
-            tableNew.append(pair)
-            return tableNew
-
-        def filter(f, table):
-            newTable = []
-            for obj in table:
-                if f(obj):
-                    newTable.append(obj)
-            return newTable
-
-        def findPathAux(self, startPoint, endPoint):
-            reached = set()
-            unchecked = PriorityQueue()
-
-            moves = {(i,j) for i in [-1,0,1] for j in [-1,0,1]}
-            moves.remove((0,0))
-
-            count=0
-            unchecked.put((0,startPoint,[]))
-            while not unchecked.empty():
-                prior, point, seq = unchecked.get()
-
-                if point == endPoint:
-                    return seq
-
-                #odcinaj jesli przewidywana droga bedzie zbyt dluga
-                if prior > self.FIND_PATH_MAX_DIST:
-                    return []
-
-                if not point in reached:
-                    reached.add(point)
-                    for move in moves:
-                        pointNew = pairPlus(point, move)
-                        if self.reachable(vec2(pointNew)):
-                            seqNew = seqPlus(seq, move)
-                            unchecked.put((manhattanDis(pointNew, endPoint), pointNew, seqNew))
-        startPointVec = vec2(startPoint)
-        if not self.reachable(startPointVec):
-            rpoints = filter(self.reachable, [startPointVec + vec2(i,j) for i in [-1,0,1] for j in [-1,0,1]])
-            if rpoints != []:
-                startPoint = rpoints[0].couple()
-            else:
-                # print("FindPath Error: startPoint unreachable and has not reachable neighbours")
-                return []
-        endPointVec = vec2(endPoint)
-        if not self.reachable(endPointVec):
-            rpoints = filter(self.reachable, [endPointVec + vec2(i,j) for i in [-1,0,1] for j in [-1,0,1]])
-            if rpoints != []:
-                endPoint = rpoints[0].couple()
-            else:
-                # print("FindPath Error: endPoint unreachable and has not reachable neighbours")
-                return []
-
-        seq = findPathAux(self, startPoint, endPoint)
-        if seq == None:
-            # print("FindPath Error: None path of given length exists")
+        start = self._reachable_tile(startPoint)
+        end = self._reachable_tile(endPoint)
+        if start == None or end == None or (vec2(start) - vec2(end)).length() > Environment.FIND_PATH_MAX_DIST:
             return []
-        seqNew = []
-        acc = last = startPoint
-        for move in seq:
-            if move == last:
-                acc = pairPlus(acc, last)
-            else:
-                seqNew = seqPlus(seqNew, acc)
-                last = move
-                acc = pairPlus(acc,move)
-        seqNew = seqPlus(seqNew, endPoint)
-        return [(x[0] + 0.49, x[1] + 0.49) for x in seqNew]
-        #return seqNew
+        path = self._path_cache.get(start, end)
+        if path == None:
+            tiles = self._path_finder.find(start, end)
+            path = smooth_path(tiles)
+            self._path_cache.put(start, end, tiles, path)
+        return path
+
+    def findLongPath(self, startPoint, endPoint):
+        """
+        Jak findPath, ale bez ograniczenia zasiegu FIND_PATH_MAX_DIST i dlugosci FIND_PATH_MAX_COST (np. poscig przez cala mape).
+        Punkty w zasiegu findPath sa obslugiwane przez findPath, dalsze drogi sa szukane hierarchicznie, w grafie wejsc do sektorow (SectorGraph).
+        W przypadku braku drogi zwraca liste pusta.
+        """
+        start = self._reachable_tile(startPoint)
+        end = self._reachable_tile(endPoint)
+        if start == None or end == None:
+            return []
+        if (vec2(start) - vec2(end)).length() <= Environment.FIND_PATH_MAX_DIST:
+            return self.findPath(startPoint, endPoint)
+        path = self._path_cache.get(start, end)
+        if path == None:
+            tiles = self._sector_graph.find(start, end)
+            path = smooth_path(tiles)
+            self._path_cache.put(start, end, tiles, path)
+        return path
+
+    def flow_step(self, position, target):
+        """
+        Zwraca punkt do ktorego powinien isc obiekt z pozycji position aby dojsc do target, korzystajac ze wspolnego pola odleglosci od target.
+        Pole jest przeliczane tylko gdy target zmieni kafel. Zwraca None jesli position lezy poza polem (za daleko lub nieosiagalna).
+        """
+        self._flow_field.set_root((int(target.x), int(target.y)))
+        tile = int(position.x), int(position.y)
+        next_tile = self._flow_field.next_tile(tile)
+        if next_tile == None:
+            return None
+        if next_tile == tile:
+            return vec2(target.x, target.y)
+        return vec2(next_tile[0] + 0.5, next_tile[1] + 0.5)
+
+    def get_flow_field(self):
+        """Zwraca pole odleglosci uzywane przez flow_step."""
+        return self._flow_field
+
+    def get_path_finder(self):
+        """Zwraca obiekt wyszukujacy sciezki."""
+        return self._path_finder
+
+    def get_path_cache(self):
+        """Zwraca pamiec podreczna sciezek (statystyki trafien)."""
+        return self._path_cache
+
+    def get_sector_graph(self):
+        """Zwraca graf sektorow uzywany do wyszukiwania dlugich drog."""
+        return self._sector_graph
+
+    def _on_flags_changed(self, position, flags):
+        self._path_cache.invalidate((position.x, position.y), not flags)
+        self._flow_field.invalidate()
+        self._sector_graph.repair((position.x, position.y))
+
+    def _reachable_tile(self, point):
+        tile = int(point[0]), int(point[1])
+        if self._path_finder.is_walkable(tile):
+            return tile
+        for i in [-1, 0, 1]:
+            for j in [-1, 0, 1]:
+                neighbour = tile[0] + i, tile[1] + j
+                if self._path_finder.is_walkable(neighbour):
+                    return neighbour
+        return None
 
     def redraw_path(self, surface, position, path):
         """Funkcja pomocnicza rysuje ścieżkę na mapie. Przydatna przy debugowaniu."""
@@ -8,9 +8,14 @@ class GameStage:
     "Klasa bazowa dla stadiów gry, stadiami mogą być np. rozgrywka, menu główne."
     def __init__(self, screen):
         self._time_step = 0.01
+        self._display = screen
         self._screen = screen
+        self._render_scale = 1.0
         self._next_stage = None
         self._show_fps = True
+        self._dirty_rects = False
+        self._full_update = True
+        self._counter_rect = None
         self._sysfont = pygame.font.SysFont("Consolas", 16)
         self._previous = [30] * 16
 
@@ -32,6 +37,11 @@ class GameStage:
                     self._next_stage = None
                 elif event.type == pygame.KEYDOWN and event.key == K_F1:
                     self._show_fps = not self._show_fps
+                    self._full_update = True
+                elif event.type == pygame.KEYDOWN and event.key == K_F2:
+                    self.set_dirty_rects(not self._dirty_rects)
+                elif event.type in (MOUSEBUTTONDOWN, MOUSEBUTTONUP, MOUSEMOTION) and self._screen is not self._display:
+                    quit = self.on_event(pygame.event.Event(event.type, dict(event.dict, pos = self._to_screen(event.pos))))
                 else:
                     quit = self.on_event(event)
 
@@ -41,7 +51,7 @@ class GameStage:
                 delta -= self._time_step
 
             self._screen.fill((0, 0, 0))
-            self.on_redraw(self._screen, temp, new_time)
+            rects = self.on_redraw(self._screen, temp, new_time)
             if self._show_fps and delta != 0:
                 # smooth fps
                 average = 0
@@ -51,9 +61,23 @@ class GameStage:
                 self._previous[-1] = temp
                 average += temp
                 average /= len(self._previous)
-                counter = self._sysfont.render("ms: " + str(int(average * 1000)) + " fps: " + str(int(1.0 / average)), False, (255, 0, 0))
+                mode = " dirty rects" if self._dirty_rects else ""
+                counter = self._sysfont.render("ms: " + str(int(average * 1000)) + " fps: " + str(int(1.0 / average)) + mode, False, (255, 0, 0))
                 self._screen.blit(counter, (0, 0))
-            pygame.display.update()
+                if rects != None:
+                    rects.append(counter.get_rect())
+                    if self._counter_rect != None:
+                        rects.append(self._counter_rect)
+                self._counter_rect = counter.get_rect()
+            if self._screen is not self._display:
+                pygame.transform.scale(self._screen, self._display.get_size(), self._display)
+                if rects != None:
+                    rects = [self._to_display(rect) for rect in rects]
+            if self._dirty_rects and rects != None and not self._full_update:
+                pygame.display.update(rects)
+            else:
+                pygame.display.update()
+            self._full_update = False
 
         return self._next_stage
 
@@ -66,8 +90,39 @@ class GameStage:
         return False
 
     def on_redraw(self, surface, delta, current):
-        """Odrysowywanie odbywa się tutaj. Klasa pochodzna powinna przysłonić tą metodę."""
-        pass
+        """
+        Odrysowywanie odbywa się tutaj. Klasa pochodzna powinna przysłonić tą metodę. Może zwrócić listę prostokątów,
+        które zmieniły się od poprzedniej klatki, wtedy w trybie prostokątów (set_dirty_rects) tylko one są kopiowane na ekran.
+        Zwrócenie None oznacza, że zmienił się cały ekran.
+        """
+        return None
+
+    def set_dirty_rects(self, enabled):
+        """Włącza lub wyłącza tryb prostokątów, w którym na ekran kopiowane są tylko obszary zwrócone przez on_redraw (przełączany klawiszem F2)."""
+        self._dirty_rects = enabled
+        self._full_update = True
+
+    def get_dirty_rects(self):
+        """Zwraca czy włączony jest tryb prostokątów."""
+        return self._dirty_rects
+
+    def set_render_scale(self, scale):
+        """
+        Ustawia skalę renderowania: stadium rysuje na powierzchni o rozmiarze ekranu pomnożonym przez scale,
+        która jest następnie skalowana na ekran. Koszt klatki zależy wtedy od rozmiaru tej powierzchni, a nie od rozdzielczości ekranu.
+        Przy skali 1.0 stadium rysuje bezpośrednio na ekranie.
+        """
+        self._render_scale = scale
+        if scale == 1.0:
+            self._screen = self._display
+        else:
+            width, height = self._display.get_size()
+            self._screen = pygame.Surface((max(int(width * scale), 1), max(int(height * scale), 1)), 0, self._display)
+        self._full_update = True
+
+    def get_render_scale(self):
+        """Zwraca skalę renderowania."""
+        return self._render_scale
 
     def set_next_stage(self, next_stage):
         """Ustawia stadium gry które będzie wynonywane poz zakończeniu aktualnego."""
@@ -76,3 +131,19 @@ class GameStage:
     def get_next_stage(self):
         """Zwraca stadium gry które będzie wynonywane poz zakończeniu aktualnego."""
         return self._next_stage
+
+    def _to_screen(self, position):
+        """Przelicza pozycję na ekranie na pozycję na powierzchni, na której rysuje stadium."""
+        width, height = self._screen.get_size()
+        display_width, display_height = self._display.get_size()
+        return (position[0] * width // display_width, position[1] * height // display_height)
+
+    def _to_display(self, rect):
+        """Przelicza prostokąt na powierzchni, na której rysuje stadium, na prostokąt ekranu, który go pokrywa."""
+        width, height = self._screen.get_size()
+        display_width, display_height = self._display.get_size()
+        left = rect[0] * display_width // width
+        top = rect[1] * display_height // height
+        right = -(-(rect[0] + rect[2]) * display_width // width)
+        bottom = -(-(rect[1] + rect[3]) * display_height // height)
+        return pygame.Rect(left, top, right - left, bottom - top)
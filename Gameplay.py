@@ -1,5 +1,6 @@
 ﻿from MenuStages import *
 from Environment import *
+from SpriteAtlas import *
 
 SPELL_NAMES = ["water_ball", "fire_ball", "air_ball", "earth_ball", "water_wave", "fire_wave", "air_wave", "earth_wave"]
 
@@ -8,7 +9,9 @@ class Gameplay(GameStage):
     def __init__(self, screen):
         super(Gameplay, self).__init__(screen)
         self._environment = Environment()
+        self._atlas = SpriteAtlas()
         self._level_file_name = ""
+        self._score_rect = pygame.Rect(0, 0, 0, 0)
         self.sound = SoundEffects.GameTheme[randint(0,1)]
 
     def on_event(self, event):
@@ -56,16 +59,23 @@ class Gameplay(GameStage):
         self._environment.update(delta, current)
 
     def on_redraw(self, surface, delta, current):
-        """Odrysowuje grę."""
+        """Odrysowuje grę. Zwraca zmienione obszary ekranu albo None, jeśli zmienił się cały ekran."""
         self._environment.redraw(surface, self._player.get_position(), current, False)
         score = FONT_SMALL.render("score: " + str(self._player.get_score()), True, (255, 255, 0))
-        surface.blit(score, ((surface.get_size()[0] - score.get_size()[0]) // 2, 0))
+        score_rect = score.get_rect(topleft = ((surface.get_size()[0] - score.get_size()[0]) // 2, 0))
+        surface.blit(score, score_rect)
+        rects = self._environment.get_dirty_rects()
+        if rects != None:
+            rects += [score_rect, self._score_rect]
+        self._score_rect = score_rect
+        return rects
 
     def new_game(self, file):
         """Inicjalizuje nową rozgrywkę."""
-        loader = TxtLevelLoader()
+        loader = create_level_loader(file)
         loader.load(file)
         self._environment.load(loader)
+        self._atlas.build(get_assets())
         self._player = self._environment.get_players()[0]
         self._level_file_name = file
 
@@ -196,10 +196,12 @@ class IMGUI:
         # render item list
         item_number = region.h // int(item_size.y)
         first_item = floor((max(0, len(items) - item_number)) * position)
+        icons = []
         for i in range(min(item_number, len(items))):
             item_region = rect(region.x, region.y + i * item_size.y, item_size.x, item_size.y)
             if i + first_item == index: pygame.gfxdraw.box(self._surface, item_region, (0, 255, 0, 127))
-            self._surface.blit(items[i + first_item].get_icon(item_size), item_region)
+            icons.append((items[i + first_item].get_icon(item_size), item_region))
+        self._surface.blits(icons, 0)
 
         # has button been clicked
         if self._mouse_down == 0 and self._hot_item == id and self._active_item == id and region_hit(region, self._mouse_pos):
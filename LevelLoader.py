@@ -1,7 +1,11 @@
 ﻿from TerrainGrid import *
 from ObjectSprite import *
+from AssetRegistry import *
 from DynamicObject import *
 from StaticObjects import *
+import mmap
+import struct
+import numpy
 
 class LevelLoader:
     """Klasa bazowa loadera map. Implementuje wzorzec fabryka. Buduje środowisko gry na podstawie zadanego pliku z mapą."""
@@ -70,6 +74,7 @@ class TxtLevelLoader(LevelLoader):
         # s <x> <y> <t> <static_sprite>
         # d <class_name> <x> <y>
         self._dynamic_objects = []
+        tiles, flags, width = None, None, 0
         file = open(file_name, "r")
         for line in file.readlines():
             if line.startswith("pp"):
@@ -78,16 +83,15 @@ class TxtLevelLoader(LevelLoader):
                 width, height = int(line.split()[1].strip()), int(line.split()[2].strip())
                 self._terrain_grid.set_size(vec2(width, height))
                 self._static_objects.set_size(vec2(width, height))
+                tiles, flags = [-1] * (width * height), [False] * (width * height)
             elif line.startswith("ts"):
-                self._terrain_grid_sprites.append(TileSprite(line.split()[1].strip()))
+                self._terrain_grid_sprites.append(load_tile_sprite(line.split()[1].strip()))
             elif line.startswith("os"):
-                self._static_object_sprites.append(ObjectSprite(line.split()[1].strip()))
+                self._static_object_sprites.append(load_object_sprite(line.split()[1].strip()))
             elif line.startswith("t"):
-                split = [x.strip() for x in line.split()]
-                position = vec2(int(split[1]), int(split[2]))
-                flags, sprite = split[3] == "True", int(split[4])
-                self._terrain_grid.set_tile(position, self._terrain_grid_sprites[sprite])
-                self._terrain_grid.set_flags(position, flags)
+                split = line.split()
+                index = int(split[2]) * width + int(split[1])
+                flags[index], tiles[index] = split[3] == "True", int(split[4])
             elif line.startswith("s"):
                 split = [x.strip() for x in line.split()]
                 position = vec2(int(split[1]) * 0.01, int(split[2]) * 0.01)
@@ -102,6 +106,11 @@ class TxtLevelLoader(LevelLoader):
                 object = eval(class_name + "()")
                 object.set_position(position)
                 self._dynamic_objects.append(object)
+        for cls in {object.__class__ for object in self._dynamic_objects}:
+            preload_assets(cls)
+        if tiles != None:
+            # kafle nieopisane w pliku pozostają puste (indeks -1 wskazuje na pusty kafel dodany na końcu listy)
+            self._terrain_grid.set_tiles(self._terrain_grid_sprites + [self._terrain_grid.get_tile(vec2(0, 0))], tiles, flags)
 
     def save(self, file_name):
         terrain_grid_sprites = dict()
@@ -140,3 +149,131 @@ class TxtLevelLoader(LevelLoader):
                     rt = str(i[1])
                     sprite = str(static_objects_sprites[i[2]])
                     file.write("s " + xp + " " + yp + " " + rt + " " + sprite + "\n")
+
+class BinaryLevelLoader(LevelLoader):
+    """
+    Implementuje binarny format mapy gry (liczby little-endian):
+    nagłówek HEADER (sygnatura, wersja, rozmiar mapy, liczności tablic, rozmiar indeksu kafla w bajtach),
+    tablice nazw (duszki kafli, duszki obiektów statycznych, klasy obiektów dynamicznych) jako napisy utf-8 poprzedzone długością (uint16),
+    tablica indeksów duszków kafli (uint8 lub uint16) i tablica flag (uint8), wiersz po wierszu,
+    rekordy obiektów statycznych (STATIC_RECORD) i dynamicznych (DYNAMIC_RECORD), pozycje w setnych częściach kafla.
+    Tablice są czytane bez kopiowania z pliku odwzorowanego w pamięci (mmap, numpy.frombuffer).
+    """
+    SIGNATURE = b"ROLB"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHHHHHIIB")
+    STATIC_RECORD = numpy.dtype([("x", "<i4"), ("y", "<i4"), ("frame", "<u2"), ("sprite", "<u2")])
+    DYNAMIC_RECORD = numpy.dtype([("class", "<u2"), ("x", "<i4"), ("y", "<i4")])
+
+    def is_binary(file_name):
+        """Sprawdza czy plik zaczyna się sygnaturą formatu binarnego."""
+        with open(file_name, "rb") as file:
+            return file.read(len(BinaryLevelLoader.SIGNATURE)) == BinaryLevelLoader.SIGNATURE
+
+    def load(self, file_name):
+        with open(file_name, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as data:
+                self._load(data)
+
+    def save(self, file_name):
+        terrain_grid_sprites = dict()
+        for i in range(len(self._terrain_grid_sprites)):
+            terrain_grid_sprites[self._terrain_grid_sprites[i].get_file_name()] = i
+        static_objects_sprites = dict()
+        for i in range(len(self._static_object_sprites)):
+            static_objects_sprites[self._static_object_sprites[i]] = i
+        class_names = sorted(set(o.__class__.__name__ for o in self._dynamic_objects))
+
+        size = self._terrain_grid.get_size()
+        tile_type = numpy.uint8 if len(self._terrain_grid_sprites) <= 256 else numpy.uint16
+        tiles = numpy.empty(size.x * size.y, dtype = tile_type)
+        flags = numpy.empty(size.x * size.y, dtype = numpy.uint8)
+        for v in area(size):
+            tiles[v.y * size.x + v.x] = terrain_grid_sprites[self._terrain_grid.get_tile(v).get_file_name()]
+            flags[v.y * size.x + v.x] = 1 if self._terrain_grid.get_flags(v) else 0
+
+        static_objects = []
+        size_in_sectors = self._static_objects.get_size()
+        for y in range(size_in_sectors.y):
+            for x in range(size_in_sectors.x):
+                for i in self._static_objects.get_sector(vec2(x, y)):
+                    static_objects.append((floor(i[0].x * 100), floor(i[0].y * 100), i[1], static_objects_sprites[i[2]]))
+        static_objects = numpy.array(static_objects, dtype = BinaryLevelLoader.STATIC_RECORD)
+
+        dynamic_objects = []
+        for o in self._dynamic_objects:
+            position = o.get_position()
+            dynamic_objects.append((class_names.index(o.__class__.__name__), floor(position.x * 100), floor(position.y * 100)))
+        dynamic_objects = numpy.array(dynamic_objects, dtype = BinaryLevelLoader.DYNAMIC_RECORD)
+
+        with open(file_name, "wb") as file:
+            file.write(BinaryLevelLoader.HEADER.pack(BinaryLevelLoader.SIGNATURE, BinaryLevelLoader.VERSION, size.x, size.y,
+                len(self._terrain_grid_sprites), len(self._static_object_sprites), len(class_names),
+                len(static_objects), len(dynamic_objects), tiles.itemsize))
+            for name in [x.get_file_name() for x in self._terrain_grid_sprites] + [x.get_file_name() for x in self._static_object_sprites] + class_names:
+                encoded = name.encode("utf-8")
+                file.write(struct.pack("<H", len(encoded)))
+                file.write(encoded)
+            file.write(tiles.tobytes())
+            file.write(flags.tobytes())
+            file.write(static_objects.tobytes())
+            file.write(dynamic_objects.tobytes())
+
+    def _load(self, data):
+        signature, version, width, height, num_tile_sprites, num_object_sprites, num_classes, num_static, num_dynamic, tile_size = BinaryLevelLoader.HEADER.unpack_from(data, 0)
+        if signature != BinaryLevelLoader.SIGNATURE or version != BinaryLevelLoader.VERSION:
+            raise Exception("Unsupported level format: " + str(signature) + " v" + str(version))
+        offset = BinaryLevelLoader.HEADER.size
+        names = []
+        for i in range(num_tile_sprites + num_object_sprites + num_classes):
+            length, = struct.unpack_from("<H", data, offset)
+            names.append(bytes(data[offset + 2:offset + 2 + length]).decode("utf-8"))
+            offset += 2 + length
+
+        size = vec2(width, height)
+        tiles = numpy.frombuffer(data, numpy.uint8 if tile_size == 1 else numpy.dtype("<u2"), width * height, offset)
+        offset += tiles.nbytes
+        flags = numpy.frombuffer(data, numpy.uint8, width * height, offset)
+        offset += flags.nbytes
+        static_objects = numpy.frombuffer(data, BinaryLevelLoader.STATIC_RECORD, num_static, offset)
+        offset += static_objects.nbytes
+        dynamic_objects = numpy.frombuffer(data, BinaryLevelLoader.DYNAMIC_RECORD, num_dynamic, offset)
+
+        self._terrain_grid_sprites = [load_tile_sprite(x) for x in names[:num_tile_sprites]]
+        self._static_object_sprites = [load_object_sprite(x) for x in names[num_tile_sprites:num_tile_sprites + num_object_sprites]]
+        classes = [globals()[x] for x in names[num_tile_sprites + num_object_sprites:]]
+        for cls in classes:
+            preload_assets(cls)
+
+        self._terrain_grid = TerrainGrid()
+        self._static_objects = StaticObjects()
+        self._terrain_grid.set_size(size)
+        self._static_objects.set_size(size)
+        self._terrain_grid.set_tiles(self._terrain_grid_sprites, tiles.tolist(), flags.tolist())
+
+        for x, y, num_frame, sprite in static_objects.tolist():
+            position = vec2(x * 0.01, y * 0.01)
+            self._static_objects.get_sector(vec2(int(position.x), int(position.y)) // SECTOR_SIZE).append((position, num_frame, self._static_object_sprites[sprite]))
+
+        self._dynamic_objects = []
+        for class_index, x, y in dynamic_objects.tolist():
+            object = classes[class_index]()
+            object.set_position(vec2(x * 0.01, y * 0.01))
+            self._dynamic_objects.append(object)
+        del tiles, flags, static_objects, dynamic_objects
+
+def create_level_loader(file_name):
+    """Zwraca loader odpowiedni dla formatu pliku z mapą (binarny lub tekstowy)."""
+    if BinaryLevelLoader.is_binary(file_name):
+        return BinaryLevelLoader()
+    return TxtLevelLoader()
+
+def convert_level(source, destination):
+    """Konwertuje mapę z formatu tekstowego do binarnego."""
+    source_loader = TxtLevelLoader()
+    source_loader.load(source)
+    loader = BinaryLevelLoader()
+    loader.set_terrain_grid(source_loader.get_terrain_grid())
+    loader.set_static_objects(source_loader.get_static_objects())
+    loader.set_dynamic_objects(source_loader.get_dynamic_objects())
+    loader.save(destination)
@@ -1,10 +1,14 @@
 ﻿from GameStage import *
+from DynamicObject import *
 import pickle
 
 SPACING = 1.5
 
 class MainMenu(GameStage):
-    """Klasa menu głównego."""
+    """
+    Klasa menu głównego. W czasie wyświetlania menu wczytuje po jednym duszku obiektów dynamicznych (DYNAMIC_OBJECTS
+    i ich ASSET_DEPENDENCIES) na klatkę, aby "NEW GAME" nie musiało ich wczytywać, a start gry pozostał krótki.
+    """
     def __init__(self, screen, gameplay, hall_of_fame, credits):
         super(MainMenu, self).__init__(screen)
         ACTIVE_COLOR = (255, 100, 0)
@@ -20,6 +24,8 @@ class MainMenu(GameStage):
         self._gameplay = gameplay
         self._hall_of_fame = hall_of_fame
         self._credits = credits
+        self._pending_assets = pending_assets(DYNAMIC_OBJECTS)
+        self._preload_time = None
         
         self.sound = SoundEffects.MainMenuTheme
 
@@ -52,6 +58,17 @@ class MainMenu(GameStage):
                 self._position = self._EXIT
         return False
 
+    def on_update(self, delta, current):
+        """Wczytuje kolejny niewczytany duszek obiektów dynamicznych, najwyżej jeden na klatkę (current jest stały w obrębie klatki)."""
+        if self._pending_assets != [] and current != self._preload_time:
+            self._preload_time = current
+            self._pending_assets.pop(0).load()
+        return False
+
+    def get_pending_assets(self):
+        """Zwraca liczbę duszków, które menu ma jeszcze wczytać."""
+        return len(self._pending_assets)
+
     def on_redraw(self, surface, delta, current):
         """Odrysowuje menu główne."""
         i, s = 0, len(self._ACTIVE_LABELS)
@@ -59,14 +76,13 @@ class MainMenu(GameStage):
         yoffset = spacing * s
         yoffset = (surface.get_size()[1] - yoffset) // 2
         
+        labels = []
         while i < s:
-            if i == self._position:
-                xoffset = (surface.get_size()[0] - self._ACTIVE_LABELS[i].get_size()[0]) // 2
-                surface.blit(self._ACTIVE_LABELS[i], (xoffset, i * spacing + yoffset))
-            else:
-                xoffset = (surface.get_size()[0] - self._INACTIVE_LABELS[i].get_size()[0]) // 2
-                surface.blit(self._INACTIVE_LABELS[i], (xoffset, i * spacing + yoffset))
+            label = self._ACTIVE_LABELS[i] if i == self._position else self._INACTIVE_LABELS[i]
+            xoffset = (surface.get_size()[0] - label.get_size()[0]) // 2
+            labels.append((label, (xoffset, i * spacing + yoffset)))
             i += 1
+        surface.blits(labels, 0)
 
 class HallOfFame(GameStage):
     """Klasa tabeli najwyższych wyników."""
@@ -132,10 +148,12 @@ class HallOfFame(GameStage):
         yoffset = spacing * s
         yoffset = (surface.get_size()[1] - yoffset) // 2
         
+        labels = []
         while i < s:
             xoffset = (surface.get_size()[0] - self._labels[i].get_size()[0]) // 2
-            surface.blit(self._labels[i], (xoffset, i * spacing + yoffset))
+            labels.append((self._labels[i], (xoffset, i * spacing + yoffset)))
             i += 1
+        surface.blits(labels, 0)
 
     def set_main_menu(self, main_menu):
         """Ustawia referencje do menu głównego (potrzeban do powrotu)."""
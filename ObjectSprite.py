@@ -16,7 +16,6 @@ class ObjectSprite:
         surface.set_at((0, 0), color_key)
         surface.set_at((0, 1), color_key)
         surface.set_colorkey(color_key)
-        surface.convert(8, 0)
         surface_size = vec2(surface.get_size())
         self._frame_size = frame_size
         self._size = surface_size // frame_size
@@ -25,14 +24,50 @@ class ObjectSprite:
 
         def clip(subsurface):
             clip = subsurface.get_bounding_rect()
-            return subsurface, clip
+            return subsurface, clip, clip
 
         self._frames = [[clip(surface.subsurface((x * frame_size.x, y * frame_size.y) + frame_size.intcpl())) for x in range(self._size.x)] for y in range(self._size.y)]
+        self._surface = surface
         self._file_name = file_name
         self._icon = None
+        prepare_asset(self)
+
+    def convert(self):
+        """
+        Przekształca powierzchnię duszka do formatu ekranu i ustawia ramkom klucz koloru przyspieszany kodowaniem RLE,
+        ramki stają się podpowierzchniami przekształconej powierzchni. Wywoływana przez prepare_asset.
+        """
+        if self._surface == None:
+            return
+        color_key = self._surface.get_colorkey()
+        surface = self._surface.convert()
+        def subsurface(frame):
+            result = surface.subsurface(frame.get_offset() + frame.get_size())
+            result.set_colorkey(color_key, RLEACCEL)
+            return result
+        self._frames = [[(subsurface(frame), clip, trim) for frame, clip, trim in row] for row in self._frames]
+        self._surface = surface
+        self._icon = None
+
+    def get_atlas_regions(self):
+        """Zwraca listę par (powierzchnia, obszar) ramek przyciętych do ich zawartości, wierszami, dla SpriteAtlas."""
+        return [(frame, clip) for row in self._frames for frame, clip, trim in row]
+
+    def set_atlas_regions(self, regions):
+        """
+        Zastępuje ramki podpowierzchniami atlasu w kolejności get_atlas_regions. Obszar ramki obejmuje wtedy całą podpowierzchnię,
+        a przesunięcie przyciętej zawartości względem ramki pozostaje w trzecim elemencie krotki ramki.
+        """
+        regions = iter(regions)
+        self._frames = [[(region, region.get_rect(), trim) for (frame, clip, trim), region in zip(row, regions)] for row in self._frames]
+        self._surface = None
+        self._icon = None
 
     def get_frame(self, angle, time):
-        """Zwraca ramkę animacji które powinna być wyświetlona na podstawie czasu i kąta obrotu."""
+        """
+        Zwraca ramkę animacji które powinna być wyświetlona na podstawie czasu i kąta obrotu: krotkę (powierzchnia, obszar, przycięcie),
+        gdzie obszar to część powierzchni do narysowania, a przycięcie to prostokąt zawartości w ramce o rozmiarze get_frame_size.
+        """
         anim_frame = floor(time / self._time % self._size.x)
         direction = floor(((angle + self._angle_offset) % ObjectSprite.PI2 * ObjectSprite.INV_2PI) * self._size.y)
         return self._frames[direction][anim_frame]
@@ -56,7 +91,14 @@ class ObjectSprite:
     def get_icon(self, size):
         """Zwraca ikone sprite'a dla edytora."""
         if self._icon == None or vec2(self._icon.get_size()) != size:
-            self._icon = transform.scale(self._frames[0][0][0], size.intcpl())
+            region, clip, trim = self._frames[0][0]
+            frame = pygame.Surface(self._frame_size.intcpl(), 0, region)
+            color_key = region.get_colorkey()
+            if color_key != None:
+                frame.fill(color_key)
+                frame.set_colorkey(color_key)
+            frame.blit(region, trim, clip)
+            self._icon = transform.scale(frame, size.intcpl())
         return self._icon
 
     def get_time(self):
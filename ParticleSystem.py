@@ -0,0 +1,102 @@
+﻿"""@package docstring
+Moduł zawiera system cząsteczek przechowujący dane cząsteczek w kolumnach (tablicach numpy) zamiast w osobnych obiektach,
+dzięki czemu aktualizacja i rzutowanie na ekran odbywa się dla wszystkich cząsteczek efektu naraz.
+"""
+
+from utilities import *
+import numpy
+
+_GENERATOR = numpy.random.default_rng()
+_BASIS = numpy.array([[BASE_X.x, BASE_X.y], [BASE_Y.x, BASE_Y.y]])
+
+class ParticleSystem:
+    """
+    Zbiór cząsteczek jednego efektu. Każda cząsteczka ma pozycję (względem środka efektu, we współrzędnych świata),
+    kierunek (wektor prędkości), czas narodzin i indeks duszka.
+    """
+
+    def __init__(self, number):
+        self._position = numpy.zeros((number, 2))
+        self._direction = numpy.zeros((number, 2))
+        self._time = numpy.zeros(number)
+        self._index = numpy.zeros(number, dtype = numpy.intp)
+        self._sprites = None
+        self._items = []
+
+    def __len__(self):
+        return len(self._time)
+
+    def get_positions(self):
+        """Zwraca kolumnę pozycji (tablica n x 2)."""
+        return self._position
+
+    def get_directions(self):
+        """Zwraca kolumnę kierunków (tablica n x 2)."""
+        return self._direction
+
+    def get_times(self):
+        """Zwraca kolumnę czasów narodzin cząsteczek."""
+        return self._time
+
+    def get_indices(self):
+        """Zwraca kolumnę indeksów duszków."""
+        return self._index
+
+    def reset(self, current, velocity, jitter, mask = None):
+        """
+        Odradza cząsteczki (wszystkie lub wybrane maską) w środku efektu: czas narodzin to current przesunięty losowo
+        o najwyżej jitter / 2, kierunek jest losowy, o długości velocity.
+        """
+        number = len(self._time) if mask is None else int(numpy.count_nonzero(mask))
+        angle = _GENERATOR.random(number) * (pi * 2)
+        direction = numpy.empty((number, 2))
+        direction[:, 0] = -numpy.sin(angle) * velocity
+        direction[:, 1] = numpy.cos(angle) * velocity
+        time = current + (_GENERATOR.random(number) - 0.5) * jitter
+        if mask is None:
+            self._direction[:] = direction
+            self._time[:] = time
+            self._position[:] = 0.0
+        else:
+            self._direction[mask] = direction
+            self._time[mask] = time
+            self._position[mask] = 0.0
+
+    def expire(self, current, timeout):
+        """Zwraca maskę cząsteczek starszych niż timeout."""
+        return current - self._time > timeout
+
+    def advance(self, delta, mask = None):
+        """Przesuwa cząsteczki (wszystkie lub wybrane maską) zgodnie z ich kierunkiem."""
+        if mask is None:
+            self._position += self._direction * delta
+        else:
+            self._position[mask] += self._direction[mask] * delta
+
+    def spread(self, radius):
+        """Ustawia cząsteczki na okręgu o podanym promieniu, w kierunkach cząsteczek."""
+        numpy.multiply(self._direction, radius, out = self._position)
+
+    def set_phase(self, phase, number):
+        """Ustawia indeksy duszków na podstawie fazy animacji z przedziału [0, 1) (liczba lub tablica) i liczby duszków."""
+        self._index[:] = numpy.clip(phase, 0.0, 0.99) * number
+
+    def emit(self, frames, sprites, origin, viewport, height, anchor = (0, 0), lift = 0):
+        """
+        Rzutuje cząsteczki na ekran i dodaje je do listy ramek w formacie Environment.redraw (duszek, klucz sortowania, pozycja).
+        origin to pozycja efektu w świecie, viewport pozycja widoku, height wysokość powierzchni,
+        anchor przesunięcie duszka względem punktu, lift dodatkowe przesunięcie w górę.
+        Cząsteczki są dodawane w kolejności rosnącego klucza sortowania (przy równym kluczu w kolejności cząsteczek), jako jeden ciąg dla DrawQueue.
+        """
+        if sprites is not self._sprites:
+            size = sprites[0].get_size()
+            self._items = [(sprite, (0, 0) + size) for sprite in sprites]
+            self._sprites = sprites
+        offset = world_to_screen(origin) - viewport - vec2(anchor)
+        screen = self._position @ _BASIS
+        x = screen[:, 0] + offset.x
+        y = (height - offset.y - lift) - screen[:, 1]
+        order = numpy.argsort(y, kind = "stable")
+        x, y = x[order], y[order]
+        items = self._items
+        frames.extend(zip([items[i] for i in self._index[order].tolist()], (y + 16).tolist(), zip(x.astype(int).tolist(), y.astype(int).tolist())))
@@ -0,0 +1,551 @@
+﻿"""@package docstring
+Moduł zawiera implementację wyszukiwania ścieżek na siatce terenu (algorytm A*).
+"""
+
+from utilities import *
+from StaticObjects import SECTOR_SIZE
+from heapq import heappush
+from heapq import heappop
+from collections import OrderedDict
+
+SQRT2 = sqrt(2.0)
+OCTILE_FACTOR = SQRT2 - 2.0
+
+def octile_distance(first, second):
+    """Zwraca odległość oktylną pomiędzy kaflami (ruch w ośmiu kierunkach, ruch po przekątnej kosztuje sqrt(2))."""
+    dx = abs(first[0] - second[0])
+    dy = abs(first[1] - second[1])
+    return dx + dy + OCTILE_FACTOR * min(dx, dy)
+
+def smooth_path(tiles):
+    """
+    Zamienia listę kolejnych kafli ścieżki na listę punktów zwracaną przez Environment.findPath,
+    tzn. punkt startowy, punkty w których ścieżka zmienia kierunek i punkt końcowy (przesunięte do środka kafla).
+    """
+    if len(tiles) < 2:
+        return [(x + 0.49, y + 0.49) for x, y in tiles]
+    result = [tiles[0]]
+    i, s = 1, len(tiles) - 1
+    while i < s:
+        ax, ay = tiles[i - 1]
+        bx, by = tiles[i]
+        cx, cy = tiles[i + 1]
+        if bx - ax != cx - bx or by - ay != cy - by:
+            result.append(tiles[i])
+        i += 1
+    result.append(tiles[-1])
+    return [(x + 0.49, y + 0.49) for x, y in result]
+
+class PathFinder:
+    """
+    Klasa wyszukująca najkrótsze ścieżki pomiędzy kaflami terenu algorytmem A* z heurystyką oktylną.
+    Korzysta bezpośrednio z mapy osiągalności utrzymywanej przez TerrainGrid, więc zmiany flag w edytorze są widoczne od razu.
+    """
+
+    def __init__(self, terrain_grid, max_cost = 64):
+        self._terrain_grid = terrain_grid
+        self._max_cost = max_cost
+        self._expanded = 0
+
+    def find(self, start, goal):
+        """
+        Zwraca listę kafli (krotek (x, y)) od start do goal włącznie. Oba kafle muszą być osiągalne.
+        Zwraca listę pustą jeśli drogi nie ma lub jej długość przekroczyłaby max_cost.
+        """
+        walkable, stride = self._terrain_grid.get_walkability()
+        self._expanded = 0
+        if not self.is_walkable(start) or not self.is_walkable(goal):
+            return []
+
+        start_index = (start[1] + 1) * stride + start[0] + 1
+        goal_index = (goal[1] + 1) * stride + goal[0] + 1
+        goal_x, goal_y = goal[0] + 1, goal[1] + 1
+        neighbours = ((-stride - 1, SQRT2), (-stride, 1.0), (-stride + 1, SQRT2), (-1, 1.0),
+                      (1, 1.0), (stride - 1, SQRT2), (stride, 1.0), (stride + 1, SQRT2))
+        max_cost = self._max_cost
+        factor = OCTILE_FACTOR
+
+        opened = [(0.0, 0.0, start_index)]
+        costs = {start_index : 0.0}
+        parents = {start_index : -1}
+        closed = set()
+        expanded = 0
+
+        while opened:
+            estimate, __, index = heappop(opened)
+            if index == goal_index:
+                break
+            if index in closed:
+                continue
+            if estimate > max_cost:
+                self._expanded = expanded
+                return []
+            closed.add(index)
+            expanded += 1
+            cost = costs[index]
+            for offset, step in neighbours:
+                neighbour = index + offset
+                if walkable[neighbour] and neighbour not in closed:
+                    new_cost = cost + step
+                    if new_cost < costs.get(neighbour, max_cost + 1.0):
+                        costs[neighbour] = new_cost
+                        parents[neighbour] = index
+                        dx = abs(neighbour % stride - goal_x)
+                        dy = abs(neighbour // stride - goal_y)
+                        heuristic = dx + dy + factor * min(dx, dy)
+                        heappush(opened, (new_cost + heuristic, heuristic, neighbour))
+        else:
+            self._expanded = expanded
+            return []
+
+        self._expanded = expanded
+        result = []
+        index = goal_index
+        while index != -1:
+            result.append((index % stride - 1, index // stride - 1))
+            index = parents[index]
+        result.reverse()
+        return result
+
+    def is_walkable(self, tile):
+        """Sprawdza czy kafel znajduje się na mapie i da się na niego wejść."""
+        size = self._terrain_grid.get_size()
+        x, y = tile
+        if x < 0 or y < 0 or x >= size.x or y >= size.y:
+            return False
+        walkable, stride = self._terrain_grid.get_walkability()
+        return walkable[(y + 1) * stride + x + 1] == 1
+
+    def get_expanded(self):
+        """Zwraca liczbę węzłów rozwiniętych podczas ostatniego wyszukiwania."""
+        return self._expanded
+
+    def set_max_cost(self, max_cost):
+        """Ustawia maksymalną długość ścieżki jaką będzie rozważał algorytm."""
+        self._max_cost = max_cost
+
+    def get_max_cost(self):
+        """Zwraca maksymalną długość ścieżki jaką będzie rozważał algorytm."""
+        return self._max_cost
+
+class FlowField:
+    """
+    Pole odległości (mapa Dijkstry) od kafla docelowego, wspólne dla wszystkich jednostek podążających do tego samego celu.
+    Pole jest przeliczane tylko gdy zmieni się kafel docelowy i obejmuje kafle odległe od celu o co najwyżej max_cost.
+    Jednostka idzie do celu wybierając sąsiedni kafel o najmniejszej odległości.
+    """
+
+    def __init__(self, terrain_grid, max_cost = 32):
+        self._terrain_grid = terrain_grid
+        self._max_cost = max_cost
+        self._root = None
+        self._distances = {}
+        self._stride = 0
+        self._updates = 0
+
+    def set_root(self, root):
+        """Ustawia kafel docelowy, przelicza pole jeśli kafel się zmienił."""
+        walkable, stride = self._terrain_grid.get_walkability()
+        if root == self._root and stride == self._stride:
+            return
+        self._root = root
+        self._stride = stride
+        self._updates += 1
+        self._distances = distances = {}
+        x, y = root
+        size = self._terrain_grid.get_size()
+        if x < 0 or y < 0 or x >= size.x or y >= size.y:
+            return
+        root_index = (y + 1) * stride + x + 1
+        if not walkable[root_index]:
+            return
+
+        neighbours = ((-stride - 1, SQRT2), (-stride, 1.0), (-stride + 1, SQRT2), (-1, 1.0),
+                      (1, 1.0), (stride - 1, SQRT2), (stride, 1.0), (stride + 1, SQRT2))
+        max_cost = self._max_cost
+        distances[root_index] = 0.0
+        opened = [(0.0, root_index)]
+        while opened:
+            cost, index = heappop(opened)
+            if cost > distances[index]:
+                continue
+            for offset, step in neighbours:
+                neighbour = index + offset
+                new_cost = cost + step
+                if new_cost <= max_cost and walkable[neighbour] and new_cost < distances.get(neighbour, max_cost + 1.0):
+                    distances[neighbour] = new_cost
+                    heappush(opened, (new_cost, neighbour))
+
+    def invalidate(self):
+        """Wymusza przeliczenie pola przy kolejnym set_root (np. po zmianie osiągalności kafli)."""
+        self._root = None
+
+    def get_root(self):
+        """Zwraca kafel docelowy."""
+        return self._root
+
+    def get_distance(self, tile):
+        """Zwraca odległość kafla od celu lub None jeśli kafel nie należy do pola."""
+        return self._distances.get((tile[1] + 1) * self._stride + tile[0] + 1)
+
+    def next_tile(self, tile):
+        """Zwraca sąsiedni kafel leżący najbliżej celu lub None jeśli kafel nie należy do pola."""
+        stride = self._stride
+        distances = self._distances
+        index = (tile[1] + 1) * stride + tile[0] + 1
+        best = distances.get(index)
+        if best == None:
+            return None
+        result = index
+        for offset in (-stride - 1, -stride, -stride + 1, -1, 1, stride - 1, stride, stride + 1):
+            distance = distances.get(index + offset)
+            if distance != None and distance < best:
+                best = distance
+                result = index + offset
+        return result % stride - 1, result // stride - 1
+
+    def get_updates(self):
+        """Zwraca liczbę przeliczeń pola."""
+        return self._updates
+
+class PathCache:
+    """
+    Pamięć podręczna ścieżek (LRU) indeksowana parą kafli (start, cel). Przechowuje co najwyżej capacity ścieżek.
+    Po zmianie osiągalności kafla unieważniane są tylko te ścieżki, na które zmiana mogła mieć wpływ.
+    """
+
+    def __init__(self, capacity = 512):
+        self._capacity = capacity
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, start, goal):
+        """Zwraca kopię zapamiętanej ścieżki lub None jeśli jej nie ma w pamięci."""
+        entry = self._entries.get((start, goal))
+        if entry == None:
+            self._misses += 1
+            return None
+        self._entries.move_to_end((start, goal))
+        self._hits += 1
+        return list(entry[0])
+
+    def put(self, start, goal, tiles, path):
+        """Zapamiętuje ścieżkę path (wynik findPath) wyznaczoną z listy kafli tiles."""
+        cost = 0.0
+        for i in range(len(tiles) - 1):
+            cost += octile_distance(tiles[i], tiles[i + 1])
+        self._entries[(start, goal)] = list(path), frozenset(tiles), cost
+        self._entries.move_to_end((start, goal))
+        while len(self._entries) > self._capacity:
+            self._entries.popitem(False)
+
+    def invalidate(self, tile, walkable):
+        """
+        Usuwa ścieżki nieaktualne po zmianie osiągalności kafla tile. Zablokowanie kafla unieważnia ścieżki przez niego przechodzące,
+        odblokowanie - ścieżki które mogłyby przez niego prowadzić krócej oraz zapamiętany brak ścieżki.
+        """
+        invalid = []
+        for key, (path, tiles, cost) in self._entries.items():
+            if not walkable:
+                if tile in tiles:
+                    invalid.append(key)
+            elif path == [] or octile_distance(key[0], tile) + octile_distance(tile, key[1]) < cost:
+                invalid.append(key)
+        for key in invalid:
+            del self._entries[key]
+
+    def clear(self):
+        """Usuwa wszystkie ścieżki."""
+        self._entries.clear()
+
+    def get_hits(self):
+        """Zwraca liczbę trafień."""
+        return self._hits
+
+    def get_misses(self):
+        """Zwraca liczbę chybień."""
+        return self._misses
+
+    def get_size(self):
+        """Zwraca liczbę zapamiętanych ścieżek."""
+        return len(self._entries)
+
+class SectorGraph:
+    """
+    Hierarchiczne wyszukiwanie ścieżek (HPA*). Mapa jest dzielona na kwadratowe sektory, na granicach sektorów wyznaczane są wejścia,
+    a wewnątrz sektorów odległości pomiędzy wejściami. Długie ścieżki są najpierw wyszukiwane w grafie wejść, a potem
+    uszczegóławiane wewnątrz kolejnych sektorów. Tablice odległości (i ścieżki pomiędzy wejściami) wszystkich sektorów są liczone
+    przy budowie grafu, czyli przy wczytaniu poziomu. Po zmianie osiągalności kafla należy wywołać repair, który przebudowuje
+    tylko sektor kafla i jego sąsiadów.
+    """
+    LONG_ENTRANCE = 6
+
+    def __init__(self, terrain_grid, sector_size = SECTOR_SIZE * 4):
+        self._terrain_grid = terrain_grid
+        self._sector_size = sector_size
+        size = terrain_grid.get_size()
+        self._size = vec2((size.x + sector_size - 1) // sector_size, (size.y + sector_size - 1) // sector_size)
+        self._borders = {}
+        self._nodes = {}
+        self._edges = {}
+        self._segments = {}
+        self._masks = {}
+        self._expanded = 0
+        for y in range(self._size.y):
+            for x in range(self._size.x):
+                if x + 1 < self._size.x:
+                    self._build_border((x, y), (x + 1, y))
+                if y + 1 < self._size.y:
+                    self._build_border((x, y), (x, y + 1))
+        for y in range(self._size.y):
+            for x in range(self._size.x):
+                self._build_sector((x, y))
+        for border in self._borders.values():
+            for first, second in border:
+                self._edges[first][second] = 1.0
+                self._edges[second][first] = 1.0
+        for sector in self._nodes:
+            self._prepare(sector)
+
+    def find(self, start, goal, max_cost = None):
+        """
+        Zwraca listę kafli (krotek (x, y)) od start do goal włącznie lub listę pustą jeśli drogi nie ma.
+        Oba kafle muszą być osiągalne. Ścieżka jest bliska optymalnej (ruch pomiędzy sektorami tylko przez wejścia).
+        Jeśli podano max_cost, zwraca listę pustą także gdy długość ścieżki przekroczyłaby max_cost.
+        """
+        self._expanded = 0
+        start_sector = self.get_sector(start)
+        goal_sector = self.get_sector(goal)
+        if start_sector == goal_sector:
+            tiles = self._search(start, start_sector, (), goal)[1]
+            if tiles != []:
+                if max_cost != None and sum(octile_distance(tiles[i], tiles[i + 1]) for i in range(len(tiles) - 1)) > max_cost:
+                    return []
+                return tiles
+
+        start_distances, _, start_trace = self._search(start, start_sector, self._nodes[start_sector])
+        goal_distances, _, goal_trace = self._search(goal, goal_sector, self._nodes[goal_sector])
+        if start in self._edges:
+            start_distances.update(self._edges[start])
+
+        opened = [(octile_distance(start, goal), 0.0, start)]
+        costs = {start : 0.0}
+        parents = {start : None}
+        closed = set()
+        while opened:
+            estimate, cost, node = heappop(opened)
+            if node == goal:
+                break
+            if node in closed:
+                continue
+            if max_cost != None and estimate > max_cost:
+                return []
+            closed.add(node)
+            self._expanded += 1
+            if node == start:
+                edges = start_distances.items()
+            else:
+                edges = self._edges[node].items()
+                if node in goal_distances:
+                    edges = list(edges) + [(goal, goal_distances[node])]
+            for neighbour, step in edges:
+                new_cost = cost + step
+                if neighbour not in closed and new_cost < costs.get(neighbour, new_cost + 1.0):
+                    costs[neighbour] = new_cost
+                    parents[neighbour] = node
+                    heappush(opened, (new_cost + octile_distance(neighbour, goal), new_cost, neighbour))
+        else:
+            return []
+
+        nodes = []
+        node = goal
+        while node != None:
+            nodes.append(node)
+            node = parents[node]
+        nodes.reverse()
+
+        result = [start]
+        for i in range(len(nodes) - 1):
+            first, second = nodes[i], nodes[i + 1]
+            sector = self.get_sector(first)
+            if sector != self.get_sector(second):
+                result.append(second)
+            elif first == start:
+                result += start_trace(second)[1:]
+            elif second == goal:
+                result += goal_trace(first)[-2::-1]
+            else:
+                result += self._refine(first, second, sector)[1:]
+        return result
+
+    def repair(self, position):
+        """Przebudowuje wejścia i tablice odległości sektora zawierającego kafel position oraz sektorów sąsiednich."""
+        x, y = self.get_sector(position)
+        neighbours = [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]
+        neighbours = [n for n in neighbours if 0 <= n[0] < self._size.x and 0 <= n[1] < self._size.y]
+        for neighbour in neighbours:
+            self._build_border(min((x, y), neighbour), max((x, y), neighbour))
+        affected = [(x, y)] + neighbours
+        for sector in affected:
+            self._build_sector(sector)
+        for sector in affected:
+            for border in self._sector_borders(sector):
+                for first, second in self._borders.get(border, []):
+                    self._edges[first][second] = 1.0
+                    self._edges[second][first] = 1.0
+        for sector in affected:
+            self._prepare(sector)
+
+    def get_sector(self, tile):
+        """Zwraca współrzędne sektora do którego należy kafel."""
+        return tile[0] // self._sector_size, tile[1] // self._sector_size
+
+    def get_sector_size(self):
+        """Zwraca rozmiar sektora (w kaflach)."""
+        return self._sector_size
+
+    def get_node_number(self):
+        """Zwraca liczbę wejść (węzłów grafu abstrakcyjnego)."""
+        return len(self._edges)
+
+    def get_expanded(self):
+        """Zwraca liczbę węzłów grafu abstrakcyjnego rozwiniętych podczas ostatniego wyszukiwania."""
+        return self._expanded
+
+    def _walkable(self, x, y):
+        walkable, stride = self._terrain_grid.get_walkability()
+        return walkable[(y + 1) * stride + x + 1]
+
+    def _bounds(self, sector):
+        size = self._terrain_grid.get_size()
+        x0, y0 = sector[0] * self._sector_size, sector[1] * self._sector_size
+        return x0, y0, min(x0 + self._sector_size, size.x) - 1, min(y0 + self._sector_size, size.y) - 1
+
+    def _sector_borders(self, sector):
+        x, y = sector
+        return [((x - 1, y), (x, y)), ((x, y), (x + 1, y)), ((x, y - 1), (x, y)), ((x, y), (x, y + 1))]
+
+    def _build_border(self, first, second):
+        x0, y0, x1, y1 = self._bounds(first)
+        if second[0] != first[0]:
+            cells = [((x1, y), (x1 + 1, y)) for y in range(y0, y1 + 1)]
+        else:
+            cells = [((x, y1), (x, y1 + 1)) for x in range(x0, x1 + 1)]
+        entrances = []
+        run = []
+        for pair in cells + [None]:
+            if pair != None and self._walkable(*pair[0]) and self._walkable(*pair[1]):
+                run.append(pair)
+            elif run != []:
+                if len(run) < SectorGraph.LONG_ENTRANCE:
+                    entrances.append(run[len(run) // 2])
+                else:
+                    entrances.append(run[0])
+                    entrances.append(run[-1])
+                run = []
+        self._borders[(first, second)] = entrances
+
+    def _build_sector(self, sector):
+        for node in self._nodes.get(sector, []):
+            for neighbour in self._edges.get(node, {}):
+                if neighbour in self._edges:
+                    self._edges[neighbour].pop(node, None)
+            self._edges.pop(node, None)
+        nodes = set()
+        for border in self._sector_borders(sector):
+            for pair in self._borders.get(border, []):
+                nodes.add(pair[0] if border[0] == sector else pair[1])
+        self._nodes[sector] = nodes
+        for node in nodes:
+            self._edges[node] = {}
+        self._segments.pop(sector, None)
+        self._masks.pop(sector, None)
+
+    def _prepare(self, sector):
+        nodes = self._nodes[sector]
+        segments = self._segments.setdefault(sector, {})
+        for node in nodes:
+            distances, _, trace = self._search(node, sector, nodes)
+            for target, distance in distances.items():
+                if target != node:
+                    self._edges[node][target] = distance
+                    segments[(node, target)] = trace(target)
+
+    def _refine(self, first, second, sector):
+        segments = self._segments.setdefault(sector, {})
+        if (first, second) not in segments:
+            segments[(first, second)] = self._search(first, sector, (), second)[1]
+        return segments[(first, second)]
+
+    def _search(self, source, sector, targets, goal = None):
+        """
+        Algorytm Dijkstry ograniczony do sektora. Zwraca słownik odległości od source do kafli z targets,
+        ścieżkę (listę kafli) do goal, jeśli goal został podany i jest osiągalny, oraz funkcję zwracającą
+        ścieżkę od source do dowolnego osiągniętego kafla z targets.
+        """
+        x0, y0, x1, y1 = self._bounds(sector)
+        walkable = self._masks.get(sector)
+        stride = x1 - x0 + 3
+        if walkable == None:
+            walkable = self._sector_mask(sector)
+            self._masks[sector] = walkable
+        neighbours = ((-stride - 1, SQRT2), (-stride, 1.0), (-stride + 1, SQRT2), (-1, 1.0),
+                      (1, 1.0), (stride - 1, SQRT2), (stride, 1.0), (stride + 1, SQRT2))
+        def index(tile):
+            return (tile[1] - y0 + 1) * stride + tile[0] - x0 + 1
+        def tile(index):
+            return index % stride + x0 - 1, index // stride + y0 - 1
+
+        source_index = index(source)
+        goal_index = -1 if goal == None else index(goal)
+        targets = {index(target) for target in targets}
+        remaining = len(targets)
+        costs = [inf] * len(walkable)
+        parents = [-1] * len(walkable)
+        costs[source_index] = 0.0
+        distances = {}
+        opened = [(0.0, source_index)]
+        while opened:
+            cost, current = heappop(opened)
+            if cost > costs[current]:
+                continue
+            if current == goal_index:
+                break
+            if current in targets:
+                distances[tile(current)] = cost
+                remaining -= 1
+                if remaining == 0 and goal_index == -1:
+                    break
+            for offset, step in neighbours:
+                neighbour = current + offset
+                new_cost = cost + step
+                if new_cost < costs[neighbour] and walkable[neighbour]:
+                    costs[neighbour] = new_cost
+                    parents[neighbour] = current
+                    heappush(opened, (new_cost, neighbour))
+
+        def trace(target):
+            path = []
+            current = index(target)
+            while current != -1:
+                path.append(tile(current))
+                current = parents[current]
+            path.reverse()
+            return path
+
+        path = []
+        if goal_index != -1 and costs[goal_index] != inf:
+            path = trace(goal)
+        return distances, path, trace
+
+    def _sector_mask(self, sector):
+        walkable, stride = self._terrain_grid.get_walkability()
+        x0, y0, x1, y1 = self._bounds(sector)
+        width = x1 - x0 + 1
+        mask = bytearray((width + 2) * (y1 - y0 + 3))
+        for y in range(y0, y1 + 1):
+            first = (y + 1) * stride + x0 + 1
+            row = (y - y0 + 1) * (width + 2) + 1
+            mask[row:row + width] = walkable[first:first + width]
+        return mask
@@ -0,0 +1,85 @@
+﻿from utilities import *
+
+class ScrollBuffer:
+    """
+    Bufor przewijania widoku o rozmiarze ekranu, przechowujący nieruchomą część obrazu (np. teren bez animacji).
+    Piksel widoku (x, y) przy pozycji widoku position leży w buforze w punkcie ((x + position.x) mod szerokość,
+    (y - position.y) mod wysokość), bufor jest więc zawinięty (ring buffer) i przy przesunięciu widoku o (dx, dy)
+    nie trzeba kopiować jego zawartości: odrysowywane są tylko odsłonięte pasy o szerokości dx i wysokości dy,
+    a na ekran bufor jest kopiowany co najwyżej czterema blitami. Cały bufor jest odrysowywany przy pierwszym użyciu,
+    zmianie rozmiaru ekranu, zmianie klucza zawartości (np. zaznaczenia kafli lub licznika zmian terenu) lub po invalidate.
+    """
+
+    def __init__(self):
+        self._surface = None
+        self._position = None
+        self._key = None
+        self._exposed = []
+
+    def redraw(self, surface, position, key, draw):
+        """
+        Kopiuje bufor na powierzchnię surface dla widoku w punkcie position (w pikselach, jak w TerrainGrid.redraw).
+        Przed kopiowaniem dorysowuje odsłonięte części wywołując draw(bufor, pozycja) dla każdego prostokąta do odrysowania:
+        draw ma narysować widok w punkcie pozycja na całym buforze, ale zmieni tylko piksele w jego obszarze przycięcia.
+        Jeśli key różni się od klucza poprzedniego wywołania, odrysowywany jest cały bufor.
+        """
+        size = surface.get_size()
+        position = vec2(int(position.x), int(position.y))
+        if self._surface is None or self._surface.get_size() != size:
+            self._surface = pygame.Surface(size, 0, surface)
+            self._position = None
+        if key != self._key:
+            self._position = None
+        self._exposed = self._exposed_rects(position, size)
+        for rect in self._exposed:
+            for area, dest in self._pieces(rect, position):
+                self._surface.set_clip(area)
+                draw(self._surface, vec2(position.x - area.x + dest[0], position.y + area.y - dest[1]))
+        self._surface.set_clip(None)
+        self._position = position
+        self._key = key
+        surface.blits([(self._surface, dest, area) for area, dest in self._pieces(pygame.Rect((0, 0), size), position)], 0)
+
+    def invalidate(self):
+        """Wymusza odrysowanie całego bufora przy następnym wywołaniu redraw."""
+        self._position = None
+
+    def get_exposed(self):
+        """Zwraca listę prostokątów widoku (pygame.Rect) odrysowanych w ostatnim wywołaniu redraw."""
+        return self._exposed
+
+    def _exposed_rects(self, position, size):
+        """Zwraca prostokąty widoku odsłonięte przy przejściu z poprzedniej pozycji widoku do position."""
+        width, height = size
+        if self._position is None:
+            return [pygame.Rect(0, 0, width, height)]
+        dx = position.x - self._position.x
+        dy = self._position.y - position.y
+        if abs(dx) >= width or abs(dy) >= height:
+            return [pygame.Rect(0, 0, width, height)]
+        rects = []
+        if dx > 0:
+            rects.append(pygame.Rect(width - dx, 0, dx, height))
+        elif dx < 0:
+            rects.append(pygame.Rect(0, 0, -dx, height))
+        left, right = max(-dx, 0), width - max(dx, 0)
+        if dy > 0:
+            rects.append(pygame.Rect(left, height - dy, right - left, dy))
+        elif dy < 0:
+            rects.append(pygame.Rect(left, 0, right - left, -dy))
+        return rects
+
+    def _pieces(self, rect, position):
+        """
+        Dzieli prostokąt widoku rect na co najwyżej cztery części nieprzecinające krawędzi bufora.
+        Zwraca listę par (prostokąt bufora, pozycja w widoku) w formacie obszaru i celu Surface.blit.
+        """
+        width, height = self._surface.get_size()
+        origin_x, origin_y = (rect.x + position.x) % width, (rect.y - position.y) % height
+        columns = [(origin_x, rect.x, min(rect.width, width - origin_x))]
+        if columns[0][2] < rect.width:
+            columns.append((0, rect.x + columns[0][2], rect.width - columns[0][2]))
+        rows = [(origin_y, rect.y, min(rect.height, height - origin_y))]
+        if rows[0][2] < rect.height:
+            rows.append((0, rect.y + rows[0][2], rect.height - rows[0][2]))
+        return [(pygame.Rect(area_x, area_y, w, h), (dest_x, dest_y)) for area_x, dest_x, w in columns for area_y, dest_y, h in rows]
@@ -0,0 +1,133 @@
+﻿"""@package docstring
+Moduł zawiera implementację siatki kubełków (spatial hash) przyspieszającej wyszukiwanie obiektów dynamicznych leżących blisko siebie.
+"""
+
+from utilities import *
+
+class SpatialHash:
+    """
+    Równomierna siatka kubełków o boku cell_size (we współrzędnych świata). Każdy obiekt znajduje się w kubełku zawierającym jego pozycję.
+    Obiekty są identyfikowane przez tożsamość, pozycja musi być aktualizowana przez update przy każdym przesunięciu obiektu.
+    """
+
+    def __init__(self, cell_size = 2.0):
+        self._cell_size = cell_size
+        self._inv_cell_size = 1.0 / cell_size
+        self._cells = {}
+        self._keys = {}
+
+    def insert(self, object, position):
+        """Dodaje obiekt na podanej pozycji."""
+        key = self._key(position)
+        self._keys[object] = key
+        cell = self._cells.get(key)
+        if cell == None:
+            self._cells[key] = [object]
+        else:
+            cell.append(object)
+
+    def remove(self, object):
+        """Usuwa obiekt, nie robi nic jeśli obiektu nie ma."""
+        key = self._keys.pop(object, None)
+        if key != None:
+            cell = self._cells[key]
+            cell.remove(object)
+            if cell == []:
+                del self._cells[key]
+
+    def update(self, object, position):
+        """Aktualizuje pozycję obiektu (przenosi go do innego kubełka jeśli trzeba). Obiekty spoza siatki są pomijane."""
+        old_key = self._keys.get(object)
+        if old_key == None:
+            return
+        key = self._key(position)
+        if key != old_key:
+            cell = self._cells[old_key]
+            cell.remove(object)
+            if cell == []:
+                del self._cells[old_key]
+            self._keys[object] = key
+            cell = self._cells.get(key)
+            if cell == None:
+                self._cells[key] = [object]
+            else:
+                cell.append(object)
+
+    def query(self, position, radius):
+        """
+        Zwraca listę obiektów z kubełków pokrywających kwadrat o środku position i boku 2 * radius.
+        Lista może zawierać obiekty dalsze niż radius, wywołujący powinien sprawdzić odległość.
+        """
+        inv = self._inv_cell_size
+        first_x, first_y = floor((position.x - radius) * inv), floor((position.y - radius) * inv)
+        last_x, last_y = floor((position.x + radius) * inv), floor((position.y + radius) * inv)
+        result = []
+        cells = self._cells
+        if (last_x - first_x + 1) * (last_y - first_y + 1) > len(cells):
+            for (x, y), cell in cells.items():
+                if first_x <= x <= last_x and first_y <= y <= last_y:
+                    result += cell
+        else:
+            for y in range(first_y, last_y + 1):
+                for x in range(first_x, last_x + 1):
+                    cell = cells.get((x, y))
+                    if cell != None:
+                        result += cell
+        return result
+
+    def query_ring(self, position, inner_radius, outer_radius):
+        """
+        Zwraca listę obiektów z kubełków przecinających pierścień o środku position i promieniach inner_radius, outer_radius.
+        Kubełki leżące w całości wewnątrz wewnętrznego okręgu lub na zewnątrz zewnętrznego są pomijane,
+        wywołujący powinien sprawdzić odległość.
+        """
+        size = self._cell_size
+        inv = self._inv_cell_size
+        first_x, first_y = floor((position.x - outer_radius) * inv), floor((position.y - outer_radius) * inv)
+        last_x, last_y = floor((position.x + outer_radius) * inv), floor((position.y + outer_radius) * inv)
+        inner_sq, outer_sq = inner_radius * inner_radius, outer_radius * outer_radius
+        result = []
+        cells = self._cells
+        for y in range(first_y, last_y + 1):
+            low_y, high_y = y * size - position.y, (y + 1) * size - position.y
+            near_y = 0.0 if low_y <= 0.0 <= high_y else min(abs(low_y), abs(high_y))
+            far_y = max(abs(low_y), abs(high_y))
+            for x in range(first_x, last_x + 1):
+                cell = cells.get((x, y))
+                if cell != None:
+                    low_x, high_x = x * size - position.x, (x + 1) * size - position.x
+                    near_x = 0.0 if low_x <= 0.0 <= high_x else min(abs(low_x), abs(high_x))
+                    far_x = max(abs(low_x), abs(high_x))
+                    if near_x * near_x + near_y * near_y <= outer_sq and inner_sq <= far_x * far_x + far_y * far_y:
+                        result += cell
+        return result
+
+    def query_spans(self, spans):
+        """
+        Zwraca listę obiektów z kubełków podanych jako krotki (wiersz, pierwsza kolumna, kolumna za ostatnią),
+        np. zwrócone przez visible_spans dla siatki o komórkach wielkości kubełka.
+        """
+        result = []
+        cells = self._cells
+        for y, first_x, last_x in spans:
+            for x in range(first_x, last_x):
+                cell = cells.get((x, y))
+                if cell != None:
+                    result += cell
+        return result
+
+    def clear(self):
+        """Usuwa wszystkie obiekty."""
+        self._cells.clear()
+        self._keys.clear()
+
+    def get_cell_size(self):
+        """Zwraca rozmiar kubełka."""
+        return self._cell_size
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _key(self, position):
+        inv = self._inv_cell_size
+        return floor(position.x * inv), floor(position.y * inv)
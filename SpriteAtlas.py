@@ -0,0 +1,199 @@
+﻿"""@package docstring
+Moduł zawiera atlas ramek duszków: ramki wielu duszków (ObjectSprite, TileSprite) są kopiowane do kilku dużych powierzchni,
+a duszki rysują je jako podpowierzchnie tych powierzchni. Gotowy atlas jest zapisywany w katalogu ATLAS_CACHE_DIR.
+"""
+
+from utilities import *
+import hashlib
+import json
+import os
+import weakref
+
+ATLAS_PAGE_SIZE = 2048
+ATLAS_CACHE_DIR = CACHE_DIR
+ATLAS_GROUPS = {True: "alpha", False: "colorkey"}
+
+class SpriteAtlas:
+    """
+    Atlas ramek duszków. Duszek udostępnia ramki metodą get_atlas_regions (lista par (powierzchnia, obszar),
+    obszar to przycięta do get_bounding_rect część ramki) i przyjmuje metodą set_atlas_regions podpowierzchnie atlasu
+    w tej samej kolejności. Ramki z kanałem alfa i ramki z kluczem koloru trafiają na osobne strony o boku do page_size,
+    pakowane półkami (shelf packing): ramki posortowane malejąco według wysokości układane są od lewej w półkach,
+    których wysokość wyznacza pierwsza ramka. Podpowierzchnie ramek z kluczem koloru dostają klucz swojego arkusza z RLEACCEL.
+    Strony i rozmieszczenie ramek są zapisywane w katalogu cache_dir pod kluczem zależnym od plików i rozmiarów ramek,
+    przy kolejnym budowaniu tego samego atlasu są wczytywane z dysku zamiast pakowania i kopiowania ramek.
+    Katalog przechowuje tylko ostatnio zapisany atlas każdego rodzaju stron (ATLAS_GROUPS), starsze pliki są usuwane przy zapisie.
+    Wymaga ustawionego trybu wyświetlania.
+    """
+
+    def __init__(self, page_size = ATLAS_PAGE_SIZE, cache_dir = ATLAS_CACHE_DIR):
+        self._page_size = page_size
+        self._cache_dir = cache_dir
+        self._pages = []
+        self._statistics = {}
+        self._sprites = weakref.WeakSet()
+
+    def build(self, sprites):
+        """
+        Buduje atlas z ramek podanych duszków i przepina duszki na jego podpowierzchnie. Zwraca statystyki (get_statistics).
+        Duszki bez metody get_atlas_regions są pomijane. Jeśli atlas zbudowano już z tych samych duszków, nic nie robi.
+        """
+        sprites = sorted({sprite for sprite in sprites if hasattr(sprite, "get_atlas_regions")}, key = lambda sprite: sprite.get_file_name())
+        if self._statistics != {} and set(sprites) == set(self._sprites):
+            return self._statistics
+        groups = {}
+        for sprite in sprites:
+            regions = sprite.get_atlas_regions()
+            alpha = bool(regions[0][0].get_flags() & SRCALPHA) if regions != [] else False
+            groups.setdefault(alpha, []).append((sprite, regions))
+
+        self._pages = []
+        statistics = {"sprites": len(sprites), "frames": 0, "pages": 0, "sheet_bytes": 0, "atlas_bytes": 0, "cached": True}
+        sheets = {}
+        for alpha in sorted(groups):
+            group = groups[alpha]
+            regions = [region for sprite, sprite_regions in group for region in sprite_regions]
+            for surface, area in regions:
+                sheet = surface.get_parent() or surface
+                sheets[id(sheet)] = sheet
+            key = self._key(alpha, group)
+            cached = self._load(key, alpha)
+            if cached == None:
+                pages, placements = self._pack(regions, alpha)
+                self._save(key, alpha, pages, placements)
+            else:
+                pages, placements = cached
+            statistics["cached"] = statistics["cached"] and cached != None
+
+            index = 0
+            for sprite, sprite_regions in group:
+                atlas_regions = []
+                for surface, area in sprite_regions:
+                    page, x, y = placements[index]
+                    region = pages[page].subsurface((x, y, area[2], area[3]))
+                    color_key = surface.get_colorkey()
+                    if color_key != None:
+                        region.set_colorkey(color_key, RLEACCEL)
+                    atlas_regions.append(region)
+                    index += 1
+                sprite.set_atlas_regions(atlas_regions)
+            self._pages += pages
+            statistics["frames"] += len(regions)
+
+        statistics["pages"] = len(self._pages)
+        statistics["sheet_bytes"] = sum(sheet.get_width() * sheet.get_height() * sheet.get_bytesize() for sheet in sheets.values())
+        statistics["atlas_bytes"] = sum(page.get_width() * page.get_height() * page.get_bytesize() for page in self._pages)
+        statistics["saved_bytes"] = statistics["sheet_bytes"] - statistics["atlas_bytes"]
+        self._statistics = statistics
+        self._sprites = weakref.WeakSet(sprites)
+        return statistics
+
+    def get_pages(self):
+        """Zwraca listę stron atlasu."""
+        return self._pages
+
+    def get_statistics(self):
+        """
+        Zwraca słownik z liczbą duszków, ramek i stron ostatnio zbudowanego atlasu, rozmiarem w bajtach arkuszy, z których
+        pochodziły ramki, i stron atlasu, oszczędzoną pamięcią oraz informacją czy atlas został wczytany z dysku.
+        """
+        return self._statistics
+
+    def _pack(self, regions, alpha):
+        """
+        Rozmieszcza ramki na stronach i kopiuje je. Zwraca listę stron i listę krotek (strona, x, y) w kolejności ramek.
+        Ramka większa niż strona dostaje własną stronę, a następna ramka zaczyna nową stronę (page_open).
+        """
+        page_size = self._page_size
+        order = sorted(range(len(regions)), key = lambda i: (-regions[i][1][3], -regions[i][1][2]))
+        placements = [None] * len(regions)
+        sizes = []
+        shelf_x, shelf_y, shelf_height = 0, 0, 0
+        page_open = False
+        for i in order:
+            width, height = regions[i][1][2], regions[i][1][3]
+            if width > page_size or height > page_size:
+                placements[i] = len(sizes), 0, 0
+                sizes.append([width, height])
+                page_open = False
+                continue
+            if page_open and shelf_x + width > page_size:
+                shelf_x, shelf_y, shelf_height = 0, shelf_y + shelf_height, height
+            if not page_open or shelf_y + shelf_height > page_size:
+                shelf_x, shelf_y, shelf_height = 0, 0, height
+                sizes.append([0, 0])
+                page_open = True
+            placements[i] = len(sizes) - 1, shelf_x, shelf_y
+            shelf_x += width
+            sizes[-1][0] = max(sizes[-1][0], shelf_x)
+            sizes[-1][1] = max(sizes[-1][1], shelf_y + height)
+
+        pages = [self._create_page((max(width, 1), max(height, 1)), alpha) for width, height in sizes]
+        for (surface, area), (page, x, y) in zip(regions, placements):
+            if alpha:
+                pages[page].blit(surface, (x, y), area, BLEND_RGBA_MAX)
+            else:
+                color_key = surface.get_colorkey()
+                if color_key != None:
+                    pages[page].fill(color_key, (x, y, area[2], area[3]))
+                pages[page].blit(surface, (x, y), area)
+        return pages, placements
+
+    def _create_page(self, size, alpha):
+        """Tworzy pustą stronę atlasu w formacie ekranu."""
+        if alpha:
+            page = pygame.Surface(size, SRCALPHA).convert_alpha()
+            page.fill((0, 0, 0, 0))
+        else:
+            page = pygame.Surface(size).convert()
+        return page
+
+    def _file_name(self, key, alpha, suffix):
+        """Zwraca ścieżkę pliku atlasu key o rodzaju stron alpha, np. atlas-alpha-<key>.json lub atlas-alpha-<key>-0.png."""
+        return os.path.join(self._cache_dir, "atlas-%s-%s%s" % (ATLAS_GROUPS[alpha], key, suffix))
+
+    def _key(self, alpha, group):
+        """Zwraca klucz atlasu zależny od rodzaju stron, rozmiaru strony, plików duszków (nazwa, rozmiar, czas modyfikacji) i rozmiarów ramek."""
+        description = [alpha, self._page_size]
+        for sprite, regions in group:
+            file_name = sprite.get_file_name()
+            stat = os.stat(file_name) if os.path.isfile(file_name) else None
+            description.append([file_name, stat and stat.st_size, stat and int(stat.st_mtime), [tuple(area[2:4]) for surface, area in regions]])
+        return hashlib.sha1(json.dumps(description).encode("utf-8")).hexdigest()
+
+    def _load(self, key, alpha):
+        """Wczytuje strony i rozmieszczenie ramek atlasu key z dysku, zwraca None jeśli ich nie ma."""
+        index_name = self._file_name(key, alpha, ".json")
+        if not os.path.isfile(index_name):
+            return None
+        try:
+            with open(index_name, "r") as file:
+                index = json.load(file)
+            pages = []
+            for i, size in enumerate(index["pages"]):
+                page = pygame.image.load(self._file_name(key, alpha, "-%d.png" % i))
+                if list(page.get_size()) != size:
+                    return None
+                pages.append(page.convert_alpha() if alpha else page.convert())
+            return pages, [tuple(placement) for placement in index["placements"]]
+        except (OSError, ValueError, KeyError, pygame.error):
+            return None
+
+    def _save(self, key, alpha, pages, placements):
+        """
+        Zapisuje strony i rozmieszczenie ramek atlasu key na dysku i usuwa pliki poprzednich atlasów tego rodzaju stron
+        (oraz plików bez rodzaju w nazwie). Błędy zapisu są pomijane, atlas jest wtedy budowany przy każdym użyciu.
+        """
+        try:
+            os.makedirs(self._cache_dir, exist_ok = True)
+            for i, page in enumerate(pages):
+                pygame.image.save(page, self._file_name(key, alpha, "-%d.png" % i))
+            with open(self._file_name(key, alpha, ".json"), "w") as file:
+                json.dump({"pages": [list(page.get_size()) for page in pages], "placements": placements}, file)
+            current = os.path.basename(self._file_name(key, alpha, ""))
+            others = tuple("atlas-%s-" % name for other, name in ATLAS_GROUPS.items() if other != alpha)
+            for name in os.listdir(self._cache_dir):
+                if name.startswith("atlas-") and not name.startswith(current) and not name.startswith(others):
+                    os.remove(os.path.join(self._cache_dir, name))
+        except (OSError, pygame.error):
+            pass
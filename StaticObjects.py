@@ -13,39 +13,32 @@ class StaticObjects:
         self._tile_size = tile_size
 
     def redraw(self, surface, position, frames):
-        """Zwraca listę krotek (pozycja, ramka animacji) obiektów które trzeba odrysować."""
-        start_sector = screen_to_world(position) / SECTOR_SIZE
-        start_sector.x = floor(start_sector.x)
-        start_sector.y = floor(start_sector.y) - 2
-
-        size_in_pixels = vec2(surface.get_size())
-        size_in_sectors = ((size_in_pixels / self._tile_size) / SECTOR_SIZE + vec2(2, 4)).floor()
-        surface_center = size_in_pixels // 2
+        """
+        Dodaje do listy frames krotki (ramka animacji, głębokość, pozycja) obiektów widocznych na powierzchni.
+        Sektory są wybierane przez visible_spans z prostokąta widoku powiększonego o zasięg duszków (_margins).
+        """
+        size_x, size_y = surface.get_size()
+        margin_x, margin_bottom, margin_top = self._margins()
+        screen_min = (position.x - margin_x, position.y - margin_bottom)
+        screen_max = (position.x + size_x + margin_x, position.y + size_y + margin_top)
 
         offset_x, offset_y = (-position).intcpl()
         basexx, basexy = (BASE_X).intcpl() 
         baseyx, baseyy = (BASE_Y).intcpl()
 
-        for y in reversed(range(size_in_sectors.y)):
-            for x in range(size_in_sectors.x):
-                cursor_x = (start_sector.x + x - y)
-                cursor_y = (start_sector.y + x + y) + 1
-                count = 0
-                while count < 2:
-                    if cursor_x >= 0 and cursor_y >= 0 and cursor_x < self._size.x and cursor_y < self._size.y:
-                        sector = self._sectors[cursor_y][cursor_x]
-                        for object in sector:
-                            frame = object[2].get_n_frame(object[1])
-                            frame_size = vec2(frame[0].get_size()) // 2
-                            depth = size_in_pixels.y - basexy * object[0].x - baseyy * object[0].y - offset_y
-                            dest_x = int(basexx * object[0].x + baseyx * object[0].y + offset_x - frame_size.x)
-                            dest_y = int(depth - object[2].get_offset())
-                            frame_center = vec2(dest_x + frame_size.x, dest_y + frame_size.y)
-                            delta = (frame_center - surface_center).abs()
-                            if delta.x < (frame_size.x + surface_center.x) or delta.y < (frame_size.y + surface_center.y):
-                                frames.append((frame, depth, (dest_x, dest_y)))
-                    cursor_y -= 1
-                    count += 1
+        sectors = self._sectors
+        for y, first_x, last_x in visible_spans(screen_min, screen_max, self._size, SECTOR_SIZE):
+            row = sectors[y]
+            for x in range(first_x, last_x):
+                for object in row[x]:
+                    object_position, sprite = object[0], object[2]
+                    frame = sprite.get_n_frame(object[1])
+                    frame_width, frame_height = sprite.get_frame_size().intcpl()
+                    depth = size_y - basexy * object_position.x - baseyy * object_position.y - offset_y
+                    dest_x = int(basexx * object_position.x + baseyx * object_position.y + offset_x - frame_width // 2)
+                    dest_y = int(depth - sprite.get_offset())
+                    if dest_x < size_x and dest_x + frame_width > 0 and dest_y < size_y and dest_y + frame_height > 0:
+                        frames.append((frame, depth, (dest_x, dest_y)))
 
     def add_objects(self, position, size, sprite, radius, number = 0xffffffff):
         """Dodaje obiekty do kolekcji."""
@@ -110,6 +103,19 @@ class StaticObjects:
         """Zwraca rozmiar kolekcji."""
         return self._size
 
+    def _margins(self):
+        """
+        Zwraca o ile pikseli duszki obiektów mogą wystawać poza punkt obiektu na ekranie: w poziomie,
+        w dół i w górę (w przestrzeni ekranu, w której oś y jest skierowana w górę).
+        """
+        margin_x, margin_bottom, margin_top = 0, 0, 0
+        for sprite in self._sprites:
+            frame_size = sprite.get_frame_size()
+            margin_x = max(margin_x, frame_size.x)
+            margin_bottom = max(margin_bottom, sprite.get_offset())
+            margin_top = max(margin_top, frame_size.y - sprite.get_offset())
+        return margin_x, margin_bottom, margin_top
+
     def _check(self, position, radius, sprite):
         first = vec2(int(position.x - radius), int(position.y - radius)) // SECTOR_SIZE
         last = vec2(int(position.x + radius) + 1, int(position.y + radius) + 1) // SECTOR_SIZE
@@ -1,85 +1,223 @@
 ﻿from TileSprite import *
+from ChunkCache import *
+import numpy
 
 class TerrainGrid:
     EMPTY_FIELD = -1
     BLEND_MASKS = load_blen_mask_set(TILE_SIZE)
     RED_TINT_MASK = create_color_mask(TILE_SIZE, (255, 0, 0, 128))
+    FIELDS = [(-1, +1, 1), (-1, 0, 1|2|4), (-1, -1, 4), (0, -1, 4|8|16), (+1, -1, 16), (+1, 0, 16|32|64), (+1, +1, 64), (0, +1, 1|64|128)]
+    """Sąsiedzi kafla (przesunięcie x, przesunięcie y, bity maski przejścia z BLEND_MASKS), w kolejności w jakiej są sprawdzani."""
+
+    CHUNK_SIZE = 8
+    """Bok fragmentu terenu (w kaflach), który jest renderowany do jednej powierzchni w pamięci podręcznej."""
+    CHUNK_MEMORY_BUDGET = 48 * 1024 * 1024
+    """
+    Najmniejszy budżet pamięci (w bajtach) na powierzchnie fragmentów terenu. Jest zwiększany do dwukrotności rozmiaru fragmentów
+    widocznych na powierzchni, aby przy ruchu widoku i odrysowywaniu jej części (ScrollBuffer) nie usuwać fragmentów potrzebnych w kolejnej klatce.
+    """
 
     def __init__(self, tile_size = TILE_SIZE):
-        self._auxiliary = pygame.Surface(tile_size.intcpl(), SRCALPHA)
+        self._cursor = vec2()
+        self._blends = {}
+        self._blend_hits = 0
+        self._blend_misses = 0
         self._draw_flags = None
-        self._counter = -1
+        self._chunks = ChunkCache(TerrainGrid.CHUNK_MEMORY_BUDGET)
+        self._revision = 0
+        self._animation_frames = {}
         self._grid_size = vec2(0, 0)
         self._tile_size = tile_size
         self._fields = []
-        self._counters = []
+        self._walkable = bytearray()
+        self._listeners = []
 
-    def redraw(self, surface, position, time, draw_flags):
-        """Odrysowuje teren."""
-        self._counter += 1
+    def redraw(self, surface, position, time, draw_flags, rects = None):
+        """
+        Odrysowuje teren. Widoczne fragmenty CHUNK_SIZE x CHUNK_SIZE kafli (z przejściami i ewentualnym zaznaczeniem
+        nieosiągalnych kafli) są kopiowane z pamięci podręcznej, do której trafiają przy pierwszym użyciu lub po zmianie.
+        Kafle animowane i kafle z animowanymi przejściami nie są zapisywane we fragmentach, są rysowane na nich co klatkę.
+        Fragmenty są wybierane przez visible_spans, obraz fragmentu w świecie (kwadrat kafli) pokrywa się z jego nieprzezroczystymi pikselami.
+        Rysowane są tylko fragmenty przecinające obszar przycięcia powierzchni (Surface.get_clip).
+        Jeśli podana jest lista rects, dopisywane są do niej prostokąty (pygame.Rect) obejmujące kafle animowane,
+        których klatka animacji zmieniła się od poprzedniego wywołania. Wszystko jest rysowane jednym wywołaniem Surface.blits.
+        """
+        blits = []
+        animation_frames = {}
+        for chunk, dest_x, dest_y in self._visible_chunks(surface, position, draw_flags):
+            blits.append((chunk[0], (dest_x, dest_y)))
+            self._animated_blits(blits, chunk, dest_x, dest_y, time, draw_flags, rects, animation_frames)
+        self._animation_frames = animation_frames
+        surface.blits(blits, 0)
 
-        shifted = vec2(int(position.x), int(position.y) - floor(self._tile_size.y * 0.5))
+    def redraw_static(self, surface, position, draw_flags):
+        """
+        Odrysowuje tylko nieruchomą część terenu, czyli same fragmenty bez kafli animowanych. Razem z redraw_animated
+        daje ten sam obraz co redraw, ale może być zapamiętana na dłużej (np. w ScrollBuffer).
+        """
+        surface.blits([(chunk[0], (dest_x, dest_y)) for chunk, dest_x, dest_y in self._visible_chunks(surface, position, draw_flags)], 0)
 
-        start_tile = screen_to_world(shifted)
-        start_tile.x = floor(start_tile.x) - 1
-        start_tile.y = floor(start_tile.y) + 3
-        surface_size = vec2(surface.get_size())
+    def redraw_animated(self, surface, position, time, draw_flags, rects = None):
+        """Odrysowuje tylko kafle animowane, na terenie narysowanym wcześniej przez redraw_static. Parametr rects jak w redraw."""
+        blits = []
+        animation_frames = {}
+        for chunk, dest_x, dest_y in self._visible_chunks(surface, position, draw_flags):
+            self._animated_blits(blits, chunk, dest_x, dest_y, time, draw_flags, rects, animation_frames)
+        self._animation_frames = animation_frames
+        surface.blits(blits, 0)
 
-        width = int(surface_size.x / self._tile_size.x) - 2
-        height = int(surface_size.y / self._tile_size.y) - 3
+    def _visible_chunks(self, surface, position, draw_flags):
+        """
+        Zwraca listę krotek (fragment, x, y) fragmentów przecinających obszar przycięcia powierzchni wraz z ich pozycjami na niej.
+        Brakujące i unieważnione fragmenty są renderowane. Zmiana draw_flags unieważnia wszystkie fragmenty.
+        Widoczne fragmenty są przypinane w pamięci podręcznej, więc renderowanie kolejnych nie usuwa tych, które są jeszcze potrzebne,
+        a budżet pamięci jest zwiększany do dwukrotności ich rozmiaru (CHUNK_MEMORY_BUDGET).
+        """
+        if self._draw_flags != draw_flags:
+            self._chunks.invalidate_all()
+            self._draw_flags = draw_flags
 
-        start_tile_x, start_tile_y = start_tile.intcpl()
-        viewport_size_x, viewport_size_y = surface_size.intcpl()
-        offset_x, offset_y = (-shifted).intcpl()
+        size = TerrainGrid.CHUNK_SIZE
+        viewport_size_y = surface.get_height()
+        clip = surface.get_clip()
+        shift_x = int(position.x)
+        shift_y = int(position.y) - floor(self._tile_size.y * 0.5)
         basex_x, basex_y = BASE_X.intcpl()
         basey_x, basey_y = BASE_Y.intcpl()
+        chunk_width, chunk_height, chunk_left, chunk_top = self._chunk_geometry()
 
-        auxiliary = self._auxiliary
-        grid_masks = TerrainGrid.BLEND_MASKS
-        blit = pygame.Surface.blit
-        frame_number = self._counter
-        if self._draw_flags != draw_flags:
-            frame_number = self._counter + 1
-        self._draw_flags = draw_flags
+        chunks_size = (self._grid_size.x + size - 1) // size, (self._grid_size.y + size - 1) // size
+        screen_min = position.x + clip.left, position.y + viewport_size_y - clip.bottom
+        screen_max = position.x + clip.right, position.y + viewport_size_y - clip.top
 
-        for y in range(height):
-            for x in range(width):
-                cursor_x = start_tile_x + x - y
-                cursor_y = start_tile_y + x + y
-                if cursor_x >= 0 and cursor_y >= 0 and cursor_x < self._grid_size.x and cursor_y < self._grid_size.y:
-                    game_frame = self._counters[cursor_y][cursor_x]
-                    primary, adjacents, flags = self._fields[cursor_y][cursor_x]
-                    self._counters[cursor_y][cursor_x] = frame_number
-                    if game_frame + 1 != frame_number or primary.is_animated():
-                        dest_x = basex_x * cursor_x + basey_x * cursor_y + offset_x
-                        dest_y = viewport_size_y - basex_y * cursor_x - basey_y * cursor_y - offset_y
-                        primary_tile = primary.get_frame(vec2(cursor_x, cursor_y), time)
-                        blit(surface, primary_tile, (dest_x, dest_y))
-                        for n in adjacents:
-                            secondary_tile = n[0].get_frame(vec2(cursor_x, cursor_y), time)
-                            blit(auxiliary, secondary_tile, (0, 0))
-                            blit(auxiliary, grid_masks[n[1]], (0, 0), None, BLEND_RGBA_MULT)
-                            blit(surface, auxiliary, (dest_x, dest_y))
-                        if draw_flags and flags:
-                            blit(surface, TerrainGrid.RED_TINT_MASK, (dest_x, dest_y))
-
-                cursor_y += 1
-                if cursor_x >= 0 and cursor_y >= 0 and cursor_x < self._grid_size.x and cursor_y < self._grid_size.y:
-                    game_frame = self._counters[cursor_y][cursor_x]
-                    primary, adjacents, flags = self._fields[cursor_y][cursor_x]
-                    self._counters[cursor_y][cursor_x] = frame_number
-                    if game_frame + 1 != frame_number or primary.is_animated():
-                        dest_x = basex_x * cursor_x + basey_x * cursor_y + offset_x
-                        dest_y = viewport_size_y - basex_y * cursor_x - basey_y * cursor_y - offset_y
-                        primary_tile = primary.get_frame(vec2(cursor_x, cursor_y), time)
-                        blit(surface, primary_tile, (dest_x, dest_y))
-                        for n in adjacents:
-                            secondary_tile = n[0].get_frame(vec2(cursor_x, cursor_y), time)
-                            blit(auxiliary, secondary_tile, (0, 0))
-                            blit(auxiliary, grid_masks[n[1]], (0, 0), None, BLEND_RGBA_MULT)
-                            blit(surface, auxiliary, (dest_x, dest_y))
-                        if draw_flags and flags:
-                            blit(surface, TerrainGrid.RED_TINT_MASK, (dest_x, dest_y))
+        result = []
+        chunks = self._chunks
+        spans = visible_spans(screen_min, screen_max, chunks_size, size)
+        chunks.set_pinned((chunk_x, chunk_y) for chunk_y, first_x, last_x in spans for chunk_x in range(first_x, last_x))
+        chunk_bytes = chunk_width * chunk_height * 4
+        chunks.reserve(2 * chunk_bytes * sum(last_x - first_x for chunk_y, first_x, last_x in spans))
+        for chunk_y, first_x, last_x in spans:
+            for chunk_x in range(first_x, last_x):
+                tile_x, tile_y = chunk_x * size, chunk_y * size
+                key = chunk_x, chunk_y
+                entry = chunks.get(key)
+                if entry == None or entry[1]:
+                    chunk = self._render_chunk(chunk_x, chunk_y, draw_flags, None if entry == None else entry[0][0])
+                    chunks.put(key, chunk, chunk_width * chunk_height * chunk[0].get_bytesize())
+                else:
+                    chunk = entry[0]
+                result.append((chunk, basex_x * tile_x + basey_x * tile_y - shift_x - chunk_left,
+                    viewport_size_y - basex_y * tile_x - basey_y * tile_y + shift_y - chunk_top))
+        return result
+
+    def _animated_blits(self, blits, chunk, dest_x, dest_y, time, draw_flags, rects, animation_frames):
+        """
+        Dopisuje do listy blits kafle animowane fragmentu chunk narysowanego w punkcie (dest_x, dest_y). Jeśli podana jest lista rects,
+        dopisuje do niej prostokąt fragmentu, gdy klatka któregoś z jego animowanych duszków zmieniła się od poprzedniej klatki
+        (klatki duszków bieżącej klatki są zbierane w słowniku animation_frames).
+        """
+        for x, y, offset_x, offset_y in chunk[1]:
+            self._tile_blits(blits, x, y, dest_x + offset_x, dest_y + offset_y, time, draw_flags)
+        if rects != None and chunk[2] != None:
+            for sprite in chunk[3]:
+                index = animation_frames.get(sprite)
+                if index == None:
+                    index = animation_frames[sprite] = sprite.get_frame_index(time)
+                if index != self._animation_frames.get(sprite):
+                    rects.append(chunk[2].move(dest_x, dest_y))
+                    break
+
+    def get_revision(self):
+        """Zwraca licznik zmian siatki, zwiększany przez każdą zmianę wyglądu terenu (set_tile, set_tiles, set_flags, set_size)."""
+        return self._revision
+
+    def get_chunk_cache(self):
+        """Zwraca pamięć podręczną fragmentów terenu (ChunkCache)."""
+        return self._chunks
+
+    def _chunk_geometry(self):
+        """Zwraca szerokość i wysokość powierzchni fragmentu oraz położenie na niej kafla (0, 0) fragmentu."""
+        span = TerrainGrid.CHUNK_SIZE - 1
+        width = span * (abs(BASE_X.x) + abs(BASE_Y.x)) + self._tile_size.x
+        height = span * (abs(BASE_X.y) + abs(BASE_Y.y)) + self._tile_size.y
+        left = -span * (min(BASE_X.x, 0) + min(BASE_Y.x, 0))
+        top = span * (max(BASE_X.y, 0) + max(BASE_Y.y, 0))
+        return int(width), int(height), int(left), int(top)
+
+    def _render_chunk(self, chunk_x, chunk_y, draw_flags, surface = None):
+        """
+        Renderuje nieanimowane kafle fragmentu (chunk_x, chunk_y) na powierzchnię surface (nową, jeśli nie jest podana).
+        Zwraca krotkę (powierzchnia, lista kafli animowanych, prostokąt obejmujący kafle animowane lub None, lista animowanych
+        duszków tych kafli), kafle animowane opisane są krotkami (x, y, przesunięcie x, przesunięcie y).
+        """
+        size = TerrainGrid.CHUNK_SIZE
+        width, height, left, top = self._chunk_geometry()
+        if surface == None:
+            surface = pygame.Surface((width, height), SRCALPHA)
+        surface.fill((0, 0, 0, 0))
+        basex_x, basex_y = BASE_X.intcpl()
+        basey_x, basey_y = BASE_Y.intcpl()
+        animated, sprites, blits = [], [], []
+        for y in range(chunk_y * size, min(chunk_y * size + size, self._grid_size.y)):
+            row = self._fields[y]
+            for x in range(chunk_x * size, min(chunk_x * size + size, self._grid_size.x)):
+                local_x, local_y = x - chunk_x * size, y - chunk_y * size
+                offset_x = basex_x * local_x + basey_x * local_y + left
+                offset_y = top - basex_y * local_x - basey_y * local_y
+                primary, adjacents, flags = row[x]
+                tile_sprites = [sprite for sprite in [primary] + [n[0] for n in adjacents] if sprite.is_animated()]
+                if tile_sprites != []:
+                    animated.append((x, y, offset_x, offset_y))
+                    sprites += [sprite for sprite in tile_sprites if sprite not in sprites]
+                else:
+                    self._tile_blits(blits, x, y, offset_x, offset_y, 0.0, draw_flags)
+        surface.blits(blits, 0)
+        bounds = None
+        if animated != []:
+            tiles = [pygame.Rect(tile[2:4] + self._tile_size.intcpl()) for tile in animated]
+            bounds = tiles[0].unionall(tiles[1:])
+        return surface, animated, bounds, sprites
+
+    def _tile_blits(self, blits, x, y, dest_x, dest_y, time, draw_flags):
+        """Dopisuje do listy blits (w formacie Surface.blits) kafel (x, y) wraz z przejściami, rysowany w punkcie (dest_x, dest_y)."""
+        cursor = self._cursor.set(x, y)
+        primary, adjacents, flags = self._fields[y][x]
+        dest = dest_x, dest_y
+        blits.append((primary.get_frame(cursor, time), dest))
+        for n in adjacents:
+            blits.append((self._get_blend(n[0].get_frame(cursor, time), n[1]), dest))
+        if draw_flags and flags:
+            blits.append((TerrainGrid.RED_TINT_MASK, dest))
+
+    def _get_blend(self, frame, mask):
+        """
+        Zwraca przejście, czyli ramkę kafla sąsiada przemnożoną przez maskę mask z BLEND_MASKS. Przejścia są tworzone
+        przy pierwszym użyciu i zapamiętywane. Ramka wyznacza duszka sąsiada, komórkę wariantu i klatkę animacji.
+        """
+        key = frame, mask
+        blend = self._blends.get(key)
+        if blend == None:
+            self._blend_misses += 1
+            blend = frame.copy()
+            blend.blit(TerrainGrid.BLEND_MASKS[mask], (0, 0), None, BLEND_RGBA_MULT)
+            self._blends[key] = blend
+        else:
+            self._blend_hits += 1
+        return blend
+
+    def get_blend_statistics(self):
+        """Zwraca słownik z liczbą zapamiętanych przejść, ich rozmiarem w bajtach, liczbą trafień i chybień oraz odsetkiem trafień."""
+        requests = self._blend_hits + self._blend_misses
+        return {
+            "size" : len(self._blends),
+            "bytes" : sum(blend.get_width() * blend.get_height() * blend.get_bytesize() for blend in self._blends.values()),
+            "hits" : self._blend_hits,
+            "misses" : self._blend_misses,
+            "hit_rate" : self._blend_hits / requests if requests else 0.0 }
+
+    def _invalidate(self, x, y):
+        """Oznacza fragment zawierający kafel (x, y) jako wymagający ponownego odrysowania."""
+        self._chunks.invalidate((x // TerrainGrid.CHUNK_SIZE, y // TerrainGrid.CHUNK_SIZE))
 
     def set_tile(self, position, tile_sprite):
         """Ustawia sprite kafla."""
@@ -88,21 +226,66 @@ class TerrainGrid:
         for x in range(position.x - 1, position.x + 2):
             for y in range(position.y - 1, position.y + 2):
                 self._update(x, y)
+                self._invalidate(x, y)
+        self._revision += 1
                 
+    def set_tiles(self, sprites, indices, flags):
+        """
+        Ustawia naraz sprite'y i flagi wszystkich kafli siatki. indices (indeksy do listy sprites) i flags to płaskie sekwencje
+        o długości szerokość * wysokość, zapisane wiersz po wierszu. Przejścia pomiędzy kaflami są liczone raz, dla całej siatki naraz.
+        Nie powiadamia słuchaczy, służy do budowania siatki przed przekazaniem jej do środowiska.
+        """
+        width, height = self._grid_size.x, self._grid_size.y
+        indices = numpy.asarray(indices, dtype = numpy.intp).reshape(height, width)
+        blocked = numpy.asarray(flags, dtype = bool).reshape(height, width)
+        walkable = numpy.zeros((height + 2, width + 2), dtype = numpy.uint8)
+        walkable[1:-1, 1:-1] = ~blocked
+        self._walkable = bytearray(walkable.tobytes())
+        blocked = blocked.tolist()
+        index_rows = indices.tolist()
+        for y in range(height):
+            row, flag_row, index_row = self._fields[y], blocked[y], index_rows[y]
+            for x in range(width):
+                row[x] = sprites[index_row[x]], row[x][1], flag_row[x]
+        self._chunks.clear()
+        self._revision += 1
+        self._update_all(sprites, indices)
+
     def get_tile(self, position):
         """Zwraca sprite kafla."""
         return self._fields[position.y][position.x][0]
 
     def set_flags(self, position, flags):
         """Ustawia flagi kafla, to znaczy czy jest osiągalny przez jednostki."""
-        tile, adjacents, __ = self._fields[position.y][position.x]
+        tile, adjacents, old_flags = self._fields[position.y][position.x]
         self._fields[position.y][position.x] = tile, adjacents, flags
-        self._counters[position.y][position.x] = 0
+        self._walkable[(position.y + 1) * (self._grid_size.x + 2) + position.x + 1] = 0 if flags else 1
+        if bool(old_flags) != bool(flags):
+            self._invalidate(position.x, position.y)
+            self._revision += 1
+            for listener in self._listeners:
+                listener(position, flags)
+
+    def add_listener(self, listener):
+        """Dodaje funkcję wywoływaną z argumentami (pozycja, flagi) gdy zmieni się osiągalność kafla."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Usuwa funkcję dodaną przez add_listener."""
+        self._listeners.remove(listener)
 
     def get_flags(self, position):
         """Zwraca flagi kafla, to znaczy czy jest osiągalny przez jednostki."""
         return self._fields[position.y][position.x][2]
 
+    def get_walkability(self):
+        """
+        Zwraca mapę osiągalności kafli i jej szerokość (bytearray, stride). Jeden bajt na kafel, 1 oznacza kafel osiągalny.
+        Mapa otoczona jest ramką nieosiągalnych kafli o szerokości 1, kafel (x, y) ma indeks (y + 1) * stride + x + 1.
+        Mapa jest aktualizowana na bieżąco przez set_flags.
+        """
+        return self._walkable, self._grid_size.x + 2
+
     def get_tile_size(self):
         """Zwraca rozmiar kafli."""
         return self._tile_size
@@ -111,17 +294,20 @@ class TerrainGrid:
         """Zmienia rozmiar siatki terenu, zachowując poprzednią zawartość."""
         empty = TileSprite("<empty>")
         fields = [[(empty, [], False) for x in range(size.x)] for y in range(size.y)]
-        counters = [[0 for x in range(size.x)] for y in range(size.y)]
         for y in range(min(size.y, self._grid_size.y)):
             for x in range(min(size.x, self._grid_size.x)):
                 fields[y][x] = self._fields[y][x]
         self._fields = fields
-        self._counters = counters
         self._grid_size = size
-        self._counter = -1
+        self._walkable = bytearray((size.x + 2) * (size.y + 2))
         for y in range(size.y):
+            row = (y + 1) * (size.x + 2) + 1
             for x in range(size.x):
-                self._update(x, y)
+                if not fields[y][x][2]:
+                    self._walkable[row + x] = 1
+        self._chunks.clear()
+        self._revision += 1
+        self._update_all()
 
     def get_size(self):
         """Zwraca rozmiar siatki terenu."""
@@ -140,7 +326,7 @@ class TerrainGrid:
             else:
                 return tile.get_priority()
 
-        FIELDS = [(-1, +1, 1), (-1, 0, 1|2|4), (-1, -1, 4), (0, -1, 4|8|16), (+1, -1, 16), (+1, 0, 16|32|64), (+1, +1, 64), (0, +1, 1|64|128)]
+        FIELDS = TerrainGrid.FIELDS
         if 0 < x and x < (self._grid_size.x - 1) and 0 < y and y < (self._grid_size.y - 1):
             tile, __, collision = self._fields[y][x]
             adjacents = dict()
@@ -152,4 +338,57 @@ class TerrainGrid:
             adjacents = [x for x in adjacents.items() if (priority(x[0]) > tile_priority)]
             adjacents.sort(key = lambda x: priority(x[0]))
             self._fields[y][x] = tile, adjacents, collision
-            self._counters[y][x] = 0
+
+    def _update_all(self, sprites = None, indices = None):
+        """
+        Liczy przejścia wszystkich wewnętrznych kafli naraz, z takim samym wynikiem jak _update wywołane dla każdego z nich.
+        sprites i indices (tablica wysokość x szerokość indeksów do sprites) opisują zawartość siatki, jeśli nie są podane
+        są odtwarzane z pól siatki.
+        """
+        width, height = self._grid_size.x, self._grid_size.y
+        if width < 3 or height < 3:
+            return
+        if sprites == None:
+            sprites, numbers, rows = [], {}, []
+            for y in range(height):
+                row = []
+                for field in self._fields[y]:
+                    number = numbers.get(id(field[0]))
+                    if number == None:
+                        number = numbers[id(field[0])] = len(sprites)
+                        sprites.append(field[0])
+                    row.append(number)
+                rows.append(row)
+            indices = numpy.array(rows, dtype = numpy.intp)
+        else:
+            # kafle porównywane są według tożsamości, więc ten sam obiekt musi mieć jeden indeks
+            first = {}
+            canonical = numpy.array([first.setdefault(id(sprite), i) for i, sprite in enumerate(sprites)], dtype = numpy.intp)
+            indices = canonical[indices]
+
+        priorities = numpy.array([0 if sprite == None else sprite.get_priority() for sprite in sprites])
+        center = indices[1:-1, 1:-1]
+        center_priority = priorities[center]
+        neighbours = [indices[1 + dy:height - 1 + dy, 1 + dx:width - 1 + dx] for dx, dy, mask in TerrainGrid.FIELDS]
+        present = numpy.unique(indices)
+        masks = numpy.zeros((len(present),) + center.shape, dtype = numpy.int32)
+        order = numpy.full((len(present),) + center.shape, len(TerrainGrid.FIELDS), dtype = numpy.int8)
+        for i, sprite in enumerate(present.tolist()):
+            for k in reversed(range(len(TerrainGrid.FIELDS))):
+                equal = neighbours[k] == sprite
+                masks[i][equal] |= TerrainGrid.FIELDS[k][2]
+                order[i][equal] = k
+            masks[i][(center == sprite) | (center_priority >= priorities[sprite])] = 0
+
+        ys, xs = numpy.nonzero(masks.any(axis = 0))
+        present = present.tolist()
+        present_priorities = priorities[present].tolist()
+        for y in range(1, height - 1):
+            row = self._fields[y]
+            for x in range(1, width - 1):
+                if row[x][1] != []:
+                    row[x] = row[x][0], [], row[x][2]
+        for y, x, tile_masks, tile_order in zip(ys.tolist(), xs.tolist(), masks[:, ys, xs].T.tolist(), order[:, ys, xs].T.tolist()):
+            entries = sorted((present_priorities[i], tile_order[i], i) for i in range(len(present)) if tile_masks[i])
+            tile, __, collision = self._fields[y + 1][x + 1]
+            self._fields[y + 1][x + 1] = tile, [(sprites[present[i]], tile_masks[i]) for __, __, i in entries], collision
@@ -10,6 +10,7 @@ class TileSprite:
             self._time = 1
             self._priority = 0
             self._frames = [[[create_color_mask(TILE_SIZE, (255, 255, 0, 255))]]]
+            self._surface = None
             self._file_name = file_name
             self._icon = None
         else:
@@ -36,8 +37,34 @@ class TileSprite:
             self._time = frame_time
             self._priority = priority
             self._frames = frames
+            self._surface = surface
             self._file_name = file_name
             self._icon = None
+        prepare_asset(self)
+
+    def convert(self):
+        """
+        Przekształca powierzchnie kafla do formatu ekranu z kanałem alfa (convert_alpha), ramki stają się podpowierzchniami
+        przekształconej powierzchni. Wywoływana przez prepare_asset.
+        """
+        if self._surface == None:
+            self._frames = [[[frame.convert_alpha() for frame in row] for row in rows] for rows in self._frames]
+        else:
+            surface = self._surface.convert_alpha()
+            self._frames = [[[surface.subsurface(frame.get_offset() + frame.get_size()) for frame in row] for row in rows] for rows in self._frames]
+            self._surface = surface
+        self._icon = None
+
+    def get_atlas_regions(self):
+        """Zwraca listę par (powierzchnia, obszar) wszystkich ramek kafla dla SpriteAtlas."""
+        return [(frame, frame.get_rect()) for rows in self._frames for row in rows for frame in row]
+
+    def set_atlas_regions(self, regions):
+        """Zastępuje ramki podpowierzchniami atlasu w kolejności get_atlas_regions."""
+        regions = iter(regions)
+        self._frames = [[[next(regions) for frame in row] for row in rows] for rows in self._frames]
+        self._surface = None
+        self._icon = None
 
     def get_frame(self, position, time):
         """Zwraca odpowiednią ramkę animacji, zależną od pozycji i czasu."""
@@ -46,6 +73,10 @@ class TileSprite:
         y = position.y % self._size.y
         return self._frames[anim_frame][y][x]
 
+    def get_frame_index(self, time):
+        """Zwraca numer klatki animacji w chwili time."""
+        return floor(time / self._time) % len(self._frames)
+
     def get_icon(self, size):
         """Zwraca ikone, czyli powierzchnię wyświetlaną w liście wyboru w edytorze."""
         if self._icon == None or vec2(self._icon.get_size()) != size:
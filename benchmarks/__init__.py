@@ -0,0 +1,25 @@
+﻿"""@package docstring
+Pakiet zawiera skrypty mierzące wydajność gry. Skrypty uruchamia się z katalogu głównego gry, np.:
+python3 -m benchmarks.pathfinding
+Import pakietu inicjalizuje pygame'a z "pustymi" sterownikami SDL, więc okno nie jest tworzone.
+Moduł suite zbiera pomiary głównych ścieżek gry w jeden wynik JSON i porównuje go z wynikiem bazowym:
+python3 -m benchmarks.suite --output baseline.json
+python3 -m benchmarks.suite --baseline baseline.json
+"""
+
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from utilities import *
+
+SCREEN = initialize_pygame(vec2(800, 600), False)
+
+def measure(function, repeat = 1):
+    """Wywołuje funkcję repeat razy, zwraca średni czas wywołania w sekundach."""
+    start = time.perf_counter()
+    for i in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
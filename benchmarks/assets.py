@@ -0,0 +1,71 @@
+﻿"""@package docstring
+Mierzy ponowne wczytanie data/level.dat tak jak przy "NEW GAME" (TxtLevelLoader.load, Environment.load i SpriteAtlas.build),
+gdy duszki poprzedniej rozgrywki jeszcze żyją, z rejestrem ASSETS i z duszkami wczytywanymi zawsze od nowa.
+Sprawdza, że ponowne wczytanie zwraca te same obiekty duszków i tę samą mapę, że zmieniony na dysku plik jest wczytywany od nowa
+i że duszki nieużywane są zwalniane. Wypisuje statystyki rejestru.
+"""
+
+from benchmarks import *
+from benchmarks.levels import describe
+from LevelLoader import *
+from Environment import *
+from SpriteAtlas import *
+import LevelLoader as level_loader
+import gc
+import weakref
+import shutil
+import tempfile
+
+LEVEL_FILE = "data/level.dat"
+REPEAT = 3
+
+def new_game(atlas):
+    """Wczytuje poziom do nowego środowiska i buduje atlas, tak jak Gameplay.new_game. Zwraca loader i środowisko."""
+    loader = TxtLevelLoader()
+    loader.load(LEVEL_FILE)
+    environment = Environment()
+    environment.load(loader)
+    atlas.build(get_assets())
+    return loader, environment
+
+def sprites(loader):
+    """Zwraca listę duszków kafli i obiektów statycznych loadera."""
+    return loader._terrain_grid_sprites + loader._static_object_sprites
+
+def main():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        atlas = SpriteAtlas(cache_dir = cache_dir)
+        first, environment = new_game(atlas)
+        misses = ASSETS.get_statistics()["misses"]
+        restart_time = measure(lambda: new_game(atlas), REPEAT)
+        second, environment = new_game(atlas)
+        assert all(a is b for a, b in zip(sprites(first), sprites(second))), "sprites reloaded"
+        assert describe(first) == describe(second), "levels differ"
+        assert ASSETS.get_statistics()["misses"] == misses, "image decoded again"
+
+        level_loader.load_tile_sprite, level_loader.load_object_sprite = TileSprite, ObjectSprite
+        try:
+            uncached_time = measure(lambda: new_game(SpriteAtlas(cache_dir = cache_dir)), REPEAT)
+        finally:
+            level_loader.load_tile_sprite, level_loader.load_object_sprite = load_tile_sprite, load_object_sprite
+        statistics = ASSETS.get_statistics()
+
+        file_name = os.path.join(cache_dir, "tree.png")
+        shutil.copy(sprites(first)[-1].get_file_name(), file_name)
+        sprite = load_object_sprite(file_name)
+        assert load_object_sprite(file_name) is sprite, "sprite not shared"
+        os.utime(file_name, (0, 0))
+        assert load_object_sprite(file_name) is not sprite, "modified file not reloaded"
+        released = [weakref.ref(sprite) for sprite in sprites(first)]
+        first = second = environment = sprite = None
+        gc.collect()
+        assert all(reference() == None for reference in released), "unused sprites kept alive"
+
+    print("restart: shared %.1f ms, reloaded %.1f ms (speedup %.1f)" % (restart_time * 1000.0, uncached_time * 1000.0,
+        uncached_time / restart_time))
+    print("registry: %d assets, %d hits, %d misses, %.2f MB" % (statistics["assets"], statistics["hits"], statistics["misses"],
+        statistics["bytes"] / 2.0 ** 20))
+    print("equivalence: restarted level shares its sprites and matches the first load")
+
+if __name__ == "__main__":
+    main()
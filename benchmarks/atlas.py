@@ -0,0 +1,103 @@
+﻿"""@package docstring
+Buduje SpriteAtlas ze wszystkich duszków wczytanych razem z data/level.dat (potwory, drzewa, efekty i kafle) w katalogu
+tymczasowym: pierwszy raz pakując ramki i drugi raz z zapisanego atlasu. Wypisuje liczbę stron, pamięć arkuszy i atlasu,
+czasy budowania oraz przepustowość blitów ramek przed i po przepięciu na atlas. Sprawdza, że każda ramka narysowana tak jak
+w DynamicObject.redraw i StaticObjects.redraw oraz klatki Environment.redraw wzdłuż trasy kamery dają te same piksele,
+także w atlasie o małych stronach (SMALL_PAGE_SIZE), na których część ramek się nie mieści, i że katalog atlasu przechowuje
+tylko ostatni atlas każdego rodzaju stron.
+"""
+
+from benchmarks import *
+from benchmarks.suite import camera_path, load_environment
+from ObjectSprite import *
+from TileSprite import *
+from SpriteAtlas import *
+import tempfile
+
+LEVEL_FILE = "data/level.dat"
+TIME_STEP = 0.01
+REPEAT = 3
+BACKGROUND = (40, 80, 120)
+SMALL_PAGE_SIZE = 96
+
+def load_sprites(assets):
+    """Wczytuje od nowa duszki o tych samych plikach co assets."""
+    return [(TileSprite if isinstance(asset, TileSprite) else ObjectSprite)(asset.get_file_name()) for asset in assets]
+
+def sprite_images(sprite):
+    """Zwraca listę obrazów (bajty RGB) ramek duszka narysowanych tak jak w grze na tle BACKGROUND."""
+    images = []
+    if isinstance(sprite, TileSprite):
+        blits = [(frame, (0, 0), None) for frame, area in sprite.get_atlas_regions()]
+        size = TILE_SIZE.intcpl()
+    else:
+        frames = [frame for row in sprite._frames for frame in row]
+        blits = [(frame[0], frame[2].topleft, frame[1]) for frame in frames] + [(frame[0], (0, 0), frame[1]) for frame in frames]
+        size = sprite.get_frame_size().intcpl()
+    target = pygame.Surface(size)
+    for blit in blits:
+        target.fill(BACKGROUND)
+        target.blit(*blit)
+        images.append(pygame.image.tobytes(target, "RGB"))
+    return images
+
+def blit_all(target, sprites):
+    """Rysuje wszystkie ramki duszków w tym samym miejscu celu."""
+    target.blits([(surface, (16, 16), area) for sprite in sprites for surface, area in sprite.get_atlas_regions()], 0)
+
+def environment_frames(environment, path, surface):
+    """Zwraca obrazy (bajty RGB) klatek Environment.redraw wzdłuż trasy kamery."""
+    environment._scroll_buffer.invalidate()
+    images = []
+    for i, position in enumerate(path):
+        environment.redraw(surface, position, i * TIME_STEP, False)
+        images.append(pygame.image.tobytes(surface, "RGB"))
+    return images
+
+def main():
+    environment, loader = load_environment(LEVEL_FILE)
+    surface = pygame.Surface((800, 600))
+    path = camera_path(environment.get_players()[0].get_position())
+    expected_frames = environment_frames(environment, path, surface)
+    assets = sorted(get_assets(), key = lambda asset: asset.get_file_name())
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        sprites = load_sprites(assets)
+        expected = [sprite_images(sprite) for sprite in sprites]
+        target = pygame.Surface((256, 256))
+        blit_all(target, sprites)
+        sheet_time = measure(lambda: blit_all(target, sprites), REPEAT)
+
+        start = time.perf_counter()
+        cold = SpriteAtlas(cache_dir = cache_dir).build(sprites)
+        cold_time = time.perf_counter() - start
+        assert [sprite_images(sprite) for sprite in sprites] == expected, "packed frames differ"
+        blit_all(target, sprites)
+        atlas_time = measure(lambda: blit_all(target, sprites), REPEAT)
+
+        sprites = load_sprites(assets)
+        start = time.perf_counter()
+        cached = SpriteAtlas(cache_dir = cache_dir).build(sprites)
+        cached_time = time.perf_counter() - start
+        assert cached["cached"] and not cold["cached"], "atlas cache not used"
+        assert [sprite_images(sprite) for sprite in sprites] == expected, "cached frames differ"
+
+        sprites = load_sprites(assets)
+        SpriteAtlas(page_size = SMALL_PAGE_SIZE, cache_dir = cache_dir).build(sprites)
+        assert [sprite_images(sprite) for sprite in sprites] == expected, "frames larger than a page differ"
+
+        SpriteAtlas(cache_dir = cache_dir).build(assets)
+        indices = [name for name in os.listdir(cache_dir) if name.endswith(".json")]
+        assert len(indices) == len(ATLAS_GROUPS), "old atlases kept in the cache: %s" % indices
+        errors = sum(a != b for a, b in zip(expected_frames, environment_frames(environment, path, surface)))
+        assert errors == 0, "%d environment frames differ" % errors
+
+    print("sprites %d, frames %d, pages %d" % (cold["sprites"], cold["frames"], cold["pages"]))
+    print("sheets %.2f MB, atlas %.2f MB, saved %.2f MB" % (cold["sheet_bytes"] / 2.0 ** 20, cold["atlas_bytes"] / 2.0 ** 20,
+        cold["saved_bytes"] / 2.0 ** 20))
+    print("build: packed %.1f ms, cached %.1f ms" % (cold_time * 1000.0, cached_time * 1000.0))
+    print("blit: sheets %.2f us, atlas %.2f us per frame" % (sheet_time / cold["frames"] * 1e6, atlas_time / cold["frames"] * 1e6))
+    print("equivalence: atlas frames and environment frames give the same pixels")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+﻿"""@package docstring
+Porównuje rysowanie przejść pomiędzy kaflami trzema blitami przez powierzchnię pomocniczą (ramka sąsiada, mnożenie przez maskę,
+kopiowanie na cel) z jednym blitem przejścia zapamiętanego przez TerrainGrid. Sprawdza, że oba sposoby dają te same piksele
+dla wszystkich przejść data/level.dat, wypisuje liczbę i rozmiar zapamiętanych przejść oraz odsetek trafień podczas przejścia kamery.
+"""
+
+from benchmarks import *
+from LevelLoader import *
+from benchmarks.suite import camera_path, load_environment
+import numpy
+
+LEVEL_FILE = "data/level.dat"
+REPEAT = 3
+TIME_STEP = 0.01
+TOLERANCE = 3
+
+def level_blends(terrain_grid, time = 0.0):
+    """Zwraca listę par (ramka sąsiada, maska) wszystkich przejść siatki w chwili time."""
+    blends = []
+    size = terrain_grid.get_size()
+    for y in range(size.y):
+        for x in range(size.x):
+            for sprite, mask in terrain_grid._fields[y][x][1]:
+                blends.append((sprite.get_frame(vec2(x, y), time), mask))
+    return blends
+
+def draw_legacy(target, auxiliary, blends):
+    """Rysuje przejścia tak jak poprzednia wersja TerrainGrid.redraw."""
+    blit = pygame.Surface.blit
+    for frame, mask in blends:
+        blit(auxiliary, frame, (0, 0))
+        blit(auxiliary, TerrainGrid.BLEND_MASKS[mask], (0, 0), None, BLEND_RGBA_MULT)
+        blit(target, auxiliary, (0, 0))
+
+def draw_cached(target, terrain_grid, blends):
+    """Rysuje przejścia jednym blitem zapamiętanego przejścia."""
+    blit = pygame.Surface.blit
+    get_blend = terrain_grid._get_blend
+    for frame, mask in blends:
+        blit(target, get_blend(frame, mask), (0, 0))
+
+def differences(terrain_grid, blends):
+    """Zwraca liczbę różnych przejść, które na nieprzezroczystym tle różnią się w obu sposobach o więcej niż TOLERANCE."""
+    tile_size = terrain_grid.get_tile_size().intcpl()
+    failures = 0
+    for frame, mask in dict.fromkeys(blends):
+        expected, result = pygame.Surface(tile_size), pygame.Surface(tile_size)
+        expected.fill((40, 80, 120))
+        result.fill((40, 80, 120))
+        auxiliary = pygame.Surface(tile_size, SRCALPHA)
+        auxiliary.fill((0, 0, 0, 0))
+        draw_legacy(expected, auxiliary, [(frame, mask)])
+        draw_cached(result, terrain_grid, [(frame, mask)])
+        difference = numpy.abs(pygame.surfarray.array3d(expected).astype(numpy.int16) - pygame.surfarray.array3d(result))
+        failures += int(difference.max() > TOLERANCE)
+    return failures
+
+def main():
+    environment, loader = load_environment(LEVEL_FILE)
+    terrain_grid = loader.get_terrain_grid()
+    blends = level_blends(terrain_grid)
+    tile_size = terrain_grid.get_tile_size().intcpl()
+    target, auxiliary = pygame.Surface(tile_size), pygame.Surface(tile_size, SRCALPHA)
+
+    legacy_time = measure(lambda: draw_legacy(target, auxiliary, blends), REPEAT)
+    cold_time = measure(lambda: draw_cached(target, terrain_grid, blends))
+    cached_time = measure(lambda: draw_cached(target, terrain_grid, blends), REPEAT)
+    failures = differences(terrain_grid, blends)
+    assert failures == 0, "%d blends differ" % failures
+
+    camera_environment, camera_loader = load_environment(LEVEL_FILE)
+    for i, position in enumerate(camera_path(camera_environment.get_players()[0].get_position())):
+        camera_environment.redraw(SCREEN, position, i * TIME_STEP, False)
+    statistics = camera_loader.get_terrain_grid().get_blend_statistics()
+
+    print("%d blended tiles: 3 blits %.1f ms, cached %.1f ms (speedup %.1f), first pass with compositing %.1f ms" % (len(blends),
+        legacy_time * 1000.0, cached_time * 1000.0, legacy_time / cached_time, cold_time * 1000.0))
+    print("whole level: %d blends, %.1f MiB" % (terrain_grid.get_blend_statistics()["size"], terrain_grid.get_blend_statistics()["bytes"] / 1048576.0))
+    print("camera path: %d blends, %.1f MiB, %d hits, %d misses, hit rate %.1f%%" % (statistics["size"], statistics["bytes"] / 1048576.0,
+        statistics["hits"], statistics["misses"], statistics["hit_rate"] * 100.0))
+    print("equivalence: %d distinct blends match" % len(dict.fromkeys(blends)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+﻿"""@package docstring
+Liczy wywołania blit i blits na klatkę oraz mierzy czas klatki Environment.redraw (teren i duszki) wzdłuż stałej trasy kamery
+w rozdzielczościach 800x600 i 1920x1080. Drogę sprzed grupowania blitów odtwarza powierzchnia PerCallSurface, która każdy
+element sekwencji przekazanej do Surface.blits rysuje osobnym wywołaniem blit. Sprawdza, że obie drogi dają te same piksele.
+"""
+
+from benchmarks import *
+from benchmarks.suite import camera_path, load_environment, run_frames
+
+LEVEL_FILE = "data/level.dat"
+RESOLUTIONS = [(800, 600), (1920, 1080)]
+TIME_STEP = 0.01
+
+class CountingSurface(pygame.Surface):
+    """Powierzchnia licząca wywołania blit i blits."""
+
+    def __init__(self, size):
+        super(CountingSurface, self).__init__(size)
+        self.calls = 0
+
+    def blit(self, *args):
+        self.calls += 1
+        return super(CountingSurface, self).blit(*args)
+
+    def blits(self, sequence, doreturn = 1):
+        self.calls += 1
+        return super(CountingSurface, self).blits(sequence, doreturn)
+
+class PerCallSurface(CountingSurface):
+    """Powierzchnia rysująca każdy element sekwencji blits osobnym wywołaniem blit, tak jak przed grupowaniem."""
+
+    def blits(self, sequence, doreturn = 1):
+        blit = self.blit
+        for item in sequence:
+            blit(*item)
+
+def frames(surface, environment, path):
+    """Odrysowuje środowisko wzdłuż trasy kamery, zwraca średni czas i średnią liczbę wywołań na klatkę."""
+    environment.redraw(surface, path[0], 0.0, False)
+    surface.calls = 0
+    frame_time = run_frames(lambda i, position: environment.redraw(surface, position, i * TIME_STEP, False), path)
+    return frame_time, surface.calls / len(path)
+
+def main():
+    environment, loader = load_environment(LEVEL_FILE)
+    path = camera_path(environment.get_players()[0].get_position())
+    print("%-10s %14s %14s %12s %12s %8s" % ("size", "calls before", "calls after", "before ms", "after ms", "speedup"))
+    for size in RESOLUTIONS:
+        before, after = PerCallSurface(size), CountingSurface(size)
+        for i in (0, len(path) // 2):
+            environment.redraw(before, path[i], i * TIME_STEP, False)
+            environment.redraw(after, path[i], i * TIME_STEP, False)
+            assert pygame.image.tobytes(before, "RGB") == pygame.image.tobytes(after, "RGB"), "pixels differ at %dx%d" % size
+        before_time, before_calls = frames(before, environment, path)
+        after_time, after_calls = frames(after, environment, path)
+        print("%-10s %14.1f %14.1f %12.2f %12.2f %8.2f" % ("%dx%d" % size, before_calls, after_calls, before_time * 1000.0,
+            after_time * 1000.0, before_time / after_time))
+        chunk_cache = loader.get_terrain_grid().get_chunk_cache()
+        print("%-10s chunk cache: %d chunks, %.1f MiB of %.1f MiB" % ("", len(chunk_cache), chunk_cache.get_memory() / 1048576.0,
+            chunk_cache.get_budget() / 1048576.0))
+    print("equivalence: batched and per call blits give the same pixels")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+﻿"""@package docstring
+Porównuje odrysowywanie terenu kafel po kaflu (poprzednia implementacja TerrainGrid.redraw, bez pomijania kafli narysowanych
+w poprzedniej klatce) z odrysowywaniem z pamięci podręcznej fragmentów. Sprawdza, że obie drogi dają ten sam obraz dla data/level.dat,
+także po zmianie kafli i flag, z zaznaczeniem nieosiągalnych kafli i przy budżecie pamięci mniejszym niż liczba widocznych fragmentów.
+Mierzy też czas klatki z pamięcią podręczną w rozdzielczościach RESOLUTIONS (do 4K) i sprawdza, że w żadnej fragment nie jest
+renderowany ponownie (pamięć podręczna nie usuwa fragmentów, które są jeszcze widoczne).
+"""
+
+from benchmarks import *
+from LevelLoader import *
+from benchmarks.suite import camera_path, viewport_position, load_environment, run_frames
+import numpy
+
+LEVEL_FILE = "data/level.dat"
+MARGIN_SIZE = vec2(TILE_SIZE.x * 4, TILE_SIZE.y * 4)
+BACKGROUND_COLOR = (0, 0, 255, 0)
+TIME_STEP = 0.01
+TOLERANCE = 3
+RESOLUTIONS = [(800, 600), (2560, 1440), (3840, 2160)]
+
+def legacy_redraw(terrain_grid, surface, position, time, draw_flags):
+    """Kopia TerrainGrid.redraw sprzed wprowadzenia fragmentów, rysuje wszystkie widoczne kafle."""
+    tile_size = terrain_grid.get_tile_size()
+    shifted = vec2(int(position.x), int(position.y) - floor(tile_size.y * 0.5))
+    start_tile = screen_to_world(shifted)
+    start_tile_x, start_tile_y = floor(start_tile.x) - 1, floor(start_tile.y) + 3
+    surface_size = vec2(surface.get_size())
+    width = int(surface_size.x / tile_size.x) - 2
+    height = int(surface_size.y / tile_size.y) - 3
+    viewport_size_y = surface_size.intcpl()[1]
+    offset_x, offset_y = (-shifted).intcpl()
+    basex_x, basex_y = BASE_X.intcpl()
+    basey_x, basey_y = BASE_Y.intcpl()
+    grid_size = terrain_grid.get_size()
+    auxiliary = pygame.Surface(tile_size.intcpl(), SRCALPHA)
+    blit = pygame.Surface.blit
+    for y in range(height):
+        for x in range(width):
+            for cursor_x, cursor_y in ((start_tile_x + x - y, start_tile_y + x + y), (start_tile_x + x - y, start_tile_y + x + y + 1)):
+                if 0 <= cursor_x < grid_size.x and 0 <= cursor_y < grid_size.y:
+                    primary, adjacents, flags = terrain_grid._fields[cursor_y][cursor_x]
+                    cursor = vec2(cursor_x, cursor_y)
+                    dest_x = basex_x * cursor_x + basey_x * cursor_y + offset_x
+                    dest_y = viewport_size_y - basex_y * cursor_x - basey_y * cursor_y - offset_y
+                    blit(surface, primary.get_frame(cursor, time), (dest_x, dest_y))
+                    for n in adjacents:
+                        blit(auxiliary, n[0].get_frame(cursor, time), (0, 0))
+                        blit(auxiliary, TerrainGrid.BLEND_MASKS[n[1]], (0, 0), None, BLEND_RGBA_MULT)
+                        blit(surface, auxiliary, (dest_x, dest_y))
+                    if draw_flags and flags:
+                        blit(surface, TerrainGrid.RED_TINT_MASK, (dest_x, dest_y))
+
+def render_legacy(terrain_grid, surface, position, time, draw_flags):
+    """Rysuje teren tak jak poprzednia wersja Environment.redraw: do bufora z marginesem, który jest kopiowany na ekran."""
+    buffer = pygame.Surface((vec2(surface.get_size()) + MARGIN_SIZE * 2).intcpl())
+    buffer.fill(BACKGROUND_COLOR)
+    legacy_redraw(terrain_grid, buffer, viewport_position(position, surface) - MARGIN_SIZE, time, draw_flags)
+    surface.blit(buffer, (-MARGIN_SIZE).intcpl())
+
+def render_chunks(terrain_grid, surface, position, time, draw_flags):
+    """Rysuje teren tak jak Environment.redraw."""
+    surface.fill(BACKGROUND_COLOR)
+    terrain_grid.redraw(surface, viewport_position(position, surface), time, draw_flags)
+
+def differences(terrain_grid, position, time, draw_flags = False):
+    """Zwraca liczbę pikseli, które w obu drogach różnią się o więcej niż TOLERANCE."""
+    expected, result = pygame.Surface(SCREEN.get_size()), pygame.Surface(SCREEN.get_size())
+    render_legacy(terrain_grid, expected, position, time, draw_flags)
+    render_chunks(terrain_grid, result, position, time, draw_flags)
+    difference = numpy.abs(pygame.surfarray.array3d(expected).astype(numpy.int16) - pygame.surfarray.array3d(result))
+    return int(numpy.count_nonzero(difference.max(axis = 2) > TOLERANCE))
+
+def check(terrain_grid, path):
+    """Zwraca listę niezgodności obrazu z poprzednią implementacją."""
+    errors = []
+    positions = path[::len(path) // 8]
+    for i, position in enumerate(positions):
+        if differences(terrain_grid, position, i * 0.37):
+            errors.append("frame %d" % i)
+
+    center = positions[0].ifloor()
+    water = [sprite for sprite in {id(terrain_grid.get_tile(vec2(x, y))) : terrain_grid.get_tile(vec2(x, y))
+        for y in range(terrain_grid.get_size().y) for x in range(terrain_grid.get_size().x)}.values() if sprite.is_animated()]
+    grass = terrain_grid.get_tile(center)
+    for offset in range(-3, 4):
+        terrain_grid.set_tile(center + vec2(offset, 2), water[0] if water else grass)
+        terrain_grid.set_tile(center + vec2(2, offset), grass)
+    if differences(terrain_grid, positions[0], 0.5):
+        errors.append("after set_tile")
+    if differences(terrain_grid, positions[0], 0.5, True) or differences(terrain_grid, positions[1], 0.8, True):
+        errors.append("with draw_flags")
+    for offset in range(-3, 4):
+        terrain_grid.set_flags(center + vec2(offset, -offset), not terrain_grid.get_flags(center + vec2(offset, -offset)))
+    if differences(terrain_grid, positions[0], 0.6, True):
+        errors.append("after set_flags")
+
+    chunk_cache = terrain_grid.get_chunk_cache()
+    chunk_cache.set_budget(chunk_cache.get_memory() // max(len(chunk_cache), 1) * 2)
+    if differences(terrain_grid, positions[2], 0.1) or differences(terrain_grid, positions[3], 0.2):
+        errors.append("with a small memory budget")
+    if chunk_cache.get_memory() > chunk_cache.get_budget():
+        errors.append("memory budget exceeded")
+    visible = len(terrain_grid._visible_chunks(SCREEN, viewport_position(positions[3], SCREEN), False))
+    if len(chunk_cache) < visible:
+        errors.append("visible chunks evicted")
+    chunk_cache.set_budget(TerrainGrid.CHUNK_MEMORY_BUDGET)
+    return errors
+
+def resolution_frames(terrain_grid, path, size):
+    """
+    Rysuje teren z pamięcią podręczną (zaczynając od pustej) wzdłuż trasy na powierzchni rozmiaru size. Zwraca średni czas klatki,
+    liczbę fragmentów widocznych w pierwszej klatce, liczbę fragmentów renderowanych ponownie (już wcześniej wyrenderowanych) i liczbę fragmentów w pamięci.
+    """
+    surface = pygame.Surface(size).convert()
+    chunk_cache = terrain_grid.get_chunk_cache()
+    chunk_cache.clear()
+    chunk_cache.set_budget(TerrainGrid.CHUNK_MEMORY_BUDGET)
+    rendered = []
+    render_chunk = terrain_grid._render_chunk
+    def counting_render_chunk(chunk_x, chunk_y, *args):
+        rendered.append((chunk_x, chunk_y))
+        return render_chunk(chunk_x, chunk_y, *args)
+    terrain_grid._render_chunk = counting_render_chunk
+    try:
+        visible = len(terrain_grid._visible_chunks(surface, viewport_position(path[0], surface), False))
+        frame_time = run_frames(lambda i, position: render_chunks(terrain_grid, surface, position, i * TIME_STEP, False), path)
+    finally:
+        del terrain_grid._render_chunk
+    return frame_time, visible, len(rendered) - len(set(rendered)), len(chunk_cache)
+
+def main():
+    environment, loader = load_environment(LEVEL_FILE)
+    terrain_grid = loader.get_terrain_grid()
+    path = camera_path(environment.get_players()[0].get_position())
+
+    legacy = lambda i, position: render_legacy(terrain_grid, SCREEN, position, i * TIME_STEP, False)
+    cached = lambda i, position: render_chunks(terrain_grid, SCREEN, position, i * TIME_STEP, False)
+    def cold(i, position):
+        terrain_grid.get_chunk_cache().clear()
+        render_chunks(terrain_grid, SCREEN, position, i * TIME_STEP, False)
+    legacy_time = run_frames(legacy, path)
+    cold_time = run_frames(cold, path[:10])
+    cached_time = run_frames(cached, path)
+    chunk_cache = terrain_grid.get_chunk_cache()
+    chunks, memory, budget = len(chunk_cache), chunk_cache.get_memory(), chunk_cache.get_budget()
+
+    errors = check(terrain_grid, path)
+    assert errors == [], errors
+    resolutions = [(size, resolution_frames(terrain_grid, path, size)) for size in RESOLUTIONS]
+    assert all(rerendered == 0 for size, (frame_time, visible, rerendered, cached_chunks) in resolutions), resolutions
+
+    print("frame: per tile %.2f ms, chunks %.2f ms (speedup %.1f), chunks rendered every frame %.2f ms" % (legacy_time * 1000.0,
+        cached_time * 1000.0, legacy_time / cached_time, cold_time * 1000.0))
+    print("cache: %d chunks, %.1f MiB of %.1f MiB" % (chunks, memory / 1048576.0, budget / 1048576.0))
+    for (width, height), (frame_time, visible, rerendered, cached_chunks) in resolutions:
+        print("%dx%d: chunks %.2f ms, %d visible chunks, %d in cache, %d rendered again" % (width, height, frame_time * 1000.0,
+            visible, cached_chunks, rerendered))
+    print("equivalence: %s matches the per tile redraw" % LEVEL_FILE)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+﻿"""@package docstring
+Test obciążeniowy wykrywania kolizji obiektów dynamicznych. Na pustej mapie 50x50 umieszcza tłum obiektów
+poruszających się (DynamicObject.move_to) między losowymi punktami oraz strzały, po czym mierzy średni czas
+Environment.update dla siatki kubełków (SpatialHash) i dla przeglądania wszystkich obiektów (jak przed jej wprowadzeniem).
+Sprawdza też, że zapytania siatki (także pierścieniowe, Environment.annulus) nie gubią żadnej kolizji,
+i mierzy czas życia fali (WaveEffect) w tłumie.
+"""
+
+from benchmarks import *
+from Environment import *
+from AIStates import dist
+import random as rng
+
+CROWD_SIZES = [100, 250, 500]
+NUM_FRAMES = 30
+NUM_ARROWS = 20
+NUM_CHECKS = 1000
+NUM_WAVES = 20
+DELTA = 1.0 / 30.0
+SEED = 2014
+
+class BruteForceEnvironment(Environment):
+    """Środowisko zwracające w collidable wszystkie obiekty, niezależnie od pozycji."""
+
+    def collidable(self, position = None, radius = 0.0):
+        return self._dynamic_objects
+
+class Walker(DynamicObject):
+    """Obiekt chodzący między losowymi punktami mapy."""
+
+    def __init__(self, generator, size):
+        super(Walker, self).__init__()
+        self._generator = generator
+        self._size = size
+        self._target = self._random_point()
+        self.hp = 1000.0
+
+    def update(self, delta, current):
+        if self.move_to(self._target, delta):
+            self._target = self._random_point()
+        return False
+
+    def _random_point(self):
+        return vec2(self._generator.uniform(1, self._size.x - 1), self._generator.uniform(1, self._size.y - 1))
+
+def populate(environment, number, seed):
+    """Umieszcza w środowisku number obiektów i NUM_ARROWS strzał."""
+    generator = rng.Random(seed)
+    size = environment._terrain_grid.get_size()
+    for i in range(number):
+        walker = Walker(generator, size)
+        walker.set_position(walker._random_point())
+        walker.set_environment(environment)
+        environment.add_object(walker)
+    for i in range(NUM_ARROWS):
+        arrow = ArrowEffect()
+        arrow.set_position(vec2(generator.uniform(0, size.x), generator.uniform(0, size.y)))
+        arrow.set_direction(rotate2(vec2(0.0, 1.0), generator.random() * pi * 2))
+        arrow.set_environment(environment)
+        environment.add_object(arrow)
+
+def check_queries(environment, seed):
+    """Zwraca liczbę par kolidujących obiektów pominiętych przez zapytania siatki kubełków."""
+    generator = rng.Random(seed)
+    size = environment._terrain_grid.get_size()
+    objects = environment.collidable()
+    missed = 0
+    for i in range(NUM_CHECKS):
+        position = vec2(generator.uniform(0, size.x), generator.uniform(0, size.y))
+        radius = generator.uniform(0.0, 3.0)
+        inner_radius = generator.uniform(0.0, radius)
+        found = set(environment.collidable(position, radius))
+        ring = set(environment.annulus(position, inner_radius, radius))
+        for object in objects:
+            distance = dist(object.get_position(), position)
+            if distance < radius and object not in found:
+                missed += 1
+            if (inner_radius <= distance < radius) != (object in ring):
+                missed += 1
+    return missed
+
+def wave_benchmark(environment, seed):
+    """Zwraca średni czas (w sekundach) pełnego przebiegu fali oraz średnią liczbę trafionych obiektów."""
+    generator = rng.Random(seed)
+    size = environment._terrain_grid.get_size()
+    elapsed, hits = 0.0, 0
+    for i in range(NUM_WAVES):
+        wave = WaveEffect()
+        wave.set_position(vec2(generator.uniform(0, size.x), generator.uniform(0, size.y)))
+        wave.set_environment(environment)
+        def sweep():
+            frame = 0
+            while not wave.update(DELTA, frame * DELTA):
+                frame += 1
+        elapsed += measure(sweep)
+        hits += len(wave._hit)
+    return elapsed / NUM_WAVES, hits / NUM_WAVES
+
+def run(environment_class, number):
+    """Zwraca średni czas klatki w sekundach."""
+    rng.seed(SEED)
+    environment = environment_class()
+    populate(environment, number, SEED)
+    frame = [0]
+    def update():
+        frame[0] += 1
+        environment.update(DELTA, frame[0] * DELTA)
+    return measure(update, NUM_FRAMES), environment
+
+def main():
+    print("%8s %14s %14s %10s %8s" % ("objects", "brute ms", "hash ms", "speedup", "missed"))
+    for number in CROWD_SIZES:
+        brute_time, brute = run(BruteForceEnvironment, number)
+        hash_time, environment = run(Environment, number)
+        missed = check_queries(environment, SEED)
+        print("%8d %14.2f %14.2f %10.1f %8d" % (number, brute_time * 1000.0, hash_time * 1000.0, brute_time / hash_time, missed))
+        assert missed == 0, "spatial hash missed collisions"
+        wave_time, hits = wave_benchmark(environment, SEED)
+        print("%8s %14s %14.2f %10s %8.1f" % ("wave", "", wave_time * 1000.0, "hit:", hits))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+﻿"""@package docstring
+Mierzy przepustowość blitów ramek duszków potworów (data/*/*.png poza katalogiem CACHE_DIR), drzew (data/tree*.png) i kafli terenu wczytanych tak
+jak przed przekształcaniem do formatu ekranu (powierzchnie w formacie pliku) oraz przez ObjectSprite i TileSprite
+(convert z kluczem koloru RLEACCEL, convert_alpha). Ramki z kluczem RLEACCEL są kodowane przy pierwszym blicie na dany cel,
+więc czas jest mierzony po jednym rysowaniu wstępnym. Sprawdza, że obie drogi dają te same piksele.
+"""
+
+from benchmarks import *
+from ObjectSprite import *
+from TileSprite import *
+import glob
+
+MONSTER_FILES = sorted(file_name for file_name in glob.glob("data/*/*.png")
+    if os.path.normpath(os.path.dirname(file_name)) != os.path.normpath(CACHE_DIR))
+TREE_FILES = sorted(glob.glob("data/tree*.png"))
+TILE_FILES = ["data/beach.png", "data/flowers0.png", "data/flowers1.png", "data/grass.png", "data/snow0.png",
+    "data/snow1.png", "data/swamp.png", "data/water.png"]
+REPEAT = 3
+BACKGROUND = (40, 80, 120)
+
+def legacy_object_frames(file_name):
+    """Zwraca listę ramek (powierzchnia, obszar) duszka wczytanego tak jak poprzednia wersja ObjectSprite."""
+    surface = pygame.image.load(file_name)
+    frame_size = vec2()
+    frame_size.x, frame_size.y, _, _ = surface.get_at((0, 0))
+    color_key = surface.get_at((1, 0))
+    surface.set_at((0, 0), color_key)
+    surface.set_at((0, 1), color_key)
+    surface.set_colorkey(color_key)
+    size = vec2(surface.get_size()) // frame_size
+    frames = [surface.subsurface((x * frame_size.x, y * frame_size.y) + frame_size.intcpl()) for y in range(size.y) for x in range(size.x)]
+    return [(frame, frame.get_bounding_rect()) for frame in frames]
+
+def object_frames(file_name):
+    """Zwraca listę ramek (powierzchnia, obszar) duszka wczytanego przez ObjectSprite."""
+    return [frame[:2] for row in ObjectSprite(file_name)._frames for frame in row]
+
+def legacy_tile_frames(file_name):
+    """Zwraca listę ramek (powierzchnia, obszar) kafla wczytanego tak jak poprzednia wersja TileSprite."""
+    surface = pygame.image.load(file_name)
+    surface.set_at((0, 0), surface.get_at((0, 1)))
+    return [(surface.subsurface(frame.get_offset() + frame.get_size()), None) for frame, area in tile_frames(file_name)]
+
+def tile_frames(file_name):
+    """Zwraca listę ramek (powierzchnia, obszar) kafla wczytanego przez TileSprite."""
+    return [(frame, None) for rows in TileSprite(file_name)._frames for row in rows for frame in row]
+
+def blit_all(target, frames):
+    """Rysuje wszystkie ramki w tym samym miejscu celu."""
+    target.blits([(frame, (16, 16), area) for frame, area in frames], 0)
+
+def differences(legacy, frames):
+    """Zwraca liczbę ramek, które narysowane na tle dają inne piksele w obu drogach."""
+    expected, result = pygame.Surface((256, 256)), pygame.Surface((256, 256))
+    failures = 0
+    for old, new in zip(legacy, frames):
+        expected.fill(BACKGROUND)
+        result.fill(BACKGROUND)
+        blit_all(expected, [old])
+        blit_all(result, [new])
+        failures += pygame.image.tobytes(expected, "RGB") != pygame.image.tobytes(result, "RGB")
+    return failures
+
+def main():
+    target = pygame.Surface((256, 256))
+    print("%-8s %8s %12s %12s %8s" % ("set", "frames", "legacy us", "prepared us", "speedup"))
+    for name, files, legacy_load, load in (("monsters", MONSTER_FILES, legacy_object_frames, object_frames),
+            ("trees", TREE_FILES, legacy_object_frames, object_frames), ("tiles", TILE_FILES, legacy_tile_frames, tile_frames)):
+        legacy = [frame for file_name in files for frame in legacy_load(file_name)]
+        frames = [frame for file_name in files for frame in load(file_name)]
+        assert len(legacy) == len(frames), "%s frame counts differ" % name
+        failures = differences(legacy, frames)
+        assert failures == 0, "%d %s frames differ" % (failures, name)
+        # pierwszy blit na nowy cel koduje ramki RLE, w grze ramki są rysowane zawsze na tę samą powierzchnię
+        blit_all(target, legacy)
+        blit_all(target, frames)
+        legacy_time = measure(lambda: blit_all(target, legacy), REPEAT)
+        prepared_time = measure(lambda: blit_all(target, frames), REPEAT)
+        print("%-8s %8d %12.2f %12.2f %8.2f" % (name, len(frames), legacy_time / len(frames) * 1e6, prepared_time / len(frames) * 1e6,
+            legacy_time / prepared_time))
+    print("equivalence: prepared frames give the same pixels")
+
+if __name__ == "__main__":
+    main()
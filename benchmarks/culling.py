@@ -0,0 +1,113 @@
+﻿"""@package docstring
+Porównuje wybieranie widocznych obiektów statycznych przeglądaniem rombu sektorów ze sprawdzaniem zakresu każdego z nich
+(poprzednia wersja StaticObjects.redraw) z przedziałami wierszy visible_spans, wzdłuż stałej trasy kamery w rozdzielczościach
+800x600 i 1920x1080. Sprawdza, że przedziały dają wszystkie ramki na ekranie, które dawała poprzednia wersja (i wypisuje, ile
+widocznych obiektów poprzednia wersja pomijała w rogach ekranu), a obiekty dynamiczne wybrane przez Environment._visible_cells
+obejmują wszystkie obiekty, których pozycja jest na ekranie (także te dalsze niż dawny promień 20 kafli).
+"""
+
+from benchmarks import *
+from benchmarks.suite import camera_path, load_environment, viewport_position
+from StaticObjects import *
+from DrawQueue import *
+
+LEVEL_FILE = "data/level.dat"
+RESOLUTIONS = [(800, 600), (1920, 1080)]
+LEGACY_RADIUS = 20
+
+def legacy_static(static_objects, surface, position, frames):
+    """Wybiera obiekty statyczne tak jak poprzednia wersja StaticObjects.redraw, zwraca liczbę przejrzanych sektorów."""
+    start_sector = screen_to_world(position) / SECTOR_SIZE
+    start_sector.x = floor(start_sector.x)
+    start_sector.y = floor(start_sector.y) - 2
+
+    size_in_pixels = vec2(surface.get_size())
+    size_in_sectors = ((size_in_pixels / static_objects._tile_size) / SECTOR_SIZE + vec2(2, 4)).floor()
+    surface_center = size_in_pixels // 2
+
+    offset_x, offset_y = (-position).intcpl()
+    basexx, basexy = (BASE_X).intcpl()
+    baseyx, baseyy = (BASE_Y).intcpl()
+
+    visited = 0
+    for y in reversed(range(size_in_sectors.y)):
+        for x in range(size_in_sectors.x):
+            cursor_x = (start_sector.x + x - y)
+            cursor_y = (start_sector.y + x + y) + 1
+            count = 0
+            while count < 2:
+                if cursor_x >= 0 and cursor_y >= 0 and cursor_x < static_objects._size.x and cursor_y < static_objects._size.y:
+                    visited += 1
+                    sector = static_objects._sectors[cursor_y][cursor_x]
+                    for object in sector:
+                        frame = object[2].get_n_frame(object[1])
+                        frame_size = vec2(frame[0].get_size()) // 2
+                        depth = size_in_pixels.y - basexy * object[0].x - baseyy * object[0].y - offset_y
+                        dest_x = int(basexx * object[0].x + baseyx * object[0].y + offset_x - frame_size.x)
+                        dest_y = int(depth - object[2].get_offset())
+                        frame_center = vec2(dest_x + frame_size.x, dest_y + frame_size.y)
+                        delta = (frame_center - surface_center).abs()
+                        if delta.x < (frame_size.x + surface_center.x) or delta.y < (frame_size.y + surface_center.y):
+                            frames.append((frame, depth, (dest_x, dest_y)))
+                cursor_y -= 1
+                count += 1
+    return visited
+
+def on_screen(frames, size):
+    """Zwraca zbiór ramek (powierzchnia, obszar, głębokość, pozycja), których prostokąt przecina ekran o rozmiarze size."""
+    screen = pygame.Rect((0, 0), size)
+    return {(frame[0], tuple(frame[1]), depth, dest) for frame, depth, dest in frames
+        if screen.colliderect(pygame.Rect(dest, frame[0].get_size()))}
+
+def static_frame(static_objects, surface, position, legacy):
+    """Wybiera obiekty statyczne jedną z dróg, zwraca listę ramek."""
+    frames = DrawQueue()
+    if legacy:
+        legacy_static(static_objects, surface, position, frames)
+    else:
+        static_objects.redraw(surface, position, frames)
+    return frames
+
+def visible_dynamic(environment, position, viewport_pos, size):
+    """Zwraca liczbę obiektów dynamicznych wybranych przez spans, przez dawny promień i liczbę obiektów na ekranie poza promieniem."""
+    selected = set(environment._spatial_hash.query_spans(environment._visible_cells(viewport_pos, vec2(size))))
+    radius_sq = LEGACY_RADIUS * LEGACY_RADIUS
+    in_radius, missed = 0, 0
+    for object in environment._dynamic_objects:
+        anchor = world_to_screen(object.get_position()) - viewport_pos
+        visible = 0 <= anchor.x < size[0] and 0 <= anchor.y < size[1]
+        assert not visible or object in selected, "visible object culled"
+        inside = position.distsq(object.get_position()) < radius_sq
+        in_radius += inside
+        missed += visible and not inside
+    return len(selected), in_radius, missed
+
+def main():
+    environment, loader = load_environment(LEVEL_FILE)
+    static_objects = loader.get_static_objects()
+    path = camera_path(environment.get_players()[0].get_position())
+    print("%-10s %12s %12s %10s %10s %8s %8s %8s %8s" % ("size", "legacy us", "spans us", "sectors", "frames", "missed",
+        "objects", "radius", "missed"))
+    for size in RESOLUTIONS:
+        surface = pygame.Surface(size)
+        sectors, frames, missed, dynamic = 0, 0, 0, [0, 0, 0]
+        for position in path:
+            viewport_pos = viewport_position(position, surface)
+            legacy = static_frame(static_objects, surface, viewport_pos, True)
+            spans = static_frame(static_objects, surface, viewport_pos, False)
+            assert on_screen(legacy, size) <= on_screen(spans, size), "visible static object culled"
+            assert len(on_screen(spans, size)) == len(spans), "static object off screen"
+            sectors += legacy_static(static_objects, surface, viewport_pos, [])
+            frames += len(spans)
+            missed += len(spans) - len(on_screen(legacy, size))
+            dynamic = [a + b for a, b in zip(dynamic, visible_dynamic(environment, position, viewport_pos, size))]
+        legacy_time = measure(lambda: [static_frame(static_objects, surface, viewport_position(p, surface), True) for p in path])
+        spans_time = measure(lambda: [static_frame(static_objects, surface, viewport_position(p, surface), False) for p in path])
+        frames_count = len(path)
+        print("%-10s %12.1f %12.1f %10.1f %10.1f %8.1f %8.1f %8.1f %8.1f" % ("%dx%d" % size, legacy_time / frames_count * 1e6,
+            spans_time / frames_count * 1e6, sectors / frames_count, frames / frames_count, missed / frames_count,
+            dynamic[0] / frames_count, dynamic[1] / frames_count, dynamic[2] / frames_count))
+    print("equivalence: no on screen static object or visible dynamic object is culled")
+
+if __name__ == "__main__":
+    main()
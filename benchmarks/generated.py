@@ -0,0 +1,173 @@
+﻿"""@package docstring
+Porównuje tworzenie masek kafli (kolorowych i mieszania) oraz tarcz piksel po pikselu (poprzednia wersja) z wersjami
+NumPy/surfarray i sprawdza, że dają te same piksele. Mierzy tworzenie wszystkich generowanych powierzchni gry (DynamicObject,
+TerrainGrid, brak data/masks.png) przy pustym katalogu CACHE_DIR i przy wczytywaniu ich z tego katalogu (load_generated).
+"""
+
+from benchmarks import *
+import utilities
+import tempfile
+
+TILE = vec2(TILE_WIDTH, TILE_HEIGHT)
+ELEMENT_COLOR = [((0, 0, 255, 255), (50, 150, 255, 150)), ((255, 255, 0, 255), (255, 0, 0, 150)), ((150, 255, 255, 200), (150, 200, 255, 150)),
+    ((100, 255, 0, 255), (0, 255, 0, 150))]
+MASK_COLORS = [(255, 0, 0, 128), (255, 255, 0, 255), (0, 0, 255, 127)]
+
+def legacy_create_tile_mask(tile_size):
+    """Poprzednia wersja create_tile_mask, rysowana piksel po pikselu przez set_at."""
+    def uv_lerp(X, A, B, C, D):
+        V = B - A
+        U = D - A
+        u = (V.y * (X.x - A.x) - V.x * (X.y - A.y)) / (U.x * V.y - U.y * V.x)
+        v = (X.y - A.y - u * U.y) / V.y
+        return u, v
+    mask = pygame.Surface(tile_size.intcpl(), SRCALPHA)
+    mask.fill((0, 0, 0, 0))
+    half = int(tile_size.y / 2)
+    A = vec2(0.0, tile_size.y * 0.5)
+    B = vec2(tile_size.x * 0.5, 0.0)
+    C = vec2(tile_size.x , tile_size.y * 0.5)
+    D = vec2(tile_size.x * 0.5, tile_size.y)
+    mask.lock()
+    for y in range(tile_size.y):
+        for x in range(tile_size.x):
+            position = vec2(x + 0.5, y + 0.5)
+            u, v = uv_lerp(position, A, B, C, D)
+            if 0.0 < u < 1.0 and 0.0 < v < 1.0:
+                mask.set_at((x, y), (255, 255, 255, 255))
+    mask.unlock()
+    return mask
+
+def legacy_create_blend_mask(number, tile_size):
+    """Poprzednia wersja create_blend_mask, rysowana piksel po pikselu przez set_at."""
+    def uv_lerp(X, A, B, C, D):
+            V = B - A
+            U = D - A
+            u = (V.y * (X.x - A.x) - V.x * (X.y - A.y)) / (U.x * V.y - U.y * V.x)
+            v = (X.y - A.y - u * U.y) / V.y
+            return u, v
+
+    def gradient(A, B, C, D, a, b, c, d, surface):
+        center = tile_size * 0.5
+        for y in range(int(tile_size.y)):
+            for x in range(int(tile_size.x)):
+                point = vec2(x + 0.5, y + 0.5)
+                u, v = uv_lerp(point, A, B, C, D)
+                if -0.05 <= u and u <= 1.05 and -0.05 <= v and v <= 1.05:
+                    m = (1.0 - v) * a + v * b
+                    n = (1.0 - v) * d + v * c
+                    value = (1.0 - u) * m + u * n
+                    alpha = clamp(int(255.0 * value), 0, 255)
+                    surface.set_at((x, y), (255, 255, 255, alpha))
+
+    def int_to_list(x):
+        return [(x >> i) & 1 for i in range(8)]
+
+    VECTORS = [vec2(tile_size.x * 0.5, 0), tile_size * 0.25, vec2(0.0, tile_size.y * 0.5), vec2(tile_size.x * 0.25, tile_size.y * 0.75),
+                vec2(tile_size.x * 0.5, tile_size.y), tile_size * 0.75, vec2(tile_size.x, tile_size.y * 0.5), vec2(tile_size.x * 0.75, tile_size.y * 0.25)]
+
+    factors = int_to_list(number)
+    surface = pygame.Surface(tile_size.intcpl(), SRCALPHA)
+    center = tile_size * 0.5
+    gradient(VECTORS[2], VECTORS[1], center, VECTORS[3], factors[2], factors[1], 0.0, factors[3], surface)
+    gradient(VECTORS[3], center, VECTORS[5], VECTORS[4], factors[3], 0.0, factors[5], factors[4], surface)
+    gradient(center, VECTORS[7], VECTORS[6], VECTORS[5], 0.0, factors[7], factors[6], factors[5], surface)
+    gradient(VECTORS[1], VECTORS[0], VECTORS[7], center, factors[1], factors[0], factors[7], 0.0, surface)
+    mask = legacy_create_tile_mask(tile_size)
+    surface.blit(mask, (0, 0), None, BLEND_RGBA_MULT)
+
+    return surface
+
+def legacy_create_color_mask(tile_size, color):
+    """Poprzednia wersja create_color_mask, rysowana piksel po pikselu przez set_at."""
+    def uv_lerp(X, A, B, C, D):
+        V = B - A
+        U = D - A
+        u = (V.y * (X.x - A.x) - V.x * (X.y - A.y)) / (U.x * V.y - U.y * V.x)
+        v = (X.y - A.y - u * U.y) / V.y
+        return u, v
+    mask = pygame.Surface(tile_size.intcpl(), SRCALPHA)
+    mask.fill((0, 0, 0, 0))
+    half = int(tile_size.y / 2)
+    A = vec2(0.0, tile_size.y * 0.5)
+    B = vec2(tile_size.x * 0.5, 0.0)
+    C = vec2(tile_size.x, tile_size.y * 0.5)
+    D = vec2(tile_size.x * 0.5, tile_size.y)
+    mask.lock()
+    for y in range(tile_size.y):
+        for x in range(tile_size.x):
+            position = vec2(x + 0.5, y + 0.5)
+            u, v = uv_lerp(position, A, B, C, D)
+            if 0.0 < u < 1.0 and 0.0 < v < 1.0:
+                mask.set_at((x, y), color)
+    mask.unlock()
+    return mask
+
+def legacy_create_shield_sprite(radius, color):
+    """Poprzednia wersja create_shield_sprite, rysowana piksel po pikselu przez set_at."""
+    def my_lerp(a, b, t):
+        return ((1.0 - t) * a[0] + t * b[0], (1.0 - t) * a[1] + t * b[1], (1.0 - t) * a[2] + t * b[2], ((1.0 - t) * a[3] + t * b[3]) * 0.25)
+    double_radius = radius * 2
+    surface = pygame.Surface((double_radius, double_radius), SRCALPHA)
+    for y in range(double_radius):
+        for x in range(double_radius):
+            dx = x - radius
+            dy = y - radius
+            if sqrt(dx * dx + dy * dy) <= radius:
+                surface.set_at((x, y), my_lerp(color[0], color[1], x / double_radius))
+
+    rotated = pygame.transform.rotate(surface, 45)
+    offset = (vec2(rotated.get_size()) - vec2(surface.get_size())) // 2
+
+    return pygame.transform.rotate(surface, 45)
+
+def pixels(surface):
+    """Zwraca piksele powierzchni (bajty RGBA) razem z jej rozmiarem."""
+    return surface.get_size(), pygame.image.tobytes(surface, "RGBA")
+
+def generate_all():
+    """Tworzy wszystkie generowane powierzchnie gry, tak jak przy starcie i pierwszym użyciu. Zwraca listę powierzchni."""
+    surfaces = []
+    for color in ELEMENT_COLOR:
+        surfaces += create_star_sprites(24, 3, color) + create_ball_sprites(24, 3, color) + [create_shield_sprite(48, color)]
+    surfaces += create_hp_bar_sprites(vec2(64, 4)) + create_mg_bar_sprites(vec2(64, 4))
+    surfaces += [create_color_mask(TILE, color) for color in MASK_COLORS]
+    surfaces += load_blen_mask_set(TILE, "data/missing-masks.png")
+    return surfaces
+
+def main():
+    print("%-16s %12s %12s %8s" % ("generator", "legacy ms", "numpy ms", "speedup"))
+    for name, legacy, current in (
+            ("color masks", lambda: [legacy_create_color_mask(TILE, color) for color in MASK_COLORS],
+                lambda: [utilities._color_mask(TILE, color) for color in MASK_COLORS]),
+            ("shields", lambda: [legacy_create_shield_sprite(48, color) for color in ELEMENT_COLOR],
+                lambda: [utilities._shield_sprite(48, color) for color in ELEMENT_COLOR]),
+            ("blend masks", lambda: [legacy_create_blend_mask(i, TILE) for i in range(256)], lambda: [create_blend_mask(i, TILE) for i in range(256)])):
+        start = time.perf_counter()
+        expected = legacy()
+        legacy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        result = current()
+        current_time = time.perf_counter() - start
+        differences = sum(pixels(a) != pixels(b) for a, b in zip(expected, result))
+        assert differences == 0, "%d %s differ" % (differences, name)
+        print("%-16s %12.1f %12.1f %8.1f" % (name, legacy_time * 1000.0, current_time * 1000.0, legacy_time / current_time))
+
+    cache_dir = utilities.CACHE_DIR
+    with tempfile.TemporaryDirectory() as directory:
+        utilities.CACHE_DIR = directory
+        try:
+            start = time.perf_counter()
+            generated = generate_all()
+            cold_time = time.perf_counter() - start
+            warm_time = measure(generate_all, 3)
+            files = len(os.listdir(directory))
+            cached = generate_all()
+        finally:
+            utilities.CACHE_DIR = cache_dir
+    assert [pixels(a) for a in generated] == [pixels(b) for b in cached], "cached surfaces differ"
+    print("all generated surfaces: cold cache %.1f ms, warm cache %.1f ms, %d files" % (cold_time * 1000.0, warm_time * 1000.0, files))
+    print("equivalence: numpy generators and cached surfaces give the same pixels")
+
+if __name__ == "__main__":
+    main()
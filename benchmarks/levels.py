@@ -0,0 +1,54 @@
+﻿"""@package docstring
+Porównuje czas wczytywania data/level.dat w formacie tekstowym (TxtLevelLoader) z czasem wczytywania tej samej mapy
+przekonwertowanej do formatu binarnego (BinaryLevelLoader). Sprawdza, że oba loadery budują identyczną mapę.
+"""
+
+from benchmarks import *
+from LevelLoader import *
+import os
+import tempfile
+
+LEVEL_FILE = "data/level.dat"
+REPEAT = 3
+
+def describe(loader):
+    """Zwraca porównywalny opis mapy: kafle z przejściami i flagami, obiekty statyczne i dynamiczne."""
+    terrain_grid = loader.get_terrain_grid()
+    size = terrain_grid.get_size()
+    tiles = []
+    for y in range(size.y):
+        for x in range(size.x):
+            tile, adjacents, flags = terrain_grid._fields[y][x]
+            tiles.append((tile.get_file_name(), tuple((a.get_file_name(), mask) for a, mask in adjacents), bool(flags)))
+    static_objects = loader.get_static_objects()
+    sectors = []
+    sectors_size = static_objects.get_size()
+    for y in range(sectors_size.y):
+        for x in range(sectors_size.x):
+            sectors.append(tuple((o[0].couple(), o[1], o[2].get_file_name()) for o in static_objects.get_sector(vec2(x, y))))
+    dynamic_objects = [(o.__class__.__name__, o.get_position().couple()) for o in loader.get_dynamic_objects()]
+    return size.couple(), tiles, terrain_grid.get_walkability()[0], sectors, dynamic_objects
+
+def main():
+    handle, binary_file = tempfile.mkstemp(suffix = ".bin")
+    os.close(handle)
+    try:
+        convert_time = measure(lambda: convert_level(LEVEL_FILE, binary_file))
+        txt_time = measure(lambda: TxtLevelLoader().load(LEVEL_FILE), REPEAT)
+        binary_time = measure(lambda: BinaryLevelLoader().load(binary_file), REPEAT)
+
+        txt, binary = TxtLevelLoader(), create_level_loader(binary_file)
+        txt.load(LEVEL_FILE)
+        binary.load(binary_file)
+        assert isinstance(binary, BinaryLevelLoader)
+        assert describe(txt) == describe(binary), "binary level differs from the text level"
+
+        print("%-8s %12s %12s" % ("format", "size KiB", "load ms"))
+        print("%-8s %12.1f %12.1f" % ("txt", os.path.getsize(LEVEL_FILE) / 1024.0, txt_time * 1000.0))
+        print("%-8s %12.1f %12.1f" % ("binary", os.path.getsize(binary_file) / 1024.0, binary_time * 1000.0))
+        print("conversion: %.1f ms, speedup: %.1f" % (convert_time * 1000.0, txt_time / binary_time))
+    finally:
+        os.remove(binary_file)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+﻿"""@package docstring
+Mierzy czas odrysowania efektów cząsteczkowych (BallEffect i WaveEffect) przy 10, 50 i 200 efektach naraz:
+poprzednia implementacja (osobny obiekt Particle na cząsteczkę) kontra ParticleSystem.
+Przed pomiarem sprawdza, że obie implementacje wypełniają listę ramek tak samo (ParticleSystem dodaje ramki posortowane według klucza).
+"""
+
+from benchmarks import *
+from DynamicObject import *
+
+EFFECT_NUMBERS = [10, 50, 200]
+NUM_FRAMES = 50
+DELTA = 1.0 / 60.0
+VIEWPORT = vec2(-400, -300)
+
+class LegacyBallEffect:
+    """Kopia cząsteczek BallEffect sprzed wprowadzenia ParticleSystem."""
+
+    class Particle:
+        def __init__(self):
+            self.reset(-BallEffect.TIMEOUT)
+
+        def reset(self, current):
+            self.time = current + (random() - 0.5) * 0.2
+            self.dir = rotate2(vec2(0.0, 1.0), random() * pi * 2) * BallEffect.VELOCITY
+            self.pos = vec2(0.0, 0.0)
+
+    def __init__(self, position, number = 48):
+        self._particles = [LegacyBallEffect.Particle() for x in range(number)]
+        self._old_time = 0.0
+        self._sprites = ElementSprites.WATER_STARS
+        self._position = position
+
+    def redraw(self, surface, position, current, frames, pickable):
+        delta = current - self._old_time
+        self._old_time = current
+        real_size = self._sprites[0].get_size()
+        half_size = vec2(real_size) // 2
+        i, s = 0, len(self._particles)
+        while i < s:
+            if current - self._particles[i].time > BallEffect.TIMEOUT:
+                self._particles[i].reset(current)
+            else:
+                self._particles[i].pos += self._particles[i].dir * delta
+            dest = world_to_screen(self._particles[i].pos + self._position) - position - half_size
+            index = int(clamp((current - self._particles[i].time) / BallEffect.TIMEOUT, 0.0, 0.99) * len(self._sprites))
+            dest.y = surface.get_size()[1] - dest.y - 32
+            frames.append(((self._sprites[index], (0, 0) + real_size), dest.y + 16, dest.intcpl()))
+            i += 1
+
+class LegacyWaveEffect:
+    """Kopia cząsteczek WaveEffect sprzed wprowadzenia ParticleSystem."""
+
+    class Particle:
+        def reset(self, direction):
+            self.dir = direction
+
+    def __init__(self, position, number = 96):
+        self._particles = [LegacyWaveEffect.Particle() for x in range(number)]
+        for particle in self._particles:
+            particle.reset(rotate2(vec2(0.0, 1.0), random() * pi * 2))
+        self._sprites = ElementSprites.FIRE_CIRCLES
+        self._position = position
+        self._radius = 0.25
+        self._max_radius = 5.0
+
+    def redraw(self, surface, position, current, frames, pickable):
+        real_size = self._sprites[0].get_size()
+        half_size = vec2(real_size) // 2
+
+        i, s = 0, len(self._particles)
+        while i < s:
+            dest = world_to_screen(self._particles[i].dir * self._radius + self._position) - position
+            index = int(clamp(self._radius / self._max_radius, 0.0, 0.99) * len(self._sprites))
+            dest.y = surface.get_size()[1] - dest.y
+            frames.append(((self._sprites[index], (0, 0) + real_size), dest.y + 16, dest.intcpl()))
+            i += 1
+
+def create_effects(number, legacy):
+    """Tworzy number efektów, na przemian kule i fale, rozłożonych na kwadracie 10x10."""
+    effects = []
+    for i in range(number):
+        position = vec2(i % 10, (i // 10) % 10)
+        if legacy:
+            effect = LegacyBallEffect(position) if i % 2 == 0 else LegacyWaveEffect(position)
+        else:
+            effect = BallEffect() if i % 2 == 0 else WaveEffect()
+            effect._position = position
+        effects.append(effect)
+    return effects
+
+def same_frames(first, second):
+    """Porównuje listy ramek, dopuszczając różnicę zaokrągleń o jeden piksel."""
+    if len(first) != len(second):
+        return False
+    for (item0, key0, dest0), (item1, key1, dest1) in zip(first, second):
+        if item0[0] is not item1[0] or tuple(item0[1]) != tuple(item1[1]) or abs(key0 - key1) > 1e-6:
+            return False
+        if abs(dest0[0] - dest1[0]) > 1 or abs(dest0[1] - dest1[1]) > 1:
+            return False
+    return True
+
+def check_equivalence():
+    """Kopiuje stan cząsteczek do starej implementacji i porównuje wyniki kilku klatek."""
+    ball, legacy_ball = BallEffect(), LegacyBallEffect(vec2(3.5, 7.25))
+    ball._position = legacy_ball._position
+    wave, legacy_wave = WaveEffect(), LegacyWaveEffect(vec2(3.5, 7.25))
+    wave._position = legacy_wave._position
+    directions, times = ball._particles.get_directions(), ball._particles.get_times()
+    times[:] = [i * 0.001 for i in range(len(times))] # żadna cząsteczka nie wygaśnie w trakcie porównania
+    for i, particle in enumerate(legacy_ball._particles):
+        particle.dir, particle.time = vec2(directions[i][0], directions[i][1]), times[i]
+    for i, particle in enumerate(legacy_wave._particles):
+        particle.dir = vec2(wave._particles.get_directions()[i][0], wave._particles.get_directions()[i][1])
+    for frame in range(4):
+        current = frame * 0.02
+        wave._radius = legacy_wave._radius = 0.25 + frame
+        for effect, legacy_effect in ((ball, legacy_ball), (wave, legacy_wave)):
+            result, expected = [], []
+            effect.redraw(SCREEN, VIEWPORT, current, result, [])
+            legacy_effect.redraw(SCREEN, VIEWPORT, current, expected, [])
+            expected.sort(key = lambda frame: frame[1])
+            if not same_frames(result, expected):
+                return False
+    return True
+
+def frame_time(effects):
+    """Zwraca średni czas wypełnienia listy ramek wszystkimi efektami."""
+    frame = [0]
+    def redraw():
+        frame[0] += 1
+        frames = []
+        for effect in effects:
+            effect.redraw(SCREEN, VIEWPORT, frame[0] * DELTA, frames, [])
+    return measure(redraw, NUM_FRAMES)
+
+def main():
+    assert check_equivalence(), "ParticleSystem output differs from the previous implementation"
+    print("%8s %12s %12s %10s" % ("effects", "legacy ms", "numpy ms", "speedup"))
+    for number in EFFECT_NUMBERS:
+        legacy = frame_time(create_effects(number, True))
+        current = frame_time(create_effects(number, False))
+        print("%8d %12.2f %12.2f %10.1f" % (number, legacy * 1000.0, current * 1000.0, legacy / current))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+﻿"""@package docstring
+Porównuje wyszukiwanie ścieżek algorytmem A* (PathFinder) z poprzednią implementacją Environment.findPath (zachłanne przeszukiwanie "najpierw najlepszy").
+Dla losowych par kafli z data/level.dat wypisuje długość ścieżek, liczbę rozwiniętych węzłów i czas wyszukiwania.
+Mierzy także skuteczność pamięci podręcznej ścieżek Environment przy powtarzających się zapytaniach
+oraz porównuje wyszukiwanie hierarchiczne (SectorGraph) z A* dla ścieżek przez całą mapę.
+"""
+
+from benchmarks import *
+from LevelLoader import *
+from PathFinder import *
+from Environment import *
+from queue import PriorityQueue
+import random as rng
+
+LEVEL_FILE = "data/level.dat"
+NUM_QUERIES = 200
+NUM_LONG_QUERIES = 50
+MAX_DISTANCE = 12
+SEED = 2014
+
+class LegacySearch:
+    """Kopia wyszukiwania z poprzedniej wersji Environment.findPath, zliczająca rozwinięte węzły."""
+    FIND_PATH_MAX_DIST = 200
+
+    def __init__(self, terrain_grid):
+        self._terrain_grid = terrain_grid
+        self.expanded = 0
+
+    def reachable(self, point):
+        size = self._terrain_grid.get_size()
+        tile = point.ifloor()
+        if tile.x < 0 or tile.y < 0 or tile.x >= size.x or tile.y >= size.y:
+            return False
+        return not self._terrain_grid.get_flags(tile)
+
+    def find(self, startPoint, endPoint):
+        reached = set()
+        unchecked = PriorityQueue()
+        moves = {(i, j) for i in [-1, 0, 1] for j in [-1, 0, 1]}
+        moves.remove((0, 0))
+        unchecked.put((0, startPoint, []))
+        self.expanded = 0
+        while not unchecked.empty():
+            prior, point, seq = unchecked.get()
+            if point == endPoint:
+                return self._smooth(startPoint, endPoint, seq)
+            if prior > self.FIND_PATH_MAX_DIST:
+                return []
+            if not point in reached:
+                reached.add(point)
+                self.expanded += 1
+                for move in moves:
+                    pointNew = (point[0] + move[0], point[1] + move[1])
+                    if self.reachable(vec2(pointNew)):
+                        seqNew = seq[:]
+                        seqNew.append(move)
+                        unchecked.put(((pointNew[0] - endPoint[0]) ** 2 + (pointNew[1] - endPoint[1]) ** 2, pointNew, seqNew))
+        return []
+
+    def _smooth(self, startPoint, endPoint, seq):
+        seqNew = []
+        acc = last = startPoint
+        for move in seq:
+            if move == last:
+                acc = (acc[0] + last[0], acc[1] + last[1])
+            else:
+                seqNew.append(acc)
+                last = move
+                acc = (acc[0] + move[0], acc[1] + move[1])
+        seqNew.append(endPoint)
+        return [(x[0] + 0.49, x[1] + 0.49) for x in seqNew]
+
+def path_length(path):
+    """Zwraca długość łamanej."""
+    length = 0.0
+    for i in range(len(path) - 1):
+        length += (vec2(path[i + 1]) - vec2(path[i])).length()
+    return length
+
+def random_queries(path_finder, size, number, max_distance, seed):
+    """Losuje pary osiągalnych kafli odległych od siebie o co najwyżej max_distance."""
+    generator = rng.Random(seed)
+    queries = []
+    while len(queries) < number:
+        start = generator.randrange(size.x), generator.randrange(size.y)
+        goal = start[0] + generator.randint(-max_distance, max_distance), start[1] + generator.randint(-max_distance, max_distance)
+        if path_finder.is_walkable(start) and path_finder.is_walkable(goal):
+            queries.append((start, goal))
+    return queries
+
+def path_cost(tiles):
+    """Zwraca długość ścieżki podanej jako lista kafli."""
+    return sum(octile_distance(tiles[i], tiles[i + 1]) for i in range(len(tiles) - 1))
+
+def hierarchical_benchmark(terrain_grid):
+    """Porównuje SectorGraph z nieograniczonym A* dla losowych par kafli z całej mapy."""
+    size = terrain_grid.get_size()
+    path_finder = PathFinder(terrain_grid, size.x * size.y)
+    build_time = measure(lambda: SectorGraph(terrain_grid))
+    sector_graph = SectorGraph(terrain_grid)
+    queries = random_queries(path_finder, size, NUM_LONG_QUERIES, max(size.x, size.y), SEED)
+
+    flat_time = cold_time = warm_time = 0.0
+    ratio, found = 0.0, 0
+    for start, goal in queries:
+        flat_time += measure(lambda: path_finder.find(start, goal))
+        cold_time += measure(lambda: sector_graph.find(start, goal))
+        warm_time += measure(lambda: sector_graph.find(start, goal))
+        flat = path_finder.find(start, goal)
+        hierarchical = sector_graph.find(start, goal)
+        if flat != [] and hierarchical != []:
+            ratio += path_cost(hierarchical) / max(path_cost(flat), 1.0)
+            found += 1
+
+    print("hierarchical: sector size %d, %d entrances, build %.1f ms" % (sector_graph.get_sector_size(), sector_graph.get_node_number(), build_time * 1000.0))
+    print("%d long queries: A* %.2f ms, hierarchical cold %.2f ms, warm %.2f ms, length ratio %.3f" % (len(queries),
+        flat_time / len(queries) * 1000.0, cold_time / len(queries) * 1000.0, warm_time / len(queries) * 1000.0, ratio / max(found, 1)))
+
+def main():
+    loader = TxtLevelLoader()
+    loader.load(LEVEL_FILE)
+    terrain_grid = loader.get_terrain_grid()
+    path_finder = PathFinder(terrain_grid, Environment.FIND_PATH_MAX_COST)
+    legacy = LegacySearch(terrain_grid)
+    queries = random_queries(path_finder, terrain_grid.get_size(), NUM_QUERIES, MAX_DISTANCE, SEED)
+
+    results = {"legacy" : [0, 0.0, 0, 0.0], "astar" : [0, 0.0, 0, 0.0]} # found, length, expanded, time
+    both = 0
+    for start, goal in queries:
+        time_legacy = measure(lambda: legacy.find(start, goal))
+        legacy_path = legacy.find(start, goal)
+        in_range = (vec2(start) - vec2(goal)).length() <= Environment.FIND_PATH_MAX_DIST
+        time_astar = measure(lambda: path_finder.find(start, goal) if in_range else [])
+        astar_path = smooth_path(path_finder.find(start, goal)) if in_range else []
+
+        results["legacy"][2] += legacy.expanded
+        results["legacy"][3] += time_legacy
+        results["astar"][2] += path_finder.get_expanded()
+        results["astar"][3] += time_astar
+        if legacy_path != []:
+            results["legacy"][0] += 1
+        if astar_path != []:
+            results["astar"][0] += 1
+        if legacy_path != [] and astar_path != []:
+            both += 1
+            results["legacy"][1] += path_length(legacy_path)
+            results["astar"][1] += path_length(astar_path)
+
+    print("queries: %d, max distance: %d, found by both: %d" % (len(queries), MAX_DISTANCE, both))
+    print("%-8s %8s %14s %14s %12s" % ("search", "found", "avg length", "avg expanded", "avg ms"))
+    for name, (found, length, expanded, elapsed) in results.items():
+        print("%-8s %8d %14.2f %14.1f %12.3f" % (name, found, length / max(both, 1), expanded / len(queries), elapsed / len(queries) * 1000.0))
+
+    environment = Environment()
+    environment.load(loader)
+    generator = rng.Random(SEED)
+    repeated = [queries[generator.randrange(len(queries) // 4)] for i in range(NUM_QUERIES * 4)]
+    elapsed = measure(lambda: [environment.findPath(start, goal) for start, goal in repeated])
+    cache = environment.get_path_cache()
+    hierarchical_benchmark(terrain_grid)
+    print("cached findPath: %d queries, hits: %d, misses: %d, size: %d, avg ms: %.3f" % (len(repeated), cache.get_hits(), cache.get_misses(), cache.get_size(), elapsed / len(repeated) * 1000.0))
+
+if __name__ == "__main__":
+    main()
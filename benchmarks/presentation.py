@@ -0,0 +1,122 @@
+﻿"""@package docstring
+Porównuje kopiowanie na ekran całej klatki (pygame.display.update()) z kopiowaniem tylko prostokątów zwróconych przez
+Environment.get_dirty_rects przy nieruchomej kamerze: w grze (potwory się poruszają) i w edytorze (zmieniają się tylko obiekty
+dodawane pędzlem). Sprawdza, że ekran złożony z samych prostokątów jest identyczny z pełną klatką, także po ruchu kamery,
+zmianie terenu i dodaniu lub usunięciu obiektów.
+"""
+
+from benchmarks import *
+from benchmarks.suite import load_environment
+from DynamicObject import *
+import random as rng
+
+LEVEL_FILE = "data/level.dat"
+FRAMES = 200
+TIME_STEP = 0.01
+SEED = 2014
+
+class Presenter:
+    """Składa "ekran" z kolejnych klatek tak jak GameStage: całą klatkę lub tylko zmienione prostokąty."""
+
+    def __init__(self, size):
+        self._front = pygame.Surface(size)
+        self._area = size[0] * size[1]
+        self._covered = 0.0
+        self._frames = 0
+        self._full = 0
+
+    def present(self, frame, rects):
+        """Kopiuje klatkę na ekran, zwraca czy ekran jest identyczny z klatką."""
+        self._frames += 1
+        if rects == None:
+            self._full += 1
+            self._covered += 1.0
+            self._front.blit(frame, (0, 0))
+        else:
+            covered = 0
+            for rect in rects:
+                self._front.blit(frame, rect, rect)
+                clipped = frame.get_rect().clip(rect)
+                covered += clipped.width * clipped.height
+            self._covered += min(covered / self._area, 1.0)
+        return pygame.image.tobytes(self._front, "RGB") == pygame.image.tobytes(frame, "RGB")
+
+    def get_statistics(self):
+        """Zwraca liczbę pełnych klatek i średni odsetek ekranu kopiowany w klatce."""
+        return self._full, self._covered / max(self._frames, 1)
+
+def gameplay_frames(environment, camera, frame, presenter, frames):
+    """Symuluje grę z nieruchomą kamerą, zwraca liczbę klatek, w których ekran różni się od klatki."""
+    errors = 0
+    for i in range(frames):
+        environment.update(TIME_STEP, i * TIME_STEP)
+        environment.redraw(frame, camera, i * TIME_STEP, False)
+        errors += not presenter.present(frame, environment.get_dirty_rects())
+    return errors
+
+def editor_frames(environment, camera, frame, presenter, generator, sprite):
+    """Symuluje edytor: kamera stoi, co kilka klatek dodawany lub usuwany jest obiekt, zmieniany kafel lub kamera się przesuwa."""
+    errors = 0
+    terrain_grid = environment._terrain_grid
+    for i in range(FRAMES):
+        if i % 50 == 10:
+            camera = camera + vec2(1.0, 0.0)
+        elif i % 50 == 20:
+            position = (camera + vec2(generator.uniform(-3, 3), generator.uniform(-3, 3))).ifloor()
+            terrain_grid.set_tile(position, terrain_grid.get_tile(position + vec2(2, 2)))
+        elif i % 50 == 30:
+            object = Orc()
+            object.set_position(camera + vec2(generator.uniform(-3, 3), generator.uniform(-3, 3)))
+            object.set_environment(environment)
+            environment.add_object(object)
+        elif i % 50 == 35:
+            environment._static_objects.add_objects(camera - vec2(2, 2), vec2(4, 4), sprite, 1, 3)
+        elif i % 50 == 40:
+            environment.remove_object(environment._dynamic_objects[-1])
+        environment.redraw(frame, camera, i * TIME_STEP, False)
+        errors += not presenter.present(frame, environment.get_dirty_rects())
+    return errors
+
+def present_time(environment, camera, rects_mode):
+    """Mierzy średni czas klatki gry (redraw i kopiowanie na ekran) z nieruchomą kamerą."""
+    start = time.perf_counter()
+    for i in range(FRAMES):
+        environment.update(TIME_STEP, i * TIME_STEP)
+        environment.redraw(SCREEN, camera, i * TIME_STEP, False)
+        rects = environment.get_dirty_rects()
+        if rects_mode and rects != None:
+            pygame.display.update(rects)
+        else:
+            pygame.display.update()
+    return (time.perf_counter() - start) / FRAMES
+
+def main():
+    rng.seed(SEED)
+    frame = pygame.Surface(SCREEN.get_size())
+
+    environment, loader = load_environment(LEVEL_FILE)
+    camera = environment.get_players()[0].get_position().copy()
+    gameplay = Presenter(SCREEN.get_size())
+    errors = gameplay_frames(environment, camera, frame, gameplay, FRAMES)
+    assert errors == 0, "%d gameplay frames differ" % errors
+
+    environment, loader = load_environment(LEVEL_FILE)
+    editor = Presenter(SCREEN.get_size())
+    errors = editor_frames(environment, environment.get_players()[0].get_position().copy(), frame, editor, rng.Random(SEED), loader.get_static_object_sprites()[0])
+    assert errors == 0, "%d editor frames differ" % errors
+
+    environment, loader = load_environment(LEVEL_FILE)
+    full_time = present_time(environment, camera, False)
+    environment, loader = load_environment(LEVEL_FILE)
+    rects_time = present_time(environment, camera, True)
+
+    print("%-10s %12s %14s" % ("scenario", "full frames", "screen copied"))
+    for name, presenter in (("gameplay", gameplay), ("editor", editor)):
+        full, covered = presenter.get_statistics()
+        print("%-10s %12d %13.1f%%" % (name, full, covered * 100.0))
+    print("frame with display.update(): %.2f ms (%.0f fps), with dirty rects: %.2f ms (%.0f fps), video driver: %s" % (full_time * 1000.0,
+        1.0 / full_time, rects_time * 1000.0, 1.0 / rects_time, pygame.display.get_driver()))
+    print("equivalence: %d gameplay and %d editor frames match full presentation" % (FRAMES, FRAMES))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+﻿"""@package docstring
+Mierzy czas klatki gry (Environment.redraw na powierzchni stadium i przeskalowanie jej na ekran) wzdłuż stałej trasy kamery
+dla ekranów 800x600, 1920x1080 i 3840x2160 przy różnych skalach renderowania (GameStage.set_render_scale).
+Sprawdza, że ekran złożony z prostokątów przeliczonych przez GameStage._to_display jest identyczny z całą przeskalowaną klatką.
+"""
+
+from benchmarks import *
+from benchmarks.suite import camera_path, load_environment
+from GameStage import *
+
+LEVEL_FILE = "data/level.dat"
+DISPLAYS = [(800, 600), (1920, 1080), (3840, 2160)]
+SCALES = [1.0, 0.5, 0.25]
+FRAMES = 60
+TIME_STEP = 0.01
+
+def frame_time(environment, stage, display, path):
+    """Odrysowuje środowisko na powierzchni stadium i skaluje ją na ekran, zwraca średni czas klatki w sekundach."""
+    screen = stage._screen
+    start = time.perf_counter()
+    for i, position in enumerate(path):
+        environment.redraw(screen, position, i * TIME_STEP, False)
+        if screen is not display:
+            pygame.transform.scale(screen, display.get_size(), display)
+    return (time.perf_counter() - start) / len(path)
+
+def dirty_rects_differences(environment, stage, display, camera):
+    """Symuluje grę w trybie prostokątów, zwraca liczbę klatek, w których złożony ekran różni się od przeskalowanej klatki."""
+    screen, front = stage._screen, display.copy()
+    errors = 0
+    for i in range(FRAMES):
+        environment.update(TIME_STEP, i * TIME_STEP)
+        environment.redraw(screen, camera, i * TIME_STEP, False)
+        pygame.transform.scale(screen, display.get_size(), display)
+        rects = environment.get_dirty_rects()
+        if rects == None:
+            front.blit(display, (0, 0))
+        else:
+            for rect in rects:
+                rect = stage._to_display(rect)
+                front.blit(display, rect, rect)
+        errors += pygame.image.tobytes(front, "RGB") != pygame.image.tobytes(display, "RGB")
+    return errors
+
+def main():
+    print("%-10s %6s %10s %10s %8s" % ("display", "scale", "drawn", "frame ms", "fps"))
+    for size in DISPLAYS:
+        display = pygame.Surface(size)
+        stage = GameStage(display)
+        for scale in SCALES:
+            stage.set_render_scale(scale)
+            environment, loader = load_environment(LEVEL_FILE)
+            path = camera_path(environment.get_players()[0].get_position(), FRAMES)
+            environment.redraw(stage._screen, path[0], 0.0, False)
+            seconds = frame_time(environment, stage, display, path)
+            drawn = "%dx%d" % stage._screen.get_size()
+            print("%-10s %6.2f %10s %10.2f %8.0f" % ("%dx%d" % size, scale, drawn, seconds * 1000.0, 1.0 / seconds))
+            if scale != 1.0:
+                environment, loader = load_environment(LEVEL_FILE)
+                errors = dirty_rects_differences(environment, stage, display, environment.get_players()[0].get_position().copy())
+                assert errors == 0, "%d scaled dirty rects frames differ at %s, scale %.2f" % (errors, drawn, scale)
+    print("equivalence: scaled dirty rects match the whole scaled frame")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+﻿"""@package docstring
+Porównuje odrysowanie całego terenu w każdej klatce (wypełnienie tłem i TerrainGrid.redraw) z buforem przewijania
+ScrollBuffer (odrysowanie odsłoniętych pasów, skopiowanie zawiniętego bufora i narysowanie kafli animowanych) wzdłuż stałej
+trasy kamery w rozdzielczościach 800x600 i 1920x1080. Sprawdza, że obie drogi dają te same piksele w każdej klatce,
+także przy skokach kamery, przełączaniu zaznaczenia nieosiągalnych kafli i zmianie kafla. Wypisuje czas klatki i średni
+odsetek widoku odrysowywany przez bufor.
+"""
+
+from benchmarks import *
+from benchmarks.suite import camera_path, load_environment, viewport_position
+from Environment import *
+
+LEVEL_FILE = "data/level.dat"
+RESOLUTIONS = [(800, 600), (1920, 1080)]
+TIME_STEP = 0.01
+
+def full_redraw(terrain_grid, surface, position, time, draw_flags):
+    """Odrysowuje cały teren, tak jak Environment.redraw bez bufora przewijania."""
+    surface.fill(BACKGROUND_COLOR)
+    terrain_grid.redraw(surface, position, time, draw_flags)
+
+def buffered_redraw(scroll_buffer, terrain_grid, surface, position, time, draw_flags):
+    """Odrysowuje teren przez bufor przewijania, tak jak Environment.redraw."""
+    def draw(buffer, buffer_position):
+        buffer.fill(BACKGROUND_COLOR)
+        terrain_grid.redraw_static(buffer, buffer_position, draw_flags)
+    scroll_buffer.redraw(surface, position, (draw_flags, terrain_grid.get_revision()), draw)
+    terrain_grid.redraw_animated(surface, position, time, draw_flags)
+
+def check_path(terrain_grid, size, positions):
+    """Porównuje obie drogi dla listy pozycji widoku, co kilka klatek zmienia zaznaczenie i kafel. Zwraca liczbę różnych klatek."""
+    expected, result = pygame.Surface(size), pygame.Surface(size)
+    scroll_buffer = ScrollBuffer()
+    errors = 0
+    for i, position in enumerate(positions):
+        draw_flags = i % 40 >= 30
+        if i % 50 == 25:
+            cursor = (screen_to_world(position + vec2(size) * 0.5)).ifloor()
+            terrain_grid.set_tile(cursor, terrain_grid.get_tile(cursor + vec2(3, 1)))
+        full_redraw(terrain_grid, expected, position, i * TIME_STEP, draw_flags)
+        buffered_redraw(scroll_buffer, terrain_grid, result, position, i * TIME_STEP, draw_flags)
+        errors += pygame.image.tobytes(expected, "RGB") != pygame.image.tobytes(result, "RGB")
+    return errors
+
+def frame_times(terrain_grid, size, positions):
+    """Mierzy średni czas klatki obu dróg i średni odsetek widoku odrysowywany przez bufor."""
+    surface, scroll_buffer = pygame.Surface(size), ScrollBuffer()
+    full_time = measure(lambda: [full_redraw(terrain_grid, surface, position, i * TIME_STEP, False)
+        for i, position in enumerate(positions)]) / len(positions)
+    exposed = [0]
+    def run():
+        for i, position in enumerate(positions):
+            buffered_redraw(scroll_buffer, terrain_grid, surface, position, i * TIME_STEP, False)
+            exposed[0] += sum(rect.width * rect.height for rect in scroll_buffer.get_exposed())
+    buffered_time = measure(run) / len(positions)
+    return full_time, buffered_time, exposed[0] / (len(positions) * size[0] * size[1])
+
+def main():
+    environment, loader = load_environment(LEVEL_FILE)
+    terrain_grid = loader.get_terrain_grid()
+    center = environment.get_players()[0].get_position()
+    print("%-10s %10s %12s %10s %8s" % ("size", "full ms", "buffered ms", "redrawn", "speedup"))
+    for size in RESOLUTIONS:
+        surface = pygame.Surface(size)
+        positions = [viewport_position(position, surface) for position in camera_path(center)]
+        jumps = [viewport_position(center + vec2(dx, dy), surface) for dx, dy in ((0, 0), (0.5, 0), (30, 0), (30, 7), (-3, 2), (0, 0))]
+        errors = check_path(terrain_grid, size, positions + jumps + positions)
+        assert errors == 0, "%d frames differ at %dx%d" % (errors, size[0], size[1])
+        full_time, buffered_time, exposed = frame_times(terrain_grid, size, positions)
+        print("%-10s %10.2f %12.2f %9.1f%% %8.2f" % ("%dx%d" % size, full_time * 1000.0, buffered_time * 1000.0,
+            exposed * 100.0, full_time / buffered_time))
+    print("equivalence: buffered frames match the full redraw")
+
+if __name__ == "__main__":
+    main()
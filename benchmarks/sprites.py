@@ -0,0 +1,125 @@
+﻿"""@package docstring
+Porównuje rysowanie duszków (obiekty statyczne, dynamiczne, paski zdrowia i cząsteczki efektów) sortowaniem listy z funkcją lambda
+i osobnym blitem dla każdego duszka, z ramkami zebranymi tak jak przed sortowaniem cząsteczek w ParticleSystem.emit, z kolejką
+DrawQueue (cząsteczki dodawane posortowanymi ciągami, które sortowanie tylko scala, i jedno wywołanie Surface.blits).
+Scena to data/level.dat z dodatkowymi efektami czarów wokół gracza. Wypisuje też liczbę posortowanych ciągów ramek, czas ich
+uporządkowania i czas zebrania ramek. Sprawdza, że obie drogi zbierają te same ramki i dają tę samą kolejność rysowania i te same piksele.
+"""
+
+from benchmarks import *
+from benchmarks.suite import load_environment
+from DynamicObject import *
+from DrawQueue import *
+import ParticleSystem as particle_system
+from operator import itemgetter
+import random as rng
+
+LEVEL_FILE = "data/level.dat"
+NUM_EFFECTS = [0, 10, 40]
+REPEAT = 200
+TIME_STEP = 0.01
+SEED = 2014
+
+def legacy_emit(self, frames, sprites, origin, viewport, height, anchor = (0, 0), lift = 0):
+    """Kopia ParticleSystem.emit sprzed sortowania cząsteczek, dodaje je w kolejności cząsteczek."""
+    if sprites is not self._sprites:
+        size = sprites[0].get_size()
+        self._items = [(sprite, (0, 0) + size) for sprite in sprites]
+        self._sprites = sprites
+    offset = world_to_screen(origin) - viewport - vec2(anchor)
+    screen = self._position @ particle_system._BASIS
+    x = screen[:, 0] + offset.x
+    y = (height - offset.y - lift) - screen[:, 1]
+    items = self._items
+    frames.extend(zip([items[i] for i in self._index.tolist()], (y + 16).tolist(), zip(x.astype(int).tolist(), y.astype(int).tolist())))
+
+def legacy_flush(surface, items):
+    """Rysuje duszki tak jak poprzednia wersja Environment.redraw."""
+    items = list(items)
+    items.sort(key = lambda x: x[1])
+    for object in items:
+        surface.blit(object[0][0], object[2], object[0][1])
+    return items
+
+def queue_flush(surface, items, queue):
+    """Rysuje duszki przez kolejkę DrawQueue."""
+    queue.reset()
+    queue.extend(items)
+    queue.flush(surface)
+    return queue
+
+def add_effects(environment, generator, number):
+    """Dodaje number efektów kul i fal w pobliżu gracza."""
+    player = environment.get_players()[0]
+    sprite_sets = [ElementSprites.WATER_STARS, ElementSprites.FIRE_STARS, ElementSprites.AIR_STARS, ElementSprites.EARTH_STARS]
+    circle_sets = [ElementSprites.WATER_CIRCLES, ElementSprites.FIRE_CIRCLES, ElementSprites.AIR_CIRCLES, ElementSprites.EARTH_CIRCLES]
+    for i in range(number):
+        object = BallEffect() if i % 2 == 0 else WaveEffect()
+        object.set_direction(rotate2(vec2(1.0, 0.0), generator.uniform(0.0, 2 * pi)))
+        object.set_position(player.get_position() + vec2(generator.uniform(-4, 4), generator.uniform(-4, 4)))
+        object.set_sprites(generator.choice(sprite_sets if i % 2 == 0 else circle_sets))
+        object.set_environment(environment)
+        environment.add_object(object)
+
+def scene(number):
+    """Zwraca środowisko i pozycję kamery sceny z number efektami, po kilku klatkach gry."""
+    rng.seed(SEED)
+    environment, loader = load_environment(LEVEL_FILE)
+    add_effects(environment, rng.Random(SEED), number)
+    camera = environment.get_players()[0].get_position().copy()
+    for i in range(10):
+        environment.update(TIME_STEP, i * TIME_STEP)
+    environment.redraw(SCREEN, camera, 10 * TIME_STEP, False)
+    return environment, camera
+
+def collect(environment, camera, emit = None):
+    """Zbiera ramki jednej klatki w kolejności dodawania, tak jak Environment.redraw przed flush, z podaną metodą emit cząsteczek."""
+    current_emit = particle_system.ParticleSystem.emit
+    particle_system.ParticleSystem.emit = emit or current_emit
+    try:
+        surface_size = vec2(SCREEN.get_size())
+        viewport_pos = (world_to_screen(camera) - surface_size / 2).floor()
+        frames = []
+        environment._static_objects.redraw(SCREEN, viewport_pos, frames)
+        for object in environment._spatial_hash.query_spans(environment._visible_cells(viewport_pos, surface_size)):
+            object.redraw(SCREEN, viewport_pos, 10 * TIME_STEP, frames, [])
+    finally:
+        particle_system.ParticleSystem.emit = current_emit
+    return frames
+
+def runs(items):
+    """Zwraca liczbę niemalejących według głębokości ciągów ramek."""
+    return 1 + sum(1 for first, second in zip(items, items[1:]) if second[1] < first[1])
+
+def frames(items):
+    """Zwraca posortowaną listę (duszek, obszar, pozycja) ramek, bez ich kolejności i głębokości."""
+    return sorted((id(item[0][0]), tuple(item[0][1]), item[2]) for item in items)
+
+def main():
+    print("%8s %8s %13s %17s %17s %12s %12s %8s" % ("effects", "sprites", "runs", "order us", "collect us", "legacy us",
+        "queue us", "speedup"))
+    for number in NUM_EFFECTS:
+        environment, camera = scene(number)
+        legacy_items = collect(environment, camera, legacy_emit)
+        items = collect(environment, camera)
+        assert frames(legacy_items) == frames(items), "collected frames differ"
+        expected, result = SCREEN.copy(), SCREEN.copy()
+        order = legacy_flush(expected, legacy_items)
+        queue = DrawQueue()
+        assert list(queue_flush(result, items, queue)) == order, "draw order differs"
+        assert pygame.image.tobytes(expected, "RGB") == pygame.image.tobytes(result, "RGB"), "pixels differ"
+
+        surface = SCREEN.copy()
+        legacy_order = measure(lambda: sorted(legacy_items, key = itemgetter(1)), REPEAT)
+        queue_order = measure(lambda: sorted(items, key = itemgetter(1)), REPEAT)
+        legacy_collect = measure(lambda: collect(environment, camera, legacy_emit), REPEAT)
+        queue_collect = measure(lambda: collect(environment, camera), REPEAT)
+        legacy_time = measure(lambda: legacy_flush(surface, legacy_items), REPEAT)
+        queue_time = measure(lambda: queue_flush(surface, items, queue), REPEAT)
+        print("%8d %8d %6d %6d %8.1f %8.1f %8.1f %8.1f %12.1f %12.1f %8.2f" % (number, len(items), runs(legacy_items), runs(items),
+            legacy_order * 1e6, queue_order * 1e6, legacy_collect * 1e6, queue_collect * 1e6, legacy_time * 1e6, queue_time * 1e6,
+            (legacy_collect + legacy_time) / (queue_collect + queue_time)))
+    print("equivalence: collected frames, draw order and pixels match for all scenes")
+
+if __name__ == "__main__":
+    main()
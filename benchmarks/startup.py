@@ -0,0 +1,74 @@
+﻿"""@package docstring
+Mierzy czas uruchomienia gry (game.py do wejścia w menu główne i "NEW GAME" na data/level.dat) oraz edytora (editor.py do
+wejścia w pętlę główną) w osobnych procesach, z duszkami obiektów dynamicznych wczytywanymi wszystkie przy starcie, tak jak
+przed wprowadzeniem LazyAsset, przy pierwszym użyciu (wtedy ich koszt przechodzi na "NEW GAME") oraz w grze także w tle menu
+głównego (MainMenu.on_update, po jednym duszku na klatkę) przed wybraniem "NEW GAME". Wypisuje medianę czasów, liczbę klatek menu
+potrzebnych do wczytania duszków, najdłuższą z nich i liczbę wczytanych duszków.
+"""
+
+from benchmarks import *
+import statistics
+import subprocess
+import sys
+
+REPEAT = 3
+
+SCRIPT = """
+import time
+start = time.perf_counter()
+from utilities import *
+Issue20891_workaround()
+screen = initialize_pygame(vec2(%(width)d, %(height)d), False)
+from Gameplay import *
+from Environment import *
+if %(eager)s:
+    import DynamicObject
+    from inspect import isclass
+    for cls in list(vars(DynamicObject).values()):
+        if isclass(cls) and cls.__module__ == "DynamicObject":
+            preload_assets(cls)
+if %(game)s:
+    gameplay = Gameplay(screen)
+    hall_of_fame = HallOfFame(screen)
+    main_menu = MainMenu(screen, gameplay, hall_of_fame, None)
+else:
+    environment = Environment()
+started = time.perf_counter()
+sprites = len(get_assets())
+frames, longest = 0, 0.0
+if %(menu)s:
+    while main_menu.get_pending_assets() > 0:
+        frame_start = time.perf_counter()
+        main_menu.on_update(0.01, frames * 0.01)
+        longest = max(longest, time.perf_counter() - frame_start)
+        frames += 1
+menu_done = time.perf_counter()
+if %(game)s:
+    gameplay.new_game("data/level.dat")
+print(started - start, time.perf_counter() - menu_done, sprites, len(get_assets()), frames, longest)
+"""
+
+def run(game, mode):
+    """
+    Uruchamia skrypt startowy w nowym procesie z duszkami wczytywanymi zależnie od mode ("eager", "lazy" lub "menu"),
+    zwraca medianę czasu startu i wczytania poziomu, liczby duszków, liczby klatek menu i najdłuższej klatki menu.
+    """
+    results = []
+    for i in range(REPEAT):
+        script = SCRIPT % {"width": 800 if game else 768, "height": 600 if game else 768, "eager": mode == "eager", "game": game,
+            "menu": mode == "menu"}
+        output = subprocess.run([sys.executable, "-c", script], capture_output = True, text = True, check = True, env = os.environ)
+        results.append([float(value) for value in output.stdout.split()[-6:]])
+    return [statistics.median(column) for column in zip(*results)]
+
+def main():
+    print("%-8s %-6s %12s %14s %10s %10s %12s %14s" % ("program", "assets", "startup ms", "new game ms", "sprites", "in game",
+        "menu frames", "menu frame ms"))
+    for game, mode in ((True, "eager"), (True, "lazy"), (True, "menu"), (False, "eager"), (False, "lazy")):
+        startup, new_game, sprites, in_game, frames, longest = run(game, mode)
+        print("%-8s %-6s %12.1f %14s %10d %10s %12s %14s" % ("game" if game else "editor", mode, startup * 1000.0,
+            "%.1f" % (new_game * 1000.0) if game else "-", sprites, "%d" % in_game if game else "-",
+            "%d" % frames if mode == "menu" else "-", "%.1f" % (longest * 1000.0) if mode == "menu" else "-"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+﻿"""@package docstring
+Powtarzalny zestaw pomiarów wydajności najczęściej wykonywanych ścieżek gry na data/level.dat: odrysowania terenu,
+obiektów statycznych i całego środowiska wzdłuż stałej trasy kamery, Environment.update, Environment.findPath
+oraz wczytywania poziomu (TxtLevelLoader.load i BinaryLevelLoader.load). Wyniki wypisuje jako JSON, może je porównać z zapisanym wynikiem bazowym.
+Przykłady:
+python3 -m benchmarks.suite --output baseline.json
+python3 -m benchmarks.suite --baseline baseline.json --threshold 0.15
+Przy wykryciu regresji (mediana gorsza od bazowej o więcej niż threshold) kończy się kodem 1.
+"""
+
+from benchmarks import *
+from LevelLoader import *
+from Environment import *
+import argparse
+import json
+import os
+import platform
+import random as rng
+import statistics
+import sys
+import tempfile
+
+LEVEL_FILE = "data/level.dat"
+SEED = 2014
+REPEAT = 5
+CAMERA_FRAMES = 120
+CAMERA_RADIUS = 6.0
+UPDATE_TICKS = 200
+TIME_STEP = 0.01
+PATH_QUERIES = 100
+PATH_DISTANCE = int(Environment.FIND_PATH_MAX_DIST / sqrt(2)) # cel zawsze w zasięgu findPath
+
+def camera_path(center, frames = CAMERA_FRAMES, radius = CAMERA_RADIUS):
+    """Zwraca stałą trasę kamery: okrąg o promieniu radius wokół center, przebyty w frames klatkach."""
+    return [center + rotate2(vec2(0.0, radius), 2 * pi * i / frames) for i in range(frames)]
+
+def viewport_position(position, surface):
+    """Zwraca pozycję widoku (w pikselach) dla kamery w punkcie position, tak jak Environment.redraw."""
+    return (world_to_screen(position) - vec2(surface.get_size()) / 2).floor()
+
+def load_environment(level_file):
+    """Wczytuje poziom do nowego środowiska. Zwraca środowisko i loader."""
+    loader = TxtLevelLoader()
+    loader.load(level_file)
+    environment = Environment()
+    environment.load(loader)
+    return environment, loader
+
+def run_frames(function, path):
+    """Wywołuje function(indeks, pozycja kamery) dla każdej klatki trasy, zwraca średni czas klatki w sekundach."""
+    start = time.perf_counter()
+    for i, position in enumerate(path):
+        function(i, position)
+    return (time.perf_counter() - start) / len(path)
+
+def terrain_redraw(level_file, repeat):
+    environment, loader = load_environment(level_file)
+    terrain_grid = loader.get_terrain_grid()
+    path = camera_path(environment.get_players()[0].get_position())
+    redraw = lambda i, position: terrain_grid.redraw(SCREEN, viewport_position(position, SCREEN), i * TIME_STEP, False)
+    return [run_frames(redraw, path) for i in range(repeat)], len(path)
+
+def static_redraw(level_file, repeat):
+    environment, loader = load_environment(level_file)
+    static_objects = loader.get_static_objects()
+    path = camera_path(environment.get_players()[0].get_position())
+    redraw = lambda i, position: static_objects.redraw(SCREEN, viewport_position(position, SCREEN), [])
+    return [run_frames(redraw, path) for i in range(repeat)], len(path)
+
+def environment_redraw(level_file, repeat):
+    environment, loader = load_environment(level_file)
+    path = camera_path(environment.get_players()[0].get_position())
+    redraw = lambda i, position: environment.redraw(SCREEN, position, i * TIME_STEP, False)
+    return [run_frames(redraw, path) for i in range(repeat)], len(path)
+
+def environment_update(level_file, repeat):
+    results = []
+    for i in range(repeat):
+        environment, loader = load_environment(level_file)
+        rng.seed(SEED)
+        results.append(measure(lambda: [environment.update(TIME_STEP, tick * TIME_STEP) for tick in range(UPDATE_TICKS)]) / UPDATE_TICKS)
+    return results, UPDATE_TICKS
+
+def find_path(level_file, repeat):
+    environment, loader = load_environment(level_file)
+    generator = rng.Random(SEED)
+    size = loader.get_terrain_grid().get_size()
+    queries = []
+    while len(queries) < PATH_QUERIES:
+        start = generator.randrange(size.x), generator.randrange(size.y)
+        goal = start[0] + generator.randint(-PATH_DISTANCE, PATH_DISTANCE), start[1] + generator.randint(-PATH_DISTANCE, PATH_DISTANCE)
+        if environment.reachable(vec2(start)) and 0 <= goal[0] < size.x and 0 <= goal[1] < size.y and environment.reachable(vec2(goal)):
+            queries.append((start, goal))
+    results = []
+    for i in range(repeat):
+        environment.get_path_cache().clear()
+        results.append(measure(lambda: [environment.findPath(start, goal) for start, goal in queries]) / len(queries))
+    return results, len(queries)
+
+def level_load(level_file, repeat):
+    return [measure(lambda: TxtLevelLoader().load(level_file)) for i in range(repeat)], 1
+
+def binary_level_load(level_file, repeat):
+    handle, binary_file = tempfile.mkstemp(suffix = ".bin")
+    os.close(handle)
+    try:
+        convert_level(level_file, binary_file)
+        return [measure(lambda: BinaryLevelLoader().load(binary_file)) for i in range(repeat)], 1
+    finally:
+        os.remove(binary_file)
+
+CASES = [
+    ("terrain_redraw", terrain_redraw),
+    ("static_redraw", static_redraw),
+    ("environment_redraw", environment_redraw),
+    ("environment_update", environment_update),
+    ("find_path", find_path),
+    ("level_load", level_load),
+    ("binary_level_load", binary_level_load),
+]
+
+def run_suite(level_file, repeat, names = None):
+    """Wykonuje pomiary (wszystkie lub wymienione w names), zwraca słownik wyników gotowy do zapisu jako JSON."""
+    results = {}
+    for name, case in CASES:
+        if names and name not in names:
+            continue
+        times, iterations = case(level_file, repeat)
+        results[name] = {
+            "median_ms" : statistics.median(times) * 1000.0,
+            "mean_ms" : statistics.mean(times) * 1000.0,
+            "min_ms" : min(times) * 1000.0,
+            "iterations" : iterations,
+            "repeat" : repeat }
+    return {
+        "meta" : {
+            "level" : level_file,
+            "seed" : SEED,
+            "python" : platform.python_version(),
+            "pygame" : pygame.version.ver,
+            "machine" : platform.machine() },
+        "results" : results }
+
+def compare(current, baseline, threshold):
+    """Porównuje mediany z wynikiem bazowym. Zwraca listę (nazwa, mediana bazowa, mediana, stosunek, czy regresja)."""
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["median_ms"] / max(base["median_ms"], 1e-9)
+        rows.append((name, base["median_ms"], result["median_ms"], ratio, ratio > 1.0 + threshold))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmark suite of the render and update hot paths.")
+    parser.add_argument("--level", default = LEVEL_FILE, help = "level file (txt format)")
+    parser.add_argument("--repeat", type = int, default = REPEAT, help = "number of repetitions of every case")
+    parser.add_argument("--case", action = "append", help = "run only the given case (may be repeated)")
+    parser.add_argument("--output", help = "write JSON results to the file")
+    parser.add_argument("--baseline", help = "compare with JSON results stored in the file")
+    parser.add_argument("--threshold", type = float, default = 0.1, help = "allowed relative slowdown of the median (default 0.1)")
+    args = parser.parse_args()
+
+    results = run_suite(args.level, args.repeat, args.case)
+    text = json.dumps(results, indent = 2, sort_keys = True)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+        rows = compare(results, baseline, args.threshold)
+        print("%-20s %12s %12s %8s" % ("case", "baseline ms", "current ms", "ratio"), file = sys.stderr)
+        for name, base, current, ratio, regression in rows:
+            print("%-20s %12.3f %12.3f %8.2f%s" % (name, base, current, ratio, "  REGRESSION" if regression else ""), file = sys.stderr)
+        if any(row[4] for row in rows):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
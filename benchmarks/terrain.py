@@ -0,0 +1,103 @@
+﻿"""@package docstring
+Porównuje budowanie siatki terenu kafel po kaflu (TerrainGrid.set_tile, przejścia liczone dla sąsiedztwa 3x3 przy każdym wywołaniu)
+z budowaniem hurtowym (TerrainGrid.set_tiles, przejścia liczone raz dla całej siatki). Sprawdza, że obie drogi dają identyczne
+przejścia dla data/level.dat, dla losowych siatek (także z kaflami o równych priorytetach) i po zmianie rozmiaru siatki.
+"""
+
+from benchmarks import *
+from LevelLoader import *
+import random as rng
+
+LEVEL_FILE = "data/level.dat"
+NUM_RANDOM_GRIDS = 20
+SEED = 2014
+
+def describe(terrain_grid):
+    """Zwraca porównywalny opis pól siatki (nazwy duszków, przejścia, flagi) i mapy osiągalności."""
+    size = terrain_grid.get_size()
+    fields = []
+    for y in range(size.y):
+        for x in range(size.x):
+            tile, adjacents, flags = terrain_grid._fields[y][x]
+            fields.append((tile.get_file_name(), tuple((a.get_file_name(), mask) for a, mask in adjacents), bool(flags)))
+    return fields, bytes(terrain_grid.get_walkability()[0])
+
+def build_per_tile(size, sprites, indices, flags):
+    """Buduje siatkę wywołując set_tile i set_flags dla każdego kafla."""
+    terrain_grid = TerrainGrid()
+    terrain_grid.set_size(size)
+    for y in range(size.y):
+        for x in range(size.x):
+            terrain_grid.set_tile(vec2(x, y), sprites[indices[y * size.x + x]])
+            terrain_grid.set_flags(vec2(x, y), flags[y * size.x + x])
+    return terrain_grid
+
+def build_bulk(size, sprites, indices, flags):
+    """Buduje siatkę jednym wywołaniem set_tiles."""
+    terrain_grid = TerrainGrid()
+    terrain_grid.set_size(size)
+    terrain_grid.set_tiles(sprites, indices, flags)
+    return terrain_grid
+
+def level_tiles(terrain_grid, sprites):
+    """Zwraca płaskie tablice indeksów i flag kafli siatki."""
+    size = terrain_grid.get_size()
+    numbers = {id(sprite) : i for i, sprite in enumerate(sprites)}
+    indices = [numbers[id(terrain_grid.get_tile(vec2(x, y)))] for y in range(size.y) for x in range(size.x)]
+    flags = [bool(terrain_grid.get_flags(vec2(x, y))) for y in range(size.y) for x in range(size.x)]
+    return indices, flags
+
+def random_sprites(generator, number):
+    """Tworzy puste duszki o losowych (często równych) priorytetach."""
+    sprites = []
+    for i in range(number):
+        sprite = TileSprite("<empty>")
+        sprite._file_name = "sprite" + str(i)
+        sprite.set_priority(generator.randint(0, 3))
+        sprites.append(sprite)
+    return sprites
+
+def check_random(generator):
+    """Zwraca liczbę losowych siatek, dla których set_tiles lub set_size daje inne przejścia niż droga kafel po kaflu."""
+    failures = 0
+    for i in range(NUM_RANDOM_GRIDS):
+        size = vec2(generator.randint(1, 24), generator.randint(1, 24))
+        sprites = random_sprites(generator, generator.randint(1, 6))
+        sprites.append(sprites[0]) # ten sam duszek pod dwoma indeksami
+        indices = [generator.randrange(len(sprites)) for j in range(size.x * size.y)]
+        flags = [generator.random() < 0.2 for j in range(size.x * size.y)]
+        bulk = build_bulk(size, sprites, indices, flags)
+        if describe(bulk) != describe(build_per_tile(size, sprites, indices, flags)):
+            failures += 1
+
+        bulk.set_size(vec2(generator.randint(1, 30), generator.randint(1, 30)))
+        expected = describe(bulk)
+        for y in range(bulk.get_size().y):
+            for x in range(bulk.get_size().x):
+                bulk._update(x, y)
+        if describe(bulk) != expected:
+            failures += 1
+    return failures
+
+def main():
+    loader = TxtLevelLoader()
+    loader.load(LEVEL_FILE)
+    size = loader.get_terrain_grid().get_size()
+    sprites = loader.get_terrain_grid_sprites() + [loader.get_terrain_grid().get_tile(vec2(0, 0))]
+    indices, flags = level_tiles(loader.get_terrain_grid(), sprites)
+
+    per_tile_time = measure(lambda: build_per_tile(size, sprites, indices, flags))
+    bulk_time = measure(lambda: build_bulk(size, sprites, indices, flags), 3)
+    resize_time = measure(lambda: loader.get_terrain_grid().set_size(size), 3)
+
+    assert describe(build_bulk(size, sprites, indices, flags)) == describe(build_per_tile(size, sprites, indices, flags)), "set_tiles differs from set_tile on " + LEVEL_FILE
+    assert describe(loader.get_terrain_grid()) == describe(build_per_tile(size, sprites, indices, flags)), "TxtLevelLoader differs from set_tile on " + LEVEL_FILE
+    failures = check_random(rng.Random(SEED))
+    assert failures == 0, "%d random grids differ" % failures
+
+    print("grid %dx%d: per tile %.1f ms, bulk %.1f ms (speedup %.1f), set_size %.1f ms" % (size.x, size.y,
+        per_tile_time * 1000.0, bulk_time * 1000.0, per_tile_time / bulk_time, resize_time * 1000.0))
+    print("equivalence: %s and %d random grids match" % (LEVEL_FILE, NUM_RANDOM_GRIDS))
+
+if __name__ == "__main__":
+    main()
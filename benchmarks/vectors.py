@@ -0,0 +1,203 @@
+﻿"""@package docstring
+Mikrotesty wydajności klasy vec2 dla operacji używanych przez grę, w porównaniu z poprzednią implementacją (LegacyVec2).
+Przed pomiarem sprawdza, że publiczny interfejs vec2 się nie zmienił: wszystkie metody poprzedniej implementacji istnieją
+i dają te same wyniki, a vec2 nadal jest niehaszowalny.
+"""
+
+from benchmarks import *
+import timeit
+
+NUMBER = 200000
+
+class LegacyVec2:
+    """Kopia vec2 sprzed wprowadzenia __slots__ i operatorów działających w miejscu."""
+    def __init__(self, x = 0, y = 0):
+        if isinstance(x, tuple):
+            self.x = x[0]
+            self.y = x[1]
+            return
+        if isinstance(x, LegacyVec2):
+            self.x = x.x
+            self.y = x.y
+            return
+        self.x = x
+        self.y = y
+
+    def __add__(a, b):
+        return LegacyVec2(a.x + b.x, a.y + b.y)
+
+    def __sub__(a, b):
+        return LegacyVec2(a.x - b.x, a.y - b.y)
+
+    def __mul__(a, b):
+        if isinstance(b, LegacyVec2):
+            return LegacyVec2(a.x * b.x, a.y * b.y)
+        else:
+            return LegacyVec2(a.x * b, a.y * b)
+
+    def __truediv__(a, b):
+        if isinstance(b, LegacyVec2):
+            return LegacyVec2(a.x / b.x, a.y / b.y)
+        else:
+            return LegacyVec2(a.x / b, a.y / b)
+
+    def __floordiv__(a, b):
+        if isinstance(b, LegacyVec2):
+            return LegacyVec2(a.x // b.x, a.y // b.y)
+        else:
+            return LegacyVec2(a.x // b, a.y // b)
+
+    def __pos__(a):
+        return LegacyVec2(+a.x, +a.y)
+
+    def __neg__(a):
+        return LegacyVec2(-a.x, -a.y)
+
+    def __eq__(a, b):
+        return a.x == b.x and a.y == b.y
+
+    def __ne__(a, b):
+        return a.x != b.x or a.y != b.y
+
+    def __setitem__(self, index, value):
+        if index == 0:
+            self.x = value
+        else:
+            self.y = value
+
+    def __getitem__(self, index):
+        if index == 0:
+            return self.x
+        else:
+            return self.y
+
+    def __str__(self):
+        return "[" + str(self.x) + ", " + str(self.y) + "]"
+
+    def __repr__(self):
+        return "[" + str(self.x) + ", " + str(self.y) + "]"
+
+    def couple(self):
+        return self.x, self.y
+
+    def lengthsq(self):
+        return self.x * self.x + self.y * self.y
+
+    def length(self):
+        return sqrt(self.x * self.x + self.y * self.y)
+
+    def normal(self):
+        inv = 1.0 / self.length()
+        return LegacyVec2(self.x * inv, self.y * inv)
+
+    def intcpl(self):
+        return int(self.x), int(self.y)
+
+    def floor(self):
+        return LegacyVec2(floor(self.x), floor(self.y))
+
+    def ceil(self):
+        return LegacyVec2(ceil(self.x), ceil(self.y))
+
+    def ifloor(self):
+        return LegacyVec2(int(self.x), int(self.y))
+
+    def iceil(self):
+        return LegacyVec2(int(self.x + 1.0), int(self.y + 1.0))
+
+    def abs(self):
+        return LegacyVec2(abs(self.x), abs(self.y))
+
+    def copy(self):
+        return LegacyVec2(self.x, self.y)
+
+OPERATIONS = [
+    ("vec2(x, y)", lambda v, a, b: v(1.5, -2.25)),
+    ("vec2(tuple)", lambda v, a, b: v((3, 4))),
+    ("vec2(vec2)", lambda v, a, b: v(a)),
+    ("a + b", lambda v, a, b: a + b),
+    ("a - b", lambda v, a, b: a - b),
+    ("a * 2.5", lambda v, a, b: a * 2.5),
+    ("a * b", lambda v, a, b: a * b),
+    ("a / 2.0", lambda v, a, b: a / 2.0),
+    ("a // b", lambda v, a, b: a // b),
+    ("-a", lambda v, a, b: -a),
+    ("+a", lambda v, a, b: +a),
+    ("a == b", lambda v, a, b: a == b),
+    ("a != b", lambda v, a, b: a != b),
+    ("a[0], a[1]", lambda v, a, b: (a[0], a[1])),
+    ("str(a)", lambda v, a, b: str(a)),
+    ("a.couple()", lambda v, a, b: a.couple()),
+    ("a.lengthsq()", lambda v, a, b: a.lengthsq()),
+    ("a.length()", lambda v, a, b: a.length()),
+    ("a.normal()", lambda v, a, b: a.normal()),
+    ("a.intcpl()", lambda v, a, b: a.intcpl()),
+    ("a.floor()", lambda v, a, b: a.floor()),
+    ("a.ceil()", lambda v, a, b: a.ceil()),
+    ("a.ifloor()", lambda v, a, b: a.ifloor()),
+    ("a.iceil()", lambda v, a, b: a.iceil()),
+    ("a.abs()", lambda v, a, b: a.abs()),
+    ("a.copy()", lambda v, a, b: a.copy()),
+    ("pos + dir * s", lambda v, a, b: a + b * 0.25),
+    ("(a - b).lengthsq()", lambda v, a, b: (a - b).lengthsq()),
+]
+
+def plain(value):
+    """Zamienia wynik operacji na porównywalną wartość (wektory na krotki)."""
+    if isinstance(value, (vec2, LegacyVec2)):
+        return ("vec2", value.x, value.y)
+    if isinstance(value, tuple):
+        return tuple(plain(x) for x in value)
+    return value
+
+def check_api():
+    """Zwraca listę niezgodności interfejsu vec2 z poprzednią implementacją."""
+    errors = []
+    for name in dir(LegacyVec2):
+        if not name.startswith("__") or name in ("__init__", "__add__", "__sub__", "__mul__", "__truediv__", "__floordiv__", "__pos__", "__neg__", "__eq__", "__ne__", "__setitem__", "__getitem__", "__str__", "__repr__"):
+            if not hasattr(vec2, name):
+                errors.append("missing " + name)
+    for a, b in [((1.5, -2.25), (0.5, 4.0)), ((3, 4), (3, 4)), ((-7, 2), (2, -3))]:
+        for name, operation in OPERATIONS:
+            result = plain(operation(vec2, vec2(a), vec2(b)))
+            expected = plain(operation(LegacyVec2, LegacyVec2(a), LegacyVec2(b)))
+            if result != expected:
+                errors.append("%s: %s != %s" % (name, result, expected))
+    if vec2.__hash__ is not None:
+        errors.append("vec2 became hashable")
+    first = vec2(1, 2)
+    alias = first
+    alias += vec2(1, 1)
+    alias *= 2
+    alias -= vec2(0, 1)
+    if first is not alias or first != vec2(4, 5):
+        errors.append("in-place operators do not modify the vector")
+    if vec2(1, 2).add_scaled(vec2(2, 3), 0.5) != vec2(2, 3.5) or vec2().set(3, 4).distsq(vec2()) != 25:
+        errors.append("scalar helpers")
+    return errors
+
+def main():
+    errors = check_api()
+    assert errors == [], errors
+    print("%-20s %12s %12s %10s" % ("operation", "legacy ns", "vec2 ns", "speedup"))
+    for name, operation in OPERATIONS:
+        times = []
+        for cls in (LegacyVec2, vec2):
+            a, b = cls(1.5, -2.25), cls(0.5, 4.0)
+            times.append(timeit.timeit(lambda: operation(cls, a, b), number = NUMBER) / NUMBER * 1e9)
+        print("%-20s %12.1f %12.1f %10.2f" % (name, times[0], times[1], times[0] / times[1]))
+
+    legacy_position, legacy_direction = LegacyVec2(1.5, -2.25), LegacyVec2(0.5, 4.0)
+    position, direction = vec2(1.5, -2.25), vec2(0.5, 4.0)
+    def legacy_step():
+        nonlocal legacy_position
+        legacy_position = legacy_position + legacy_direction * 0.25
+    def step():
+        nonlocal position
+        position = position + direction * 0.25
+    in_place = lambda: position.add_scaled(direction, 0.25)
+    times = [timeit.timeit(function, number = NUMBER) / NUMBER * 1e9 for function in (legacy_step, step, in_place)]
+    print("%-20s %12.1f %12.1f %10.2f (add_scaled: %.1f ns)" % ("p = p + d * s", times[0], times[1], times[0] / times[1], times[2]))
+
+if __name__ == "__main__":
+    main()
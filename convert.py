@@ -111,6 +111,7 @@ while not quit:
         print('Defaults: frame_time 1000, width 64, height 48.')
         print('tile "<src paths>" "<dest path>" <priority> [frame_time (ms)] [tile_width] [tile_height] - converts tile sprite')
         print('object "<folder path>" [vertical offset] [frame_time] - converts object sprite')
+        print('level "<src path>" "<dest path>" - converts text level to the binary format')
         print('exit - exits')
     elif command.startswith("tile"):
         paths = extrude_paths(command)
@@ -164,6 +165,21 @@ while not quit:
                 succeded = False
             if succeded:
                 print("SUCCEDED")
+    elif command.startswith("level"):
+        paths = extrude_paths(command)
+        if len(paths) != 2:
+            print("Source and destination path have to be specified!")
+        else:
+            print("Converting level... ", end = "")
+            succeded = True
+            try:
+                from LevelLoader import convert_level
+                convert_level(paths[0], paths[1])
+            except:
+                print("FAILED")
+                succeded = False
+            if succeded:
+                print("SUCCEDED")
     elif command.startswith("exit"):
         quit = True
     else:
@@ -158,6 +158,10 @@ class EditorGUI:
         self._command_line = message
         self._message = True
 
+    def get_areas(self):
+        """Zwraca obszary ekranu zajmowane przez GUI."""
+        return [self._left_area, self._right_area, self._bottom_area]
+
     def _gui_hit(self, position):
         return region_hit(self._left_area, position) or region_hit(self._right_area, position) or region_hit(self._bottom_area, position)
 
@@ -186,6 +190,8 @@ class Editor(GameStage):
         self._brush_world_pos = vec2(0, 0)
         self._brush_size = 1
         self._brush_tint = create_color_mask(TILE_SIZE, (0, 0, 255, 127))
+        self._brush_rects = []
+        self.set_dirty_rects(True)
 
         self._terrain_grid_sprites = []
         self._static_object_sprites = []
@@ -233,17 +239,26 @@ class Editor(GameStage):
         return self._exit
 
     def on_redraw(self, surface, delta, current):
-        """Odrysowanie stanu edytora."""
+        """Odrysowanie stanu edytora. Zwraca zmienione obszary ekranu albo None, jeśli zmienił się cały ekran."""
         self._environment.redraw(surface, self._position, current, self._editor_gui.get_collision())
 
+        brush_rects = []
         if self._brush_visible and not self._rmb_drag and self._editor_gui.get_edit_mode() != EDIT_MODE_DYNAMIC:
             first = -self._brush_size // 2 + 1
             last = first + self._brush_size
             for v in self._brush_viewport():
-                surface.blit(self._brush_tint, v.intcpl())
+                brush_rects.append(surface.blit(self._brush_tint, v.intcpl()))
+        if brush_rects != []:
+            brush_rects = [brush_rects[0].unionall(brush_rects[1:])]
 
         self._editor_gui.redraw(surface)
 
+        rects = self._environment.get_dirty_rects()
+        if rects != None:
+            rects += self._brush_rects + brush_rects + self._editor_gui.get_areas()
+        self._brush_rects = brush_rects
+        return rects
+
     def _edit(self):
         edit_mode = self._editor_gui.get_edit_mode()
         if edit_mode == EDIT_MODE_STATIC and len(self._static_object_sprites) > 0:
@@ -255,20 +270,15 @@ class Editor(GameStage):
                 self._environment._static_objects.add_objects(position, size, self._static_object_sprites[self._editor_gui.get_left_index()], 1)
         elif edit_mode == EDIT_MODE_DYNAMIC:
             if self._editor_gui.get_left_delete():
-                i, s = 0, len(self._environment._dynamic_objects)
-                while i < s:
-                    if self._environment._dynamic_objects[i].hit_test(self._brush_world_pos):
-                        del self._environment._dynamic_objects[i]
-                        s -= 1
-                    else:
-                        i += 1
+                for object in [x for x in self._environment._dynamic_objects if x.hit_test(self._brush_world_pos)]:
+                    self._environment.remove_object(object)
             else:
                 object = DYNAMIC_OBJECTS[self._editor_gui.get_left_index()]()
                 object.set_position(self._brush_world_pos.copy())
                 object.set_environment(self._environment)
                 if isinstance(object, PlayerObject):
                     self._environment._players.append(object)
-                self._environment._dynamic_objects.append(object)
+                self._environment.add_object(object)
         elif edit_mode == EDIT_MODE_TERRAIN and self._terrain_grid_sprites != []:
             terrain_grid_size = self._environment._terrain_grid.get_size()
             for v in self._brush_world():
@@ -283,9 +293,9 @@ class Editor(GameStage):
     def _exec(self, command):
         if command.startswith("load "):
             paths = extrude_paths(command)
-            loader = TxtLevelLoader()
             result = True
             try:
+                loader = create_level_loader(paths[0])
                 loader.load(paths[0])
             except:
                 result = False
@@ -302,7 +312,7 @@ class Editor(GameStage):
 
         elif command.startswith("save "):
             paths = extrude_paths(command)
-            loader = TxtLevelLoader()
+            loader = BinaryLevelLoader() if paths[0].endswith(".bin") else TxtLevelLoader()
             self._environment.save(loader)
             result = True
             try:
@@ -319,7 +329,7 @@ class Editor(GameStage):
             objects = []
             try:
                 for path in paths:
-                    objects.append(ObjectSprite(path))
+                    objects.append(load_object_sprite(path))
             except:
                 objects = []
 
@@ -335,7 +345,7 @@ class Editor(GameStage):
             tiles = []
             try:
                 for path in paths:
-                    tiles.append(TileSprite(path))
+                    tiles.append(load_tile_sprite(path))
             except:
                 tiles = []
 
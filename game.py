@@ -1,6 +1,38 @@
-﻿from utilities import *
+﻿"""@package docstring
+Uruchamia grę. Rozdzielczość, tryb pełnoekranowy i skalę renderowania można podać w wierszu poleceń, np.:
+python3 game.py --resolution 1920x1080 --render-scale 0.5
+python3 game.py --fullscreen --render-scale 0.25
+"""
+
+from utilities import *
+import argparse
+
+def resolution(text):
+    """Zamienia napis w postaci SZEROKOŚĆxWYSOKOŚĆ na wektor."""
+    try:
+        width, height = [int(value) for value in text.lower().split("x")]
+    except ValueError:
+        raise argparse.ArgumentTypeError("resolution must be in WIDTHxHEIGHT format, got '%s'" % text)
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError("resolution must be positive, got '%s'" % text)
+    return vec2(width, height)
+
+def render_scale(text):
+    """Zamienia napis na skalę renderowania z przedziału (0, 1]."""
+    scale = float(text)
+    if not 0.0 < scale <= 1.0:
+        raise argparse.ArgumentTypeError("render scale must be in (0, 1], got '%s'" % text)
+    return scale
+
+parser = argparse.ArgumentParser(description = "Isometric hack'n'slash game.")
+parser.add_argument("--resolution", type = resolution, default = vec2(800, 600), help = "window size in WIDTHxHEIGHT format")
+parser.add_argument("--fullscreen", action = "store_true", help = "run in fullscreen at the desktop resolution")
+parser.add_argument("--render-scale", type = render_scale, default = 1.0,
+    help = "the game is drawn at the screen size multiplied by this factor and scaled to the screen")
+args = parser.parse_args()
+
 Issue20891_workaround()
-screen = initialize_pygame(vec2(800, 600), False)
+screen = initialize_pygame(args.resolution, args.fullscreen)
 from Gameplay import *
 from Environment import *
 
@@ -11,6 +43,8 @@ main_menu = MainMenu(screen, gameplay, hall_of_fame, credits)
 gameplay.set_main_menu(main_menu)
 gameplay.set_hall_of_fame(hall_of_fame)
 hall_of_fame.set_main_menu(main_menu)
+for stage in (gameplay, hall_of_fame, main_menu):
+    stage.set_render_scale(args.render_scale)
 
 current_stage = main_menu
 while current_stage != None:
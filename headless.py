@@ -0,0 +1,138 @@
+﻿"""@package docstring
+Uruchamia symulację gry (Environment.update, stany AI, pociski) bez okna i bez odrysowywania, ze "sztucznym" graczem
+sterowanym skryptem wejścia. Wykonuje zadaną liczbę kroków o stałej długości tak szybko jak się da i wypisuje liczbę kroków na sekundę.
+Przykład:
+python3 headless.py --ticks 10000 --level data/level.dat --seed 7
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from utilities import *
+Issue20891_workaround()
+initialize_pygame(vec2(1, 1), False)
+from LevelLoader import *
+from Environment import *
+from Gameplay import SPELL_NAMES
+import argparse
+import random as rng
+import time
+
+TIME_STEP = 0.01
+WALK_INTERVAL = 150
+CAST_INTERVAL = 70
+WALK_RADIUS = 8
+CAST_RADIUS = 10
+SHIELD_HEALTH = 0.5
+
+class InputScript:
+    """
+    Syntetyczne wejście gracza: co WALK_INTERVAL kroków idzie w losowe osiągalne miejsce w pobliżu,
+    co CAST_INTERVAL kroków rzuca losowe zaklęcie w najbliższego potwora, przy małym zdrowiu stawia tarczę.
+    Decyzje zależą tylko od ziarna generatora, więc przebieg jest powtarzalny.
+    """
+
+    def __init__(self, seed):
+        self._generator = rng.Random(seed)
+
+    def step(self, tick, environment, player):
+        """Wydaje polecenia graczowi w kroku tick."""
+        if tick % WALK_INTERVAL == 0:
+            position = player.get_position()
+            target = position + vec2(self._generator.uniform(-WALK_RADIUS, WALK_RADIUS), self._generator.uniform(-WALK_RADIUS, WALK_RADIUS))
+            size = environment._terrain_grid.get_size()
+            if 0 <= target.x < size.x and 0 <= target.y < size.y and environment.is_reachable(target.ifloor()):
+                player.goto(target)
+        if tick % CAST_INTERVAL == 0:
+            if player._health < SHIELD_HEALTH:
+                player.cast(self._generator.choice(["water_shield", "fire_shield", "air_shield", "earth_shield"]), None)
+            else:
+                enemy = self._nearest_enemy(environment, player)
+                if enemy != None:
+                    player.cast(self._generator.choice(SPELL_NAMES), enemy)
+
+    def _nearest_enemy(self, environment, player):
+        position = player.get_position()
+        nearest, nearest_sq = None, CAST_RADIUS * CAST_RADIUS
+        for object in environment.collidable(position, CAST_RADIUS):
+            distance_sq = position.distsq(object.get_position())
+            if isinstance(object, Orc) and not object.dead and distance_sq < nearest_sq:
+                nearest, nearest_sq = object, distance_sq
+        return nearest
+
+class HeadlessRunner:
+    """Wczytuje poziom i wykonuje kroki symulacji bez odrysowywania. Po śmierci gracza lub wybiciu potworów wczytuje poziom od nowa."""
+
+    def __init__(self, level_file, seed = 0, time_step = TIME_STEP):
+        self._level_file = level_file
+        self._time_step = time_step
+        self._script = InputScript(seed)
+        self._environment = Environment()
+        self._ticks = 0
+        self._rounds = 0
+        self._deaths = 0
+        self._score = 0
+        rng.seed(seed)
+        self._load()
+
+    def run(self, ticks):
+        """Wykonuje ticks kroków, zwraca czas trwania w sekundach."""
+        start = time.perf_counter()
+        for i in range(ticks):
+            self.step()
+        return time.perf_counter() - start
+
+    def step(self):
+        """Wykonuje jeden krok symulacji."""
+        current = self._ticks * self._time_step
+        self._script.step(self._ticks, self._environment, self._player)
+        self._environment.update(self._time_step, current)
+        self._ticks += 1
+        if self._player.is_dead() or self._environment.is_clear():
+            self._rounds += 1
+            self._deaths += self._player.is_dead()
+            self._score += self._player.get_score()
+            self._load()
+
+    def get_environment(self):
+        """Zwraca symulowane środowisko."""
+        return self._environment
+
+    def get_ticks(self):
+        """Zwraca liczbę wykonanych kroków."""
+        return self._ticks
+
+    def get_summary(self):
+        """Zwraca słownik ze stanem symulacji (liczba kroków, rozegranych rund, śmierci gracza, punktów i obiektów)."""
+        return {
+            "ticks" : self._ticks,
+            "rounds" : self._rounds,
+            "deaths" : self._deaths,
+            "score" : self._score + self._player.get_score(),
+            "objects" : len(self._environment.collidable()),
+            "health" : self._player._health }
+
+    def _load(self):
+        loader = create_level_loader(self._level_file)
+        loader.load(self._level_file)
+        self._environment.load(loader)
+        self._player = self._environment.get_players()[0]
+
+def main():
+    parser = argparse.ArgumentParser(description = "Headless simulation of the game, reports ticks per second.")
+    parser.add_argument("--level", default = "data/level.dat", help = "level file (txt or binary format)")
+    parser.add_argument("--ticks", type = int, default = 5000, help = "number of simulation steps")
+    parser.add_argument("--seed", type = int, default = 0, help = "seed of the synthetic input script")
+    parser.add_argument("--step", type = float, default = TIME_STEP, help = "length of a simulation step in seconds")
+    args = parser.parse_args()
+
+    runner = HeadlessRunner(args.level, args.seed, args.step)
+    elapsed = runner.run(args.ticks)
+    summary = runner.get_summary()
+    print("ticks: %d, elapsed: %.2f s, ticks per second: %.1f" % (summary["ticks"], elapsed, summary["ticks"] / max(elapsed, 1e-9)))
+    print("rounds: %d, deaths: %d, score: %d, objects: %d, health: %.2f" % (summary["rounds"], summary["deaths"], summary["score"], summary["objects"], summary["health"]))
+
+if __name__ == "__main__":
+    main()
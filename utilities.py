@@ -14,53 +14,107 @@ from pygame.locals import *
 from pygame import transform
 from collections import namedtuple
 import threading
+import weakref
+import hashlib
+import os
+import numpy
+import pygame.surfarray
+
+_new_object = object.__new__
 
 class vec2:
     """
     Klasa wektora, reprezentuje wektor lub punkt w przestrzeni dwuwymiarowej.
     Przeciąża podstawowe operatory (+, -, *, /, //), w konsturktorze pobiera współrzędne x i y lub parę (krotkę).
+    Operatory +=, -= i *= modyfikują wektor w miejscu (nie tworzą nowego obiektu), więc przed ich użyciem
+    na wektorze współdzielonym z innym obiektem (np. pozycji zwróconej przez get_position) trzeba zrobić kopię.
     """
+    __slots__ = ("x", "y")
+
     def __init__(self, x = 0, y = 0):
-        if isinstance(x, tuple):
+        cls = x.__class__
+        if cls is float or cls is int:
+            self.x = x
+            self.y = y
+        elif isinstance(x, tuple):
             self.x = x[0]
             self.y = x[1]
-            return
-        if isinstance(x, vec2):
+        elif isinstance(x, vec2):
             self.x = x.x
             self.y = x.y
-            return
-        self.x = x
-        self.y = y
+        else:
+            self.x = x
+            self.y = y
 
     def __add__(a, b):
-        return vec2(a.x + b.x, a.y + b.y)
+        result = _new_object(vec2)
+        result.x = a.x + b.x
+        result.y = a.y + b.y
+        return result
 
     def __sub__(a, b):
-        return vec2(a.x - b.x, a.y - b.y)
+        result = _new_object(vec2)
+        result.x = a.x - b.x
+        result.y = a.y - b.y
+        return result
 
     def __mul__(a, b):
+        result = _new_object(vec2)
         if isinstance(b, vec2):
-            return vec2(a.x * b.x, a.y * b.y)
+            result.x = a.x * b.x
+            result.y = a.y * b.y
         else:
-            return vec2(a.x * b, a.y * b)
+            result.x = a.x * b
+            result.y = a.y * b
+        return result
 
     def __truediv__(a, b):
+        result = _new_object(vec2)
         if isinstance(b, vec2):
-            return vec2(a.x / b.x, a.y / b.y)
+            result.x = a.x / b.x
+            result.y = a.y / b.y
         else:
-            return vec2(a.x / b, a.y / b)
+            result.x = a.x / b
+            result.y = a.y / b
+        return result
 
     def __floordiv__(a, b):
+        result = _new_object(vec2)
         if isinstance(b, vec2):
-            return vec2(a.x // b.x, a.y // b.y)
+            result.x = a.x // b.x
+            result.y = a.y // b.y
         else:
-            return vec2(a.x // b, a.y // b)
+            result.x = a.x // b
+            result.y = a.y // b
+        return result
+
+    def __iadd__(a, b):
+        a.x += b.x
+        a.y += b.y
+        return a
+
+    def __isub__(a, b):
+        a.x -= b.x
+        a.y -= b.y
+        return a
+
+    def __imul__(a, b):
+        if isinstance(b, vec2):
+            a.x *= b.x
+            a.y *= b.y
+        else:
+            a.x *= b
+            a.y *= b
+        return a
 
     def __pos__(a):
         return vec2(+a.x, +a.y)
 
     def __neg__(a):
-        return vec2(-a.x, -a.y)
+        result = _new_object(vec2)
+        result.x = -a.x
+        result.y = -a.y
+        return result
 
     def __eq__(a, b):
         return a.x == b.x and a.y == b.y
@@ -100,8 +154,11 @@ class vec2:
 
     def normal(self):
         """Zwraca wektor normalny. UWAGA: Nie sprawdza czy wektor jest zerowy!"""
-        inv = 1.0 / self.length()
-        return vec2(self.x * inv, self.y * inv)
+        inv = 1.0 / sqrt(self.x * self.x + self.y * self.y)
+        result = _new_object(vec2)
+        result.x = self.x * inv
+        result.y = self.y * inv
+        return result
 
     def intcpl(self):
         """
@@ -132,7 +189,28 @@ class vec2:
 
     def copy(self):
         """Zwraca głęboką kopię wektora. Konieczne gdy chcemy uniknąć skopiowania referencji."""
-        return vec2(self.x, self.y)
+        result = _new_object(vec2)
+        result.x = self.x
+        result.y = self.y
+        return result
+
+    def set(self, x, y):
+        """Ustawia współrzędne wektora w miejscu. Zwraca wektor."""
+        self.x = x
+        self.y = y
+        return self
+
+    def add_scaled(self, other, factor):
+        """Dodaje w miejscu wektor other pomnożony przez liczbę factor (self += other * factor bez tymczasowego wektora). Zwraca wektor."""
+        self.x += other.x * factor
+        self.y += other.y * factor
+        return self
+
+    def distsq(self, other):
+        """Zwraca kwadrat odległości od punktu other (bez tworzenia wektora różnicy)."""
+        x = self.x - other.x
+        y = self.y - other.y
+        return x * x + y * y
 
 def rotate2(vector, angle):
     """Obraca wektor o zadany kąt. Wektor powinien być znormalizowany. Kąt w radianach."""
@@ -202,9 +280,68 @@ def screen_to_world(screen):
     """Konwertuje współrzędne z przestrzeni ekranu do przestrzeni świata."""
     return INV_BASE_X * screen.x + INV_BASE_Y * screen.y
 
+def visible_spans(screen_min, screen_max, grid_size, cell_size = 1):
+    """
+    Zwraca listę krotek (wiersz, pierwsza kolumna, kolumna za ostatnią) komórek siatki o rozmiarze grid_size (w komórkach),
+    których obraz w przestrzeni ekranu (world_to_screen) przecina prostokąt od screen_min do screen_max. Komórka (x, y) to
+    kwadrat świata od (x, y) * cell_size do (x + 1, y + 1) * cell_size. Przedziały są przycięte do siatki, wiersze rosnące,
+    puste wiersze pominięte. Krańce wiersza są wyznaczane z niewielkim zapasem, więc mogą zawierać komórki, które
+    tylko dotykają prostokąta.
+    """
+    grid_x, grid_y = int(grid_size[0]), int(grid_size[1])
+    corners = [screen_to_world(vec2(x, y)) for x in (screen_min[0], screen_max[0]) for y in (screen_min[1], screen_max[1])]
+    first_row = max(floor(min(corner.y for corner in corners) / cell_size), 0)
+    last_row = min(floor(max(corner.y for corner in corners) / cell_size), grid_y - 1)
+    constraints = ((BASE_X.x, BASE_Y.x, screen_min[0], screen_max[0]), (BASE_X.y, BASE_Y.y, screen_min[1], screen_max[1]))
+    spans = []
+    for row in range(first_row, last_row + 1):
+        low, high = 0.0, grid_x * cell_size
+        world_y0, world_y1 = row * cell_size, (row + 1) * cell_size
+        for base_x, base_y, screen_low, screen_high in constraints:
+            # screen_low <= base_x * x + base_y * y <= screen_high dla pewnego y z wiersza
+            shift_low, shift_high = min(base_y * world_y0, base_y * world_y1), max(base_y * world_y0, base_y * world_y1)
+            if base_x > 0:
+                low, high = max(low, (screen_low - shift_high) / base_x), min(high, (screen_high - shift_low) / base_x)
+            elif base_x < 0:
+                low, high = max(low, (screen_high - shift_low) / base_x), min(high, (screen_low - shift_high) / base_x)
+            elif screen_low > shift_high or screen_high < shift_low:
+                high = -1.0
+        if low <= high:
+            start, end = max(floor(low / cell_size), 0), min(floor(high / cell_size) + 1, grid_x)
+            if start < end:
+                spans.append((row, start, end))
+    return spans
+
+CACHE_DIR = "data/cache"
+GENERATED_VERSION = 1   # zwiększyć po zmianie generatorów zapamiętywanych przez load_generated
+
+_PENDING_ASSETS = weakref.WeakSet()
+_ASSETS = weakref.WeakSet()
+
+def prepare_asset(asset):
+    """
+    Przygotowuje zasób (np. duszka) do rysowania, wywołując jego metodę convert, która przekształca powierzchnie do formatu ekranu.
+    Jeśli tryb wyświetlania nie jest jeszcze ustawiony, zasób zostanie przygotowany przez prepare_assets.
+    """
+    _ASSETS.add(asset)
+    if pygame.display.get_surface() == None:
+        _PENDING_ASSETS.add(asset)
+    else:
+        asset.convert()
+
+def prepare_assets():
+    """Przygotowuje zasoby utworzone przed ustawieniem trybu wyświetlania, wywoływana przez initialize_pygame."""
+    for asset in list(_PENDING_ASSETS):
+        asset.convert()
+    _PENDING_ASSETS.clear()
+
+def get_assets():
+    """Zwraca listę istniejących zasobów przekazanych do prepare_asset (np. do zbudowania z nich SpriteAtlas)."""
+    return list(_ASSETS)
+
 def initialize_pygame(resolution = None, fullscreen = False):
     """
-    Inicjalizuje wymagane moduły pygame'a i ustawia tryb wyświetlania.
+    Inicjalizuje wymagane moduły pygame'a, ustawia tryb wyświetlania i przygotowuje utworzone wcześniej zasoby (prepare_assets).
     Zwraca powierzchnię ekranu.
     """
     pygame.init()
@@ -218,9 +355,11 @@ def initialize_pygame(resolution = None, fullscreen = False):
         resolution = vec2(0, 0)
         fullscreen = True
     if fullscreen:
-        return pygame.display.set_mode((0, 0), FULLSCREEN | DOUBLEBUF)
+        screen = pygame.display.set_mode((0, 0), FULLSCREEN | DOUBLEBUF)
     else:
-        return pygame.display.set_mode(resolution.intcpl(), DOUBLEBUF)
+        screen = pygame.display.set_mode(resolution.intcpl(), DOUBLEBUF)
+    prepare_assets()
+    return screen
 
 def draw_text_center(surface, font, text, color, region, offset = (0, 0)):
     """Rysuje tekst w środku zadanego prostokąta."""
@@ -240,29 +379,61 @@ def multiline_text(font, text, color):
         result.blit(L[i], ((result.get_size()[0] - L[i].get_size()[0]) // 2, i * height))
     return result
 
+def load_generated(name, parameters, generate):
+    """
+    Zwraca powierzchnię tworzoną przez generate() zapamiętaną na dysku w katalogu CACHE_DIR. Plik jest identyfikowany nazwą generatora,
+    jego parametrami i GENERATED_VERSION, którą należy zwiększyć po zmianie kodu generatorów. Jeśli pliku nie ma lub nie da się go wczytać,
+    powierzchnia jest tworzona i zapisywana, błędy zapisu są pomijane.
+    """
+    key = hashlib.sha1(repr((name, parameters, GENERATED_VERSION)).encode("utf-8")).hexdigest()
+    file_name = os.path.join(CACHE_DIR, "%s-%s.png" % (name, key))
+    try:
+        return pygame.image.load(file_name)
+    except (OSError, pygame.error):
+        pass
+    surface = generate()
+    try:
+        os.makedirs(CACHE_DIR, exist_ok = True)
+        temporary_name = "%s-%d.tmp.png" % (file_name[:-4], os.getpid())
+        pygame.image.save(surface, temporary_name)
+        os.replace(temporary_name, file_name)
+    except (OSError, pygame.error):
+        pass
+    return surface
+
+def _pixel_centers(size):
+    """Zwraca tablice współrzędnych x i y środków pikseli powierzchni o rozmiarze size, indeksowane [x, y] jak w pygame.surfarray."""
+    return numpy.meshgrid(numpy.arange(size[0]) + 0.5, numpy.arange(size[1]) + 0.5, indexing = "ij")
+
+def _uv_lerp(x, y, A, B, D):
+    """Zwraca współrzędne (u, v) punktów (x, y) w równoległoboku o wierzchołku A i krawędziach AB i AD."""
+    V = B - A
+    U = D - A
+    u = (V.y * (x - A.x) - V.x * (y - A.y)) / (U.x * V.y - U.y * V.x)
+    v = (y - A.y - u * U.y) / V.y
+    return u, v
+
+def _tile_coverage(tile_size):
+    """Zwraca tablicę (indeksowaną [x, y]) pikseli leżących wewnątrz rombu kafla."""
+    x, y = _pixel_centers(tile_size.intcpl())
+    A = vec2(0.0, tile_size.y * 0.5)
+    B = vec2(tile_size.x * 0.5, 0.0)
+    D = vec2(tile_size.x * 0.5, tile_size.y)
+    u, v = _uv_lerp(x, y, A, B, D)
+    return (0.0 < u) & (u < 1.0) & (0.0 < v) & (v < 1.0)
+
+def _fill_where(surface, where, color):
+    """Ustawia pikselom powierzchni z kanałem alfa wskazanym tablicą where (indeksowaną [x, y]) kolor color."""
+    pixels, alpha = pygame.surfarray.pixels3d(surface), pygame.surfarray.pixels_alpha(surface)
+    pixels[where] = color[:3]
+    alpha[where] = color[3]
+    del pixels, alpha
+
 def create_tile_mask(tile_size):
     """Tworzy maskę kafla, tj. powierzchnię z wyzerowanym kanalem alfa w miejscach które nie powinny być widoczne."""
-    def uv_lerp(X, A, B, C, D):
-        V = B - A
-        U = D - A
-        u = (V.y * (X.x - A.x) - V.x * (X.y - A.y)) / (U.x * V.y - U.y * V.x)
-        v = (X.y - A.y - u * U.y) / V.y
-        return u, v
     mask = pygame.Surface(tile_size.intcpl(), SRCALPHA)
     mask.fill((0, 0, 0, 0))
-    half = int(tile_size.y / 2)
-    A = vec2(0.0, tile_size.y * 0.5)
-    B = vec2(tile_size.x * 0.5, 0.0)
-    C = vec2(tile_size.x , tile_size.y * 0.5)
-    D = vec2(tile_size.x * 0.5, tile_size.y)
-    mask.lock()
-    for y in range(tile_size.y):
-        for x in range(tile_size.x):
-            position = vec2(x + 0.5, y + 0.5)
-            u, v = uv_lerp(position, A, B, C, D)
-            if 0.0 < u < 1.0 and 0.0 < v < 1.0:
-                mask.set_at((x, y), (255, 255, 255, 255))
-    mask.unlock()
+    _fill_where(mask, _tile_coverage(tile_size), (255, 255, 255, 255))
     return mask
 
 def create_blend_mask(number, tile_size):
@@ -270,25 +441,18 @@ def create_blend_mask(number, tile_size):
     Tworzy maskę do mieszania kolorów, zawiera kanał alpha odpowiednio interpolowany po równoległoboku.
     number jest to maska bitowa mówiąca o tym które pola sąsiadujące z tym kaflem są takie same a które inne.
     """
-    def uv_lerp(X, A, B, C, D):
-            V = B - A
-            U = D - A
-            u = (V.y * (X.x - A.x) - V.x * (X.y - A.y)) / (U.x * V.y - U.y * V.x)
-            v = (X.y - A.y - u * U.y) / V.y
-            return u, v
-
-    def gradient(A, B, C, D, a, b, c, d, surface):
-        center = tile_size * 0.5
-        for y in range(int(tile_size.y)):
-            for x in range(int(tile_size.x)):
-                point = vec2(x + 0.5, y + 0.5)
-                u, v = uv_lerp(point, A, B, C, D)
-                if -0.05 <= u and u <= 1.05 and -0.05 <= v and v <= 1.05:
-                    m = (1.0 - v) * a + v * b
-                    n = (1.0 - v) * d + v * c
-                    value = (1.0 - u) * m + u * n
-                    alpha = clamp(int(255.0 * value), 0, 255)
-                    surface.set_at((x, y), (255, 255, 255, alpha))
+    x, y = _pixel_centers(tile_size.intcpl())
+    alpha = numpy.zeros(x.shape, numpy.uint8)
+    covered = numpy.zeros(x.shape, bool)
+
+    def gradient(A, B, C, D, a, b, c, d):
+        u, v = _uv_lerp(x, y, A, B, D)
+        inside = (-0.05 <= u) & (u <= 1.05) & (-0.05 <= v) & (v <= 1.05)
+        m = (1.0 - v) * a + v * b
+        n = (1.0 - v) * d + v * c
+        value = (1.0 - u) * m + u * n
+        alpha[inside] = numpy.clip(numpy.trunc(255.0 * value[inside]), 0, 255)
+        covered[inside] = True
 
     def int_to_list(x):
         return [(x >> i) & 1 for i in range(8)]
@@ -297,117 +461,116 @@ def create_blend_mask(number, tile_size):
                 vec2(tile_size.x * 0.5, tile_size.y), tile_size * 0.75, vec2(tile_size.x, tile_size.y * 0.5), vec2(tile_size.x * 0.75, tile_size.y * 0.25)]
 
     factors = int_to_list(number)
-    surface = pygame.Surface(tile_size.intcpl(), SRCALPHA)
     center = tile_size * 0.5
-    gradient(VECTORS[2], VECTORS[1], center, VECTORS[3], factors[2], factors[1], 0.0, factors[3], surface)
-    gradient(VECTORS[3], center, VECTORS[5], VECTORS[4], factors[3], 0.0, factors[5], factors[4], surface)
-    gradient(center, VECTORS[7], VECTORS[6], VECTORS[5], 0.0, factors[7], factors[6], factors[5], surface)
-    gradient(VECTORS[1], VECTORS[0], VECTORS[7], center, factors[1], factors[0], factors[7], 0.0, surface)
+    gradient(VECTORS[2], VECTORS[1], center, VECTORS[3], factors[2], factors[1], 0.0, factors[3])
+    gradient(VECTORS[3], center, VECTORS[5], VECTORS[4], factors[3], 0.0, factors[5], factors[4])
+    gradient(center, VECTORS[7], VECTORS[6], VECTORS[5], 0.0, factors[7], factors[6], factors[5])
+    gradient(VECTORS[1], VECTORS[0], VECTORS[7], center, factors[1], factors[0], factors[7], 0.0)
+    surface = pygame.Surface(tile_size.intcpl(), SRCALPHA)
+    surface.fill((0, 0, 0, 0))
+    pygame.surfarray.pixels3d(surface)[covered] = 255
+    pygame.surfarray.pixels_alpha(surface)[...] = alpha
     mask = create_tile_mask(tile_size)
     surface.blit(mask, (0, 0), None, BLEND_RGBA_MULT)
 
     return surface
 
-def create_color_mask(tile_size, color):
-    """Tworzy kafla wypełnionego jednolitym kolorem."""
-    def uv_lerp(X, A, B, C, D):
-        V = B - A
-        U = D - A
-        u = (V.y * (X.x - A.x) - V.x * (X.y - A.y)) / (U.x * V.y - U.y * V.x)
-        v = (X.y - A.y - u * U.y) / V.y
-        return u, v
+def _color_mask(tile_size, color):
     mask = pygame.Surface(tile_size.intcpl(), SRCALPHA)
     mask.fill((0, 0, 0, 0))
-    half = int(tile_size.y / 2)
-    A = vec2(0.0, tile_size.y * 0.5)
-    B = vec2(tile_size.x * 0.5, 0.0)
-    C = vec2(tile_size.x, tile_size.y * 0.5)
-    D = vec2(tile_size.x * 0.5, tile_size.y)
-    mask.lock()
-    for y in range(tile_size.y):
-        for x in range(tile_size.x):
-            position = vec2(x + 0.5, y + 0.5)
-            u, v = uv_lerp(position, A, B, C, D)
-            if 0.0 < u < 1.0 and 0.0 < v < 1.0:
-                mask.set_at((x, y), color)
-    mask.unlock()
+    _fill_where(mask, _tile_coverage(tile_size), color)
     return mask
 
-def prepare_blend_mask_set(tile_size, file_name = "data/masks.png"):
-    """Tworzy zbiór masek do mieszania kafli i zapisuje je do pliku."""
+def create_color_mask(tile_size, color):
+    """Tworzy kafla wypełnionego jednolitym kolorem."""
+    return load_generated("color_mask", (tile_size.intcpl(), tuple(color)), lambda: _color_mask(tile_size, color))
+
+def _blend_mask_sheet(tile_size):
+    """Tworzy powierzchnię z 256 maskami mieszania kafli ułożonymi jedna pod drugą."""
     MASK_NUMBER = 256
-    masks = [create_blend_mask(i, tile_size) for i in range(MASK_NUMBER)]
     surface = pygame.Surface((tile_size.x, tile_size.y * MASK_NUMBER), SRCALPHA)
-    for i in range(len(masks)):
-        surface.blit(masks[i], (0, i * tile_size.y))
-    pygame.image.save(surface, file_name)
+    for i in range(MASK_NUMBER):
+        surface.blit(create_blend_mask(i, tile_size), (0, i * tile_size.y))
+    return surface
+
+def prepare_blend_mask_set(tile_size, file_name = "data/masks.png"):
+    """Tworzy zbiór masek do mieszania kafli i zapisuje je do pliku."""
+    pygame.image.save(_blend_mask_sheet(tile_size), file_name)
 
 def load_blen_mask_set(tile_size, file_name = "data/masks.png"):
-    """Wczytuje maski mieszania z pliku."""
-    # prepare_blend_mask_set(tile_size, "data/masks.png")
-    surface = None
+    """Wczytuje maski mieszania z pliku, a jeśli go nie ma, tworzy je lub wczytuje z katalogu CACHE_DIR (load_generated)."""
     try:
         surface = pygame.image.load(file_name)
-    except:
-        prepare_blend_mask_set(tile_size, file_name)
-    surface = pygame.image.load(file_name)
+    except (OSError, pygame.error):
+        surface = load_generated("blend_masks", tile_size.intcpl(), lambda: _blend_mask_sheet(tile_size))
     return [surface.subsurface((0, x * tile_size.y) + tile_size.intcpl()) for x in range(256)]
 
-def create_ball_sprites(number, radius, color):
-    """Tworzy powierzchnię z cząsteczkami używanymi w efekcie "fali"."""
-    def lerp(a, b, t):
-        return ((1.0 - t) * a[0] + t * b[0], (1.0 - t) * a[1] + t * b[1], (1.0 - t) * a[2] + t * b[2], (1.0 - t) * a[3] + t * b[3])
+def _lerp_color(a, b, t):
+    return ((1.0 - t) * a[0] + t * b[0], (1.0 - t) * a[1] + t * b[1], (1.0 - t) * a[2] + t * b[2], (1.0 - t) * a[3] + t * b[3])
+
+def _ball_sheet(number, radius, color):
     double_radius = radius + radius
     surface = pygame.Surface((double_radius * number, double_radius), SRCALPHA)
     for i in range(number):
-        pygame.gfxdraw.filled_circle(surface, i * double_radius + radius, radius, radius, lerp(color[0], color[1], i / (number - 1)))
+        pygame.gfxdraw.filled_circle(surface, i * double_radius + radius, radius, radius, _lerp_color(color[0], color[1], i / (number - 1)))
+    return surface
+
+def create_ball_sprites(number, radius, color):
+    """Tworzy powierzchnię z cząsteczkami używanymi w efekcie "fali"."""
+    double_radius = radius + radius
+    surface = load_generated("ball_sprites", (number, radius, color), lambda: _ball_sheet(number, radius, color))
     return [surface.subsurface((x * double_radius, 0, double_radius, double_radius)) for x in range(number)]
 
-def create_star_sprites(number, radius, color):
-    """Tworzy powierzchnię z cząsteczkami używanymi w efekcie "kuli"."""
-    def lerp(a, b, t):
-        return ((1.0 - t) * a[0] + t * b[0], (1.0 - t) * a[1] + t * b[1], (1.0 - t) * a[2] + t * b[2], (1.0 - t) * a[3] + t * b[3])
+def _star_sheet(number, radius, color):
     double_radius = radius + radius
     surface = pygame.Surface((double_radius * number, double_radius), SRCALPHA)
     for i in range(number):
         for j in range(8):
             point = rotate2(vec2(1.0, 0.0), random() * pi * 2) * radius
             center = vec2(i * double_radius + radius, radius)
-            pygame.gfxdraw.line(surface, int(center.x), int(center.y), int(center.x + point.x), int(center.y + point.y), lerp(color[0], color[1], i / (number - 1)))
+            pygame.gfxdraw.line(surface, int(center.x), int(center.y), int(center.x + point.x), int(center.y + point.y), _lerp_color(color[0], color[1], i / (number - 1)))
+    return surface
+
+def create_star_sprites(number, radius, color):
+    """Tworzy powierzchnię z cząsteczkami używanymi w efekcie "kuli". Losowe promienie gwiazd są zapamiętywane razem z powierzchnią."""
+    double_radius = radius + radius
+    surface = load_generated("star_sprites", (number, radius, color), lambda: _star_sheet(number, radius, color))
     return [surface.subsurface((x * double_radius, 0, double_radius, double_radius)) for x in range(number)]
 
-def create_shield_sprite(radius, color):
-    """Tworzy powierzchnię z cząsteczkami używanymi w efekcie "tarczy"."""
-    def my_lerp(a, b, t):
-        return ((1.0 - t) * a[0] + t * b[0], (1.0 - t) * a[1] + t * b[1], (1.0 - t) * a[2] + t * b[2], ((1.0 - t) * a[3] + t * b[3]) * 0.25)
+def _shield_sprite(radius, color):
     double_radius = radius * 2
     surface = pygame.Surface((double_radius, double_radius), SRCALPHA)
-    for y in range(double_radius):
-        for x in range(double_radius):
-            dx = x - radius
-            dy = y - radius
-            if sqrt(dx * dx + dy * dy) <= radius:
-                surface.set_at((x, y), my_lerp(color[0], color[1], x / double_radius))
-
-    rotated = pygame.transform.rotate(surface, 45)
-    offset = (vec2(rotated.get_size()) - vec2(surface.get_size())) // 2
-
+    x, y = _pixel_centers((double_radius, double_radius))
+    x, y = x - 0.5 - radius, y - 0.5 - radius
+    inside = numpy.sqrt(x * x + y * y) <= radius
+    t = numpy.arange(double_radius)[:, numpy.newaxis] / double_radius
+    channels = [numpy.broadcast_to(numpy.trunc((1.0 - t) * a + t * b), inside.shape) for a, b in zip(color[0], color[1])]
+    channels[3] = numpy.broadcast_to(numpy.trunc(((1.0 - t) * color[0][3] + t * color[1][3]) * 0.25), inside.shape)
+    pixels, alpha = pygame.surfarray.pixels3d(surface), pygame.surfarray.pixels_alpha(surface)
+    pixels[inside] = numpy.stack(channels[:3], -1)[inside]
+    alpha[inside] = channels[3][inside]
+    del pixels, alpha
     return pygame.transform.rotate(surface, 45)
 
-def create_hp_bar_sprites(size):
-    """Tworzy powierzchnię z paskami życia (od 0% do 100%)."""
+def create_shield_sprite(radius, color):
+    """Tworzy powierzchnię z cząsteczkami używanymi w efekcie "tarczy"."""
+    return load_generated("shield_sprite", (radius, color), lambda: _shield_sprite(radius, color))
+
+def _bar_sheet(size, color):
     surface = pygame.Surface((size.x, size.y * size.x), SRCALPHA)
     for i in range(size.x):
         pygame.draw.rect(surface, (0, 0, 0, 255), (0, i * size.y, size.x, size.y))
-        pygame.draw.rect(surface, (255 - int(255 * (i / size.x)), int(255 * (i / size.x)), 0, 255), (0, i * size.y, i + 1, size.y))
+        pygame.draw.rect(surface, color(i / size.x), (0, i * size.y, i + 1, size.y))
+    return surface
+
+def create_hp_bar_sprites(size):
+    """Tworzy powierzchnię z paskami życia (od 0% do 100%)."""
+    surface = load_generated("hp_bar_sprites", size.intcpl(), lambda: _bar_sheet(size, lambda t: (255 - int(255 * t), int(255 * t), 0, 255)))
     return [surface.subsurface((0, i * size.y, size.x, size.y)) for i in range(size.x)]
 
 def create_mg_bar_sprites(size):
     """Tworzy powierzchnię z paskami życia (od 0% do 100%)."""
-    surface = pygame.Surface((size.x, size.y * size.x), SRCALPHA)
-    for i in range(size.x):
-        pygame.draw.rect(surface, (0, 0, 0, 255), (0, i * size.y, size.x, size.y))
-        pygame.draw.rect(surface, (0, 255 - int(255 * (i / size.x)), 255, 255), (0, i * size.y, i + 1, size.y))
+    surface = load_generated("mg_bar_sprites", size.intcpl(), lambda: _bar_sheet(size, lambda t: (0, 255 - int(255 * t), 255, 255)))
     return [surface.subsurface((0, i * size.y, size.x, size.y)) for i in range(size.x)]
 
 def extrude_paths(x):